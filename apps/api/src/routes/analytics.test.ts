@@ -0,0 +1,80 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { analytics } from '@climbtracker/analytics';
+import app from './analytics';
+import { testRequest } from '../test/helpers';
+
+describe('POST /batch', () => {
+  beforeEach(() => {
+    vi.restoreAllMocks();
+    vi.spyOn(analytics, 'track').mockResolvedValue();
+    vi.spyOn(analytics, 'identify').mockResolvedValue();
+  });
+
+  it('rejects an empty batch', async () => {
+    const response = await testRequest(app, 'POST', '/batch', { body: { events: [] } });
+
+    expect(response.status).toBe(400);
+    expect(response.data.error).toBe('Events required');
+    expect(analytics.track).not.toHaveBeenCalled();
+  });
+
+  it('rejects a body without events', async () => {
+    const response = await testRequest(app, 'POST', '/batch', { body: { event: 'page_view' } });
+
+    expect(response.status).toBe(400);
+  });
+
+  it('rejects more than 100 events without tracking any', async () => {
+    const events = Array.from({ length: 101 }, (_, i) => ({ type: 'track', event: `event_${i}` }));
+
+    const response = await testRequest(app, 'POST', '/batch', { body: { events } });
+
+    expect(response.status).toBe(400);
+    expect(response.data.error).toBe('At most 100 events per batch');
+    expect(analytics.track).not.toHaveBeenCalled();
+  });
+
+  it('accepts exactly 100 events', async () => {
+    const events = Array.from({ length: 100 }, (_, i) => ({ type: 'track', event: `event_${i}` }));
+
+    const response = await testRequest(app, 'POST', '/batch', { body: { events } });
+
+    expect(response.status).toBe(200);
+    expect(response.data.data).toEqual({ accepted: 100, rejected: 0 });
+    expect(analytics.track).toHaveBeenCalledTimes(100);
+  });
+
+  it('tracks the valid items of a mixed batch and counts the others', async () => {
+    const events = [
+      { type: 'track', event: 'route_view', properties: { difficulty: 'Rouge' } },
+      { type: 'track' },
+      { type: 'identify', userId: 'user-1', traits: { plan: 'premium' } },
+      { type: 'identify', traits: { plan: 'free' } },
+      null,
+    ];
+
+    const response = await testRequest(app, 'POST', '/batch', { body: { events } });
+
+    expect(response.status).toBe(200);
+    expect(response.data.data).toEqual({ accepted: 2, rejected: 3 });
+    expect(analytics.track).toHaveBeenCalledTimes(1);
+    expect(analytics.track).toHaveBeenCalledWith('route_view', { difficulty: 'Rouge' });
+    expect(analytics.identify).toHaveBeenCalledTimes(1);
+    expect(analytics.identify).toHaveBeenCalledWith('user-1', { plan: 'premium' });
+  });
+
+  it('rejects items of an unknown type', async () => {
+    const events = [
+      { type: 'bogus', event: 'x' },
+      { event: 'no_type' },
+      { type: 'track', event: 'route_view' },
+    ];
+
+    const response = await testRequest(app, 'POST', '/batch', { body: { events } });
+
+    expect(response.status).toBe(200);
+    expect(response.data.data).toEqual({ accepted: 1, rejected: 2 });
+    expect(analytics.track).toHaveBeenCalledTimes(1);
+    expect(analytics.track).toHaveBeenCalledWith('route_view', undefined);
+  });
+});
@@ -42,6 +42,40 @@ app.post('/identify', async (c) => {
   }
 });
 
+const MAX_BATCH_EVENTS = 100;
+
+// POST /api/analytics/batch - Track several events in one request
+// Items are { type: 'track', event, properties } or { type: 'identify', userId, traits }
+app.post('/batch', async (c) => {
+  try {
+    const body = await c.req.json();
+    const items = Array.isArray(body?.events) ? body.events : null;
+
+    if (!items || items.length === 0) {
+      return c.json({ error: 'Events required' }, 400);
+    }
+    if (items.length > MAX_BATCH_EVENTS) {
+      return c.json({ error: `At most ${MAX_BATCH_EVENTS} events per batch` }, 400);
+    }
+
+    // Unknown types are rejected, not tracked
+    const valid = items.filter((item: any) =>
+      (item?.type === 'track' && !!item.event) || (item?.type === 'identify' && !!item.userId)
+    );
+
+    await Promise.all(valid.map((item: any) =>
+      item.type === 'identify'
+        ? analytics.identify(item.userId, item.traits)
+        : analytics.track(item.event, item.properties)
+    ));
+
+    return c.json({ success: true, data: { accepted: valid.length, rejected: items.length - valid.length } });
+  } catch (error: any) {
+    console.error('[analytics] Batch error:', error);
+    return c.json({ error: 'Failed to track events' }, 500);
+  }
+});
+
 // Helper functions to track server-side events
 export const serverEvents = {
   userRegistered: (userId: string, method: string) =>
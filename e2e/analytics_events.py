@@ -0,0 +1,126 @@
+"""
+Analytics events sent by the web app, per test (ANALYTICS_EVENTS=true)
+
+apps/web/src/lib/analytics.ts POSTs every event to /api/analytics/track (and
+/identify) on its own. A script injected in every page records those
+requests, and in builds where analytics is disabled the events the client
+only logs ("[Analytics]" console lines), so every journey gets its count
+either way. Events are kept in sessionStorage, so page loads between two
+drains lose nothing.
+
+The stream of each test goes to reports/analytics_events/<test>.jsonl, which
+analytics_load.py replays from many users.
+"""
+
+import json
+import os
+import re
+
+
+ANALYTICS_EVENTS_DIR = os.path.join("reports", "analytics_events")
+
+ANALYTICS_CAPTURE = """
+if (!window.__analyticsCapture) {
+    window.__analyticsCapture = true;
+    const KEY = '__analyticsEvents';
+    const push = entry => {
+        try {
+            const events = JSON.parse(sessionStorage.getItem(KEY) || '[]');
+            events.push(entry);
+            sessionStorage.setItem(KEY, JSON.stringify(events));
+        } catch (e) {}
+    };
+
+    const originalFetch = window.fetch;
+    window.fetch = function (input, init) {
+        const url = String(typeof input === 'string' || input instanceof URL ? input : input.url);
+        const path = new URL(url, location.href).pathname;
+        if (path.startsWith('/api/analytics/')) {
+            let body = null;
+            try { body = JSON.parse(init && init.body); } catch (e) {}
+            push({path, body, at: Date.now(), sent: true});
+        }
+        return originalFetch.apply(this, arguments);
+    };
+
+    // Disabled client: console.log('[Analytics]', event, properties) instead of the request
+    const originalLog = console.log;
+    console.log = function (...args) {
+        if (args[0] === '[Analytics]' && typeof args[1] === 'string') {
+            push({path: '/api/analytics/track', body: {event: args[1], properties: args[2] || {}},
+                  at: Date.now(), sent: false});
+        }
+        return originalLog.apply(this, args);
+    };
+}
+"""
+
+DRAIN_SCRIPT = """
+let events = [];
+try {
+    events = JSON.parse(sessionStorage.getItem('__analyticsEvents') || '[]');
+    sessionStorage.removeItem('__analyticsEvents');
+} catch (e) {}
+return events;
+"""
+
+
+class AnalyticsLog:
+    """Analytics events of one browser, per test"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": ANALYTICS_CAPTURE})
+        driver.execute_script(ANALYTICS_CAPTURE)
+
+    def drain(self):
+        """Events captured since the last drain, oldest first"""
+        try:
+            return self.driver.execute_script(DRAIN_SCRIPT) or []
+        except Exception:
+            # Page navigating or browser gone
+            return []
+
+    def start_test(self):
+        self.drain()
+
+    def finish_test(self, nodeid):
+        """Close the current test, return (its events, stream file path or None)"""
+        events = self.drain()
+        if not events:
+            return events, None
+        os.makedirs(ANALYTICS_EVENTS_DIR, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", nodeid)[:150]
+        path = os.path.join(ANALYTICS_EVENTS_DIR, f"{safe_name}.jsonl")
+        first = events[0]["at"]
+        with open(path, "w") as f:
+            for e in events:
+                f.write(json.dumps({"offset_ms": e["at"] - first, "path": e["path"], "body": e["body"],
+                                    "sent": e["sent"]}) + "\n")
+        return events, path
+
+
+def event_counts(events):
+    """{event name: count}, identify calls as "$identify" """
+    counts = {}
+    for e in events:
+        body = e.get("body") or {}
+        name = "$identify" if e["path"].endswith("/identify") else body.get("event", "?")
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def load_streams(directory=ANALYTICS_EVENTS_DIR):
+    """{file name: [(offset ms, path, body)]} of the recorded streams"""
+    streams = {}
+    if not os.path.isdir(directory):
+        return streams
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        events = [(e["offset_ms"], e["path"], e["body"]) for e in events if e.get("body")]
+        if events:
+            streams[name] = events
+    return streams
@@ -0,0 +1,266 @@
+"""
+Analytics ingestion load
+
+Replays the analytics event streams recorded during the e2e tests
+(reports/analytics_events, see analytics_events.py) from
+ANALYTICS_LOAD_USERS virtual users at once, in two modes:
+- per-event  one POST /api/analytics/track (or /identify) per event, fired
+             without waiting like apps/web/src/lib/analytics.ts does
+- batched    events queued per user and sent to POST /api/analytics/batch,
+             ANALYTICS_BATCH_SIZE at a time and at least every
+             ANALYTICS_BATCH_INTERVAL_S
+Each user loops over random recorded journeys for ANALYTICS_LOAD_DURATION
+seconds, with the recorded gaps divided by ANALYTICS_LOAD_SPEEDUP. Without
+recordings (run the e2e tests with ANALYTICS_EVENTS=true first),
+DEFAULT_JOURNEY is replayed.
+
+Reported per mode: events and requests per second, request latency, delay
+from event to acknowledgement, errors, and the API's CPU time per 1k events
+(from /proc, see bench.py).
+
+Usage:
+    python analytics_load.py
+    python analytics_load.py --users 5000 --mode batched
+    python analytics_load.py --api-pid 12345
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import time
+
+from analytics_events import ANALYTICS_EVENTS_DIR, load_streams
+from api_client import AsyncApiClient
+from bench import BenchSamples, api_pid, cpu_seconds, save_bench_run
+from config import (
+    ANALYTICS_LOAD_USERS,
+    ANALYTICS_LOAD_DURATION,
+    ANALYTICS_LOAD_SPEEDUP,
+    ANALYTICS_LOAD_CONNECTIONS,
+    ANALYTICS_BATCH_SIZE,
+    ANALYTICS_BATCH_INTERVAL_S,
+)
+from perf_stats import percentile
+
+
+BATCH_PATH = "/api/analytics/batch"
+# Pause between two journeys of a user, before the speedup
+JOURNEY_GAP_S = 30
+
+# The events trackEvent (apps/web/src/lib/analytics.ts) defines for a typical visit
+DEFAULT_JOURNEY = [
+    (0, "/api/analytics/track", {"event": "session_start", "properties": {}}),
+    (4000, "/api/analytics/track", {"event": "leaderboard_open", "properties": {}}),
+    (9000, "/api/analytics/track", {"event": "routes_search", "properties": {"query": "", "sector": "A"}}),
+    (15000, "/api/analytics/track", {"event": "route_view", "properties": {"difficulty": "Rouge"}}),
+    (40000, "/api/analytics/track", {"event": "route_validate",
+                                     "properties": {"difficulty": "Rouge", "attempts": 2, "isFlashed": False}}),
+    (60000, "/api/analytics/track", {"event": "comment_post", "properties": {}}),
+    (80000, "/api/analytics/track", {"event": "pricing_view", "properties": {}}),
+]
+
+
+def personalise(path, body, user):
+    """The recorded body as sent by `user` now"""
+    if path.endswith("/identify"):
+        return {**body, "userId": user}
+    properties = {**(body.get("properties") or {}), "userId": user,
+                  "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()}
+    return {**body, "properties": properties}
+
+
+class IngestStats:
+    def __init__(self):
+        self.latencies = []
+        self.delays = []
+        self.events = 0
+        self.requests = 0
+        self.errors = {}
+        self.pending = set()
+
+    def send(self, api, path, body, created):
+        """POST without waiting; `created` holds the perf_counter time of each event it carries"""
+        task = asyncio.ensure_future(self._post(api, path, body, created))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _post(self, api, path, body, created):
+        try:
+            response = await api.request("POST", path, body=body)
+        except Exception as e:
+            self.errors[type(e).__name__] = self.errors.get(type(e).__name__, 0) + 1
+            return
+        self.requests += 1
+        if not response.ok:
+            self.errors[str(response.status)] = self.errors.get(str(response.status), 0) + 1
+            return
+        now = time.perf_counter()
+        self.latencies.append(response.elapsed_ms)
+        self.delays.extend((now - t) * 1000 for t in created)
+        self.events += len(created)
+
+
+class Batcher:
+    """Client-side queue of one user, flushed when full and on a timer"""
+
+    def __init__(self, api, stats, size=ANALYTICS_BATCH_SIZE, interval=ANALYTICS_BATCH_INTERVAL_S):
+        self.api = api
+        self.stats = stats
+        self.size = size
+        self.interval = interval
+        self.items = []
+        self.created = []
+
+    def add(self, path, body):
+        self.items.append({"type": "identify" if path.endswith("/identify") else "track", **body})
+        self.created.append(time.perf_counter())
+        if len(self.items) >= self.size:
+            self.flush()
+
+    def flush(self):
+        if self.items:
+            self.stats.send(self.api, BATCH_PATH, {"events": self.items}, self.created)
+            self.items, self.created = [], []
+
+    async def run(self, deadline):
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            await asyncio.sleep(min(self.interval, deadline - loop.time()))
+            self.flush()
+        self.flush()
+
+
+async def virtual_user(api, journeys, mode, deadline, stats, rng, index):
+    loop = asyncio.get_running_loop()
+    user = f"analytics-load-{index}"
+    batcher = Batcher(api, stats) if mode == "batched" else None
+    flusher = asyncio.ensure_future(batcher.run(deadline)) if batcher else None
+    # Users arrive spread over one journey gap
+    next_start = loop.time() + rng.uniform(0, JOURNEY_GAP_S / ANALYTICS_LOAD_SPEEDUP)
+    while next_start < deadline:
+        journey = rng.choice(journeys)
+        for offset_ms, path, body in journey:
+            at = next_start + offset_ms / 1000 / ANALYTICS_LOAD_SPEEDUP
+            if at >= deadline:
+                break
+            await asyncio.sleep(max(0.0, at - loop.time()))
+            body = personalise(path, body, user)
+            if batcher:
+                batcher.add(path, body)
+            else:
+                stats.send(api, path, body, [time.perf_counter()])
+        next_start = loop.time() + JOURNEY_GAP_S / ANALYTICS_LOAD_SPEEDUP
+    if flusher:
+        await flusher
+
+
+async def run_mode(mode, journeys, users, duration, pid):
+    stats = IngestStats()
+    async with AsyncApiClient(pool_size=ANALYTICS_LOAD_CONNECTIONS) as api:
+        rng = random.Random(0)
+        cpu_before = cpu_seconds(pid) if pid else None
+        start = time.perf_counter()
+        deadline = asyncio.get_running_loop().time() + duration
+        await asyncio.gather(*(virtual_user(api, journeys, mode, deadline, stats, rng, i) for i in range(users)))
+        elapsed = time.perf_counter() - start
+        # Requests still in flight count towards CPU
+        if stats.pending:
+            await asyncio.wait(stats.pending)
+        cpu_after = cpu_seconds(pid) if pid else None
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    return stats, elapsed, cpu
+
+
+def report(mode, stats, elapsed, cpu, record):
+    """Print one mode, record its samples; returns (requests/s, CPU ms per 1k events or None)"""
+    events_per_s, requests_per_s = stats.events / elapsed, stats.requests / elapsed
+    print(f"\n{mode}: {stats.events} events in {stats.requests} requests over {elapsed:.0f}s")
+    print(f"  Throughput: {events_per_s:.1f} events/s, {requests_per_s:.1f} requests/s")
+    if stats.latencies:
+        print(f"  Request:    p50 {percentile(stats.latencies, 50):.1f}ms, p95 {percentile(stats.latencies, 95):.1f}ms, "
+              f"p99 {percentile(stats.latencies, 99):.1f}ms")
+        print(f"  Delivered:  p50 {percentile(stats.delays, 50):.0f}ms, p95 {percentile(stats.delays, 95):.0f}ms "
+              f"after the event")
+        record(f"{mode}:request_p95_ms", percentile(stats.latencies, 95))
+        record(f"{mode}:delivery_p95_ms", percentile(stats.delays, 95))
+    if stats.errors:
+        print(f"  Errors:     {', '.join(f'{k}: {v}' for k, v in sorted(stats.errors.items()))}")
+    record(f"{mode}:events_per_s", events_per_s)
+    record(f"{mode}:requests_per_s", requests_per_s)
+    record(f"{mode}:errors", sum(stats.errors.values()))
+    cpu_per_1k = None
+    if cpu is None:
+        print("  API CPU:    not measured (API process not found, pass --api-pid)")
+    else:
+        cpu_per_1k = cpu * 1000 * 1000 / max(stats.events, 1)
+        print(f"  API CPU:    {cpu / elapsed:.1%} of a core, {cpu_per_1k:.0f}ms per 1k events")
+        record(f"{mode}:api_cpu_ms_per_1k_events", cpu_per_1k)
+    return requests_per_s, cpu_per_1k
+
+
+async def batch_endpoint_available():
+    async with AsyncApiClient(pool_size=1) as api:
+        response = await api.request("POST", BATCH_PATH, body={"events": [
+            {"type": "track", "event": "analytics_load_check", "properties": {}},
+        ]})
+    return response.ok
+
+
+def journeys_summary(streams):
+    """Print what the recorded journeys send, return them for the replay"""
+    print(f"{len(streams)} recorded journeys in {ANALYTICS_EVENTS_DIR}:")
+    for name, events in streams.items():
+        span = events[-1][0] / 1000
+        print(f"  {name[:70]:<70} {len(events):>4} events over {span:.0f}s")
+    return list(streams.values())
+
+
+async def run(modes, users, duration, pid):
+    streams = load_streams()
+    if streams:
+        journeys = journeys_summary(streams)
+    else:
+        print(f"No recorded analytics events in {ANALYTICS_EVENTS_DIR}, replaying DEFAULT_JOURNEY")
+        journeys = [DEFAULT_JOURNEY]
+    if "batched" in modes and not await batch_endpoint_available():
+        print(f"{BATCH_PATH} is not available on this API, batched mode skipped")
+        modes = [m for m in modes if m != "batched"]
+
+    samples = BenchSamples("analytics_load.py")
+    record = samples.record
+
+    results = {}
+    for mode in modes:
+        print(f"\n{users} users replaying journeys at {ANALYTICS_LOAD_SPEEDUP:g}x, {mode}, for {duration:g}s...")
+        stats, elapsed, cpu = await run_mode(mode, journeys, users, duration, pid)
+        results[mode] = report(mode, stats, elapsed, cpu, record)
+
+    if len(results) == 2:
+        (per_event_rps, per_event_cpu), (batched_rps, batched_cpu) = results["per-event"], results["batched"]
+        print(f"\nBatching sends {per_event_rps / max(batched_rps, 1e-9):.1f}x fewer requests", end="")
+        if per_event_cpu and batched_cpu:
+            print(f" and costs {per_event_cpu / batched_cpu:.1f}x less API CPU per event", end="")
+        print()
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analytics ingestion load")
+    parser.add_argument("--users", type=int, default=ANALYTICS_LOAD_USERS, help="Virtual users at once")
+    parser.add_argument("--duration", type=float, default=ANALYTICS_LOAD_DURATION, help="Seconds per mode")
+    parser.add_argument("--mode", choices=["per-event", "batched", "all"], default="all")
+    parser.add_argument("--api-pid", type=int, help="API process for CPU time (default: found from its port)")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    modes = ["per-event", "batched"] if args.mode == "all" else [args.mode]
+    pid = args.api_pid or api_pid()
+    samples = asyncio.run(run(modes, args.users, args.duration, pid))
+    if not args.no_store:
+        save_bench_run(samples, "analytics-load")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
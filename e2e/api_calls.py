@@ -0,0 +1,328 @@
+"""
+Log of the API requests pages make, with request-amplification detection
+
+A fetch wrapper injected in every page records each API request (method,
+URL, start/end time, status). The log is drained at every recorder step,
+so calls are attributed to the page load or interaction that caused them,
+then checked for:
+- duplicates  the same method + URL again within a couple of seconds
+- N+1         one endpoint called for many different ids in one step
+              (e.g. GET /api/routes/:id/completion-count per route card)
+- polling     the same request repeated at a steady interval during a test
+
+JSON responses are also measured (uncompressed, gzipped as a compressing
+proxy would send them, and on the wire when Content-Length is exposed) and
+held to the budgets in config.py. With PAYLOAD_FIELDS=true the parsed JSON
+is handed to the app behind a Proxy that records which keys it reads, so
+fields the UI never uses can be reported per endpoint.
+"""
+
+import json
+import os
+import re
+
+from config import (
+    API_URL,
+    API_CALLS_PER_PAGE,
+    DUPLICATE_WINDOW_MS,
+    N_PLUS_ONE_MIN_CALLS,
+    POLLING_MIN_CALLS,
+    PAYLOAD_BUDGETS_KB,
+    PAGE_PAYLOAD_BUDGET_KB,
+    PAYLOAD_FIELDS,
+)
+from perf import normalize_api_path
+from perf_stats import median
+
+
+API_CALLS_DIR = os.path.join("reports", "api_calls")
+
+# Wraps window.fetch; calls to the API are pushed to window.__apiCalls and the
+# keys the app reads from JSON responses go to window.__payloadFields per endpoint
+API_CALL_LOGGER = """
+if (!window.__apiCalls) {
+    window.__apiCalls = [];
+    window.__payloadFields = {};
+    const apiOrigin = %s;
+    const trackFields = %s;
+    const ID = /^(?=.*\\d)[0-9a-zA-Z_-]{8,}$|^\\d+$/;
+    const now = () => performance.timeOrigin + performance.now();
+
+    const endpointOf = (method, url) =>
+        method + ' ' + new URL(url).pathname.split('/').map(s => ID.test(s) ? ':id' : s).join('/');
+
+    const gzipSize = text => new Response(
+        new Blob([text]).stream().pipeThrough(new CompressionStream('gzip'))
+    ).arrayBuffer().then(b => b.byteLength);
+
+    // Every leaf path of a JSON value ("data.data[].opener.name")
+    const collect = (value, path, present) => {
+        if (Array.isArray(value)) {
+            if (!value.length) present.add(path);
+            value.forEach(v => collect(v, path + '[]', present));
+        } else if (value && typeof value === 'object') {
+            const keys = Object.keys(value);
+            if (!keys.length) present.add(path);
+            keys.forEach(k => collect(value[k], path ? path + '.' + k : k, present));
+        } else {
+            present.add(path);
+        }
+    };
+
+    // Same value, behind a Proxy recording the paths the app reads
+    const proxies = new WeakMap();
+    const track = (value, path, read) => {
+        if (!value || typeof value !== 'object') return value;
+        if (proxies.has(value)) return proxies.get(value);
+        const isArray = Array.isArray(value);
+        const proxy = new Proxy(value, {
+            get(target, key, receiver) {
+                const v = Reflect.get(target, key, receiver);
+                if (typeof key !== 'string' || !Object.prototype.hasOwnProperty.call(target, key)) return v;
+                if (isArray) return /^\\d+$/.test(key) ? track(v, path + '[]', read) : v;
+                const child = path ? path + '.' + key : key;
+                read.add(child);
+                return track(v, child, read);
+            },
+        });
+        proxies.set(value, proxy);
+        return proxy;
+    };
+
+    const originalFetch = window.fetch;
+    window.fetch = function (input, init) {
+        const url = String(typeof input === 'string' || input instanceof URL ? input : input.url);
+        if (!url.startsWith(apiOrigin)) return originalFetch.apply(this, arguments);
+        const method = ((init && init.method) || (input && input.method) || 'GET').toUpperCase();
+        const call = {method, url, start: now(), end: null, status: null,
+                      bytes: null, gzipBytes: null, wireBytes: null};
+        window.__apiCalls.push(call);
+        return originalFetch.apply(this, arguments).then(response => {
+            call.status = response.status;
+            call.end = now();
+            call.wireBytes = Number(response.headers.get('content-length')) || null;
+            response.json = async () => {
+                const text = await response.text();
+                call.bytes = new TextEncoder().encode(text).length;
+                gzipSize(text).then(n => { call.gzipBytes = n; }, () => {});
+                const data = JSON.parse(text);
+                if (!trackFields) return data;
+                const endpoint = endpointOf(method, url);
+                const usage = window.__payloadFields[endpoint] ||
+                    (window.__payloadFields[endpoint] = {present: new Set(), read: new Set()});
+                collect(data, '', usage.present);
+                return track(data, '', usage.read);
+            };
+            return response;
+        }, error => {
+            call.status = 0;
+            call.end = now();
+            throw error;
+        });
+    };
+}
+""" % (json.dumps(API_URL), json.dumps(PAYLOAD_FIELDS))
+
+DRAIN_SCRIPT = """
+const calls = window.__apiCalls || [];
+window.__apiCalls = [];
+const fields = {};
+for (const [endpoint, usage] of Object.entries(window.__payloadFields || {})) {
+    fields[endpoint] = {present: [...usage.present], read: [...usage.read]};
+}
+return {calls, fields};
+"""
+
+# Field usage of every endpoint over the session, for the over-fetch summary
+session_fields = {}
+
+
+class ApiCallLog:
+    """API requests of one browser, grouped by the step that caused them"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.steps = []
+        self.fields = {}
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": API_CALL_LOGGER})
+        driver.execute_script(API_CALL_LOGGER)
+
+    def drain(self):
+        """Calls logged by the current page since the last drain"""
+        try:
+            drained = self.driver.execute_script(DRAIN_SCRIPT) or {}
+        except Exception:
+            # Page navigating or browser gone
+            return []
+        # Field usage accumulates in the page, merge before a navigation wipes it
+        for endpoint, usage in drained.get("fields", {}).items():
+            for fields in (self.fields, session_fields):
+                merged = fields.setdefault(endpoint, {"present": set(), "read": set()})
+                merged["present"].update(usage["present"])
+                merged["read"].update(usage["read"])
+        return drained.get("calls", [])
+
+    def start_test(self):
+        self.drain()
+        self.steps = []
+        self.fields = {}
+
+    def add_step(self, name, calls):
+        self.steps.append((name, calls))
+
+    def finish_test(self, nodeid):
+        """Close the current test, return (findings, report file path)"""
+        leftover = self.drain()
+        if leftover:
+            self.steps.append(("(outside steps)", leftover))
+        findings = analyze_test(self.steps)
+
+        os.makedirs(API_CALLS_DIR, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", nodeid)[:150]
+        path = os.path.join(API_CALLS_DIR, f"{safe_name}.txt")
+        with open(path, "w") as f:
+            f.write(format_calls(nodeid, self.steps, findings))
+            f.write(format_payloads(self.steps, self.fields))
+        return findings, path
+
+
+def duplicates(calls, window_ms=DUPLICATE_WINDOW_MS):
+    """{(method, url): count} of requests repeated within `window_ms` of each other"""
+    last_start, counts = {}, {}
+    for c in sorted(calls, key=lambda c: c["start"]):
+        key = (c["method"], c["url"])
+        if key in last_start and c["start"] - last_start[key] <= window_ms:
+            counts[key] = counts.get(key, 1) + 1
+        last_start[key] = c["start"]
+    return counts
+
+
+def n_plus_one(calls, min_calls=N_PLUS_ONE_MIN_CALLS):
+    """{(method, endpoint): distinct URLs} for endpoints hit for many different ids"""
+    urls = {}
+    for c in calls:
+        endpoint = normalize_api_path(c["url"])
+        if ":id" in endpoint:
+            urls.setdefault((c["method"], endpoint), set()).add(c["url"])
+    return {key: len(u) for key, u in urls.items() if len(u) >= min_calls}
+
+
+def polling(calls, min_calls=POLLING_MIN_CALLS):
+    """{(method, url): period in ms} for requests repeated at a steady interval"""
+    starts = {}
+    for c in calls:
+        starts.setdefault((c["method"], c["url"]), []).append(c["start"])
+    found = {}
+    for key, times in starts.items():
+        if len(times) < min_calls:
+            continue
+        times.sort()
+        intervals = [b - a for a, b in zip(times, times[1:])]
+        period = median(intervals)
+        # Steady: most intervals within 25% of the median, and not a burst
+        steady = sum(abs(i - period) <= 0.25 * period for i in intervals) >= 0.75 * len(intervals)
+        if period >= 1000 and steady:
+            found[key] = period
+    return found
+
+
+def analyze_test(steps):
+    """Duplicates and N+1 per step, polling over the whole test"""
+    findings = []
+    for name, calls in steps:
+        for (method, url), n in duplicates(calls).items():
+            findings.append(f"{name}: duplicate {method} {url} x{n}")
+        for (method, endpoint), n in n_plus_one(calls).items():
+            findings.append(f"{name}: N+1 {method} {endpoint} for {n} ids")
+    all_calls = [c for _, calls in steps for c in calls]
+    for (method, url), period in polling(all_calls).items():
+        findings.append(f"polling {method} {url} every {period / 1000:.1f}s")
+    return findings
+
+
+def payload_kb(calls):
+    """JSON read from the responses of `calls`, in KB"""
+    return sum(c.get("bytes") or 0 for c in calls) / 1024
+
+
+def budget_violations(steps, per_page=API_CALLS_PER_PAGE, page_kb=PAGE_PAYLOAD_BUDGET_KB,
+                      endpoint_kb=PAYLOAD_BUDGETS_KB):
+    """Steps over the request count or payload budgets, and responses over their endpoint budget"""
+    violations = []
+    for name, calls in steps:
+        if len(calls) > per_page:
+            violations.append(f"{name}: {len(calls)} requests (budget {per_page})")
+        kb = payload_kb(calls)
+        if kb > page_kb:
+            violations.append(f"{name}: {kb:.0f}KB of JSON (budget {page_kb}KB)")
+        for c in calls:
+            endpoint = f"{c['method']} {normalize_api_path(c['url'])}"
+            budget = endpoint_kb.get(endpoint)
+            kb = (c.get("bytes") or 0) / 1024
+            if budget is not None and kb > budget:
+                violations.append(f"{name}: {endpoint} returned {kb:.0f}KB (budget {budget}KB)")
+    return violations
+
+
+def unread_fields(usage):
+    """Leaf paths present in responses that the app never read"""
+    return sorted(usage["present"] - usage["read"])
+
+
+def _by_endpoint(steps):
+    """{endpoint: calls} of the calls whose JSON response was read"""
+    grouped = {}
+    for _, calls in steps:
+        for c in calls:
+            if c.get("bytes") is not None:
+                grouped.setdefault(f"{c['method']} {normalize_api_path(c['url'])}", []).append(c)
+    return grouped
+
+
+def payload_sizes(steps):
+    """{endpoint: (median KB, median gzip KB or None)} of the JSON responses in `steps`"""
+    sizes = {}
+    for endpoint, calls in _by_endpoint(steps).items():
+        gzip = [c["gzipBytes"] for c in calls if c.get("gzipBytes")]
+        sizes[endpoint] = (
+            median([c["bytes"] for c in calls]) / 1024,
+            median(gzip) / 1024 if gzip else None,
+        )
+    return sizes
+
+
+def format_payloads(steps, fields):
+    """Per-endpoint sizes, and unused fields when field tracking is on"""
+    sizes = _by_endpoint(steps)
+    lines = ["", "Payload sizes (median per response):"]
+    if not sizes:
+        lines.append("  no JSON responses read")
+    for endpoint, calls in sorted(sizes.items()):
+        gzip = [c["gzipBytes"] for c in calls if c.get("gzipBytes")]
+        wire = [c["wireBytes"] for c in calls if c.get("wireBytes")]
+        lines.append(
+            f"  {endpoint:<50} {median([c['bytes'] for c in calls]) / 1024:>8.1f}KB json"
+            f"{f'  {median(gzip) / 1024:>7.1f}KB gzip' if gzip else ''}"
+            f"{f'  {median(wire) / 1024:>7.1f}KB wire' if wire else ''}  x{len(calls)}"
+        )
+    if fields:
+        lines.append("")
+        lines.append("Fields never read by the UI:")
+        for endpoint, usage in sorted(fields.items()):
+            unread = unread_fields(usage)
+            lines.append(f"  {endpoint}: {len(unread)} of {len(usage['present'])} unread")
+            lines.extend(f"    {path}" for path in unread)
+    return "\n".join(lines) + "\n"
+
+
+def format_calls(nodeid, steps, findings):
+    lines = [f"API calls of {nodeid}"]
+    lines.append("Findings:" if findings else "Findings: none")
+    lines.extend(f"  {f}" for f in findings)
+    for name, calls in steps:
+        lines.append("")
+        lines.append(f"{name}: {len(calls)} calls")
+        for c in calls:
+            duration = f"{c['end'] - c['start']:.0f}ms" if c.get("end") else "pending"
+            lines.append(f"  {c['method']:<6} {c.get('status') or '-':>4} {duration:>8}  {c['url']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,23 @@
+"""
+Python client for the ClimbTracker API
+
+Fixtures, seeders and load tests talk to the API directly instead of
+through the browser:
+
+    with ApiClient() as api:
+        api.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)
+        routes = api.routes.create_many([{...}] * 20)
+        api.validations.create_many([r["id"] for r in routes[:5]])
+
+    async with AsyncApiClient(pool_size=50) as api:
+        await api.sign_in(email, password)
+        counts = await asyncio.gather(*(api.notifications.unread_count() for _ in range(100)))
+
+Both keep a pool of keep-alive connections per client (API_CLIENT_POOL_SIZE)
+that all requests share, and keep the Better Auth session cookie.
+"""
+
+from .client import ApiClient, AsyncApiClient
+from .transport import ApiError, Response
+
+__all__ = ["ApiClient", "AsyncApiClient", "ApiError", "Response"]
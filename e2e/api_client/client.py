@@ -0,0 +1,164 @@
+"""Sync and asyncio clients: Better Auth session, pooled requests, unwrapped JSON"""
+
+import asyncio
+import json
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from config import API_URL, BASE_URL, API_CLIENT_POOL_SIZE, LONG_TIMEOUT
+from .resources import (
+    Comments,
+    Friendships,
+    GymLayouts,
+    LeaderboardApi,
+    Notifications,
+    PushSubscriptions,
+    Routes,
+    Validations,
+)
+from .transport import ApiError, AsyncConnectionPool, ConnectionPool, CookieJar, Response
+
+
+class BaseClient:
+    """Request building and response unwrapping common to both clients"""
+
+    def __init__(self, api_url=API_URL, origin=BASE_URL, pool_size=API_CLIENT_POOL_SIZE):
+        self.api_url = api_url
+        # Better Auth only accepts requests from its trusted origin (the web app)
+        self.origin = origin
+        self.pool_size = pool_size
+        self.cookies = CookieJar()
+
+        self.routes = Routes(self)
+        self.validations = Validations(self)
+        self.comments = Comments(self)
+        self.friendships = Friendships(self)
+        self.leaderboard = LeaderboardApi(self)
+        self.notifications = Notifications(self)
+        self.push_subscriptions = PushSubscriptions(self)
+        self.gym_layouts = GymLayouts(self)
+
+    def _prepare(self, path, body, content_type, params, extra_headers=None):
+        if params:
+            query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None}, doseq=True)
+            if query:
+                path = f"{path}{'&' if '?' in path else '?'}{query}"
+        headers = {"Origin": self.origin}
+        cookie = self.cookies.header()
+        if cookie:
+            headers["Cookie"] = cookie
+        data = None
+        if isinstance(body, bytes):
+            data = body
+            headers["Content-Type"] = content_type or "application/octet-stream"
+        elif body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        if extra_headers:
+            headers.update(extra_headers)
+        return path, data, headers
+
+    def _response(self, method, path, result):
+        status, headers, body, elapsed = result
+        self.cookies.update(headers)
+        return Response(method, path, status, headers, body, elapsed)
+
+    @staticmethod
+    def _unwrap(response, key=None):
+        """The `data` of a {success, data} answer (or the bare JSON), `key` of it when given"""
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+        if not response.ok:
+            message = payload.get("error") or payload.get("message") if isinstance(payload, dict) else None
+            raise ApiError(response, message or response.body[:200].decode("utf-8", "replace"))
+        if isinstance(payload, dict) and "success" in payload:
+            payload = payload.get("data", payload)
+        if key is not None:
+            payload = payload[key]
+        return payload
+
+    # ---------- Better Auth session ----------
+
+    def sign_in(self, email, password):
+        """Start a session, returns the user"""
+        return self.call("POST", "/api/auth/sign-in/email", body={"email": email, "password": password}, key="user")
+
+    def sign_up(self, name, email, password):
+        """Create an account and start its session, returns the user"""
+        body = {"name": name, "email": email, "password": password}
+        return self.call("POST", "/api/auth/sign-up/email", body=body, key="user")
+
+    def get_session(self):
+        """{session, user} of the current session, None when signed out"""
+        return self.call("GET", "/api/auth/get-session")
+
+    def sign_out(self):
+        return self.call("POST", "/api/auth/sign-out", body={})
+
+
+class ApiClient(BaseClient):
+    """Blocking client; call_many() and the *_many methods run requests from a thread pool"""
+
+    def __init__(self, api_url=API_URL, origin=BASE_URL, pool_size=API_CLIENT_POOL_SIZE, timeout=LONG_TIMEOUT):
+        super().__init__(api_url, origin, pool_size)
+        self.pool = ConnectionPool(api_url, pool_size, timeout)
+        self._executor = None
+
+    def request(self, method, path, body=None, content_type=None, params=None, headers=None):
+        """Send a request (JSON, or raw bytes of `content_type`) and return the Response, whatever its status"""
+        path, data, headers = self._prepare(path, body, content_type, params, headers)
+        return self._response(method, path, self.pool.request(method, path, data, headers))
+
+    def call(self, method, path, body=None, params=None, key=None):
+        """Send a request and return its unwrapped JSON, ApiError unless 2xx"""
+        return self._unwrap(self.request(method, path, body, params=params), key)
+
+    def call_many(self, calls):
+        """Results of (method, path, body, params, key) calls sent concurrently, in order"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.pool_size, thread_name_prefix="api-client")
+        return list(self._executor.map(lambda c: self.call(*c), calls))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncApiClient(BaseClient):
+    """asyncio client; every resource method returns an awaitable"""
+
+    def __init__(self, api_url=API_URL, origin=BASE_URL, pool_size=API_CLIENT_POOL_SIZE, timeout=LONG_TIMEOUT):
+        super().__init__(api_url, origin, pool_size)
+        self.pool = AsyncConnectionPool(api_url, pool_size, timeout)
+
+    async def request(self, method, path, body=None, content_type=None, params=None, headers=None):
+        """Send a request (JSON, or raw bytes of `content_type`) and return the Response, whatever its status"""
+        path, data, headers = self._prepare(path, body, content_type, params, headers)
+        return self._response(method, path, await self.pool.request(method, path, data, headers))
+
+    async def call(self, method, path, body=None, params=None, key=None):
+        """Send a request and return its unwrapped JSON, ApiError unless 2xx"""
+        return self._unwrap(await self.request(method, path, body, params=params), key)
+
+    async def call_many(self, calls):
+        """Results of (method, path, body, params, key) calls sent concurrently, in order"""
+        return list(await asyncio.gather(*(self.call(*c) for c in calls)))
+
+    async def close(self):
+        await self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,248 @@
+"""
+One class per API area, shared by the sync and the async client
+
+Every method goes through client.call() / client.call_many(), so on
+ApiClient it returns the unwrapped data and on AsyncApiClient an awaitable
+of it. The API has no bulk endpoints: the *_many methods send one request
+per item, concurrently over the client's connection pool.
+"""
+
+from typing import Iterable, List, Optional
+
+from .types import (
+    Comment,
+    Friendship,
+    GymLayout,
+    Leaderboard,
+    LeaderboardPeriod,
+    Notification,
+    PendingRequests,
+    PushSubscription,
+    PushSubscriptionInput,
+    Route,
+    RouteInput,
+    RoutePage,
+    RouteStatus,
+    UserSummary,
+    Validation,
+    ValidationStatus,
+)
+
+
+class Resource:
+    def __init__(self, client):
+        self._client = client
+
+    def _call(self, method, path, body=None, params=None, key=None):
+        return self._client.call(method, path, body=body, params=params, key=key)
+
+    def _call_many(self, calls):
+        return self._client.call_many(calls)
+
+
+class Routes(Resource):
+    """/api/routes"""
+
+    def list(self, **filters) -> RoutePage:
+        """One page of routes; filters as in the routes hub (difficulty=[...], sector=..., page=...)"""
+        return self._call("GET", "/api/routes", params=filters)
+
+    def get(self, route_id: str) -> Route:
+        return self._call("GET", f"/api/routes/{route_id}", key="route")
+
+    def stats(self) -> dict:
+        return self._call("GET", "/api/routes/stats", key="stats")
+
+    def completion_count(self, route_id: str) -> int:
+        return self._call("GET", f"/api/routes/{route_id}/completion-count", key="count")
+
+    def create(self, route: RouteInput) -> Route:
+        return self._call("POST", "/api/routes", body=route, key="route")
+
+    def create_many(self, routes: Iterable[RouteInput]) -> List[Route]:
+        return self._call_many([("POST", "/api/routes", route, None, "route") for route in routes])
+
+    def update(self, route_id: str, route: RouteInput) -> Route:
+        return self._call("PUT", f"/api/routes/{route_id}", body=route, key="route")
+
+    def set_status(self, route_id: str, status: RouteStatus) -> Route:
+        return self._call("PUT", f"/api/routes/{route_id}/status", body={"status": status}, key="route")
+
+    def delete(self, route_id: str):
+        return self._call("DELETE", f"/api/routes/{route_id}")
+
+    def delete_many(self, route_ids: Iterable[str]):
+        return self._call_many([("DELETE", f"/api/routes/{i}", None, None, None) for i in route_ids])
+
+
+class Validations(Resource):
+    """/api/validations"""
+
+    def list(self, route_id: Optional[str] = None, status: Optional[ValidationStatus] = None) -> List[Validation]:
+        return self._call("GET", "/api/validations", params={"routeId": route_id, "status": status},
+                          key="validations")
+
+    def mine(self) -> List[Validation]:
+        """The signed-in user's validations with their route"""
+        return self._call("GET", "/api/validations/user")
+
+    def for_route(self, route_id: str) -> List[Validation]:
+        return self._call("GET", f"/api/validations/route/{route_id}", key="validations")
+
+    def create(self, route_id: str, status: ValidationStatus = "VALIDE", attempts: int = 1,
+               is_flashed: bool = False, personal_note: Optional[str] = None) -> Validation:
+        """Create or update the user's validation of a route"""
+        return self._call("POST", "/api/validations", body=_validation(route_id, status, attempts, is_flashed,
+                                                                       personal_note), key="validation")
+
+    def create_many(self, route_ids: Iterable[str], status: ValidationStatus = "VALIDE",
+                    attempts: int = 1, is_flashed: bool = False) -> List[Validation]:
+        return self._call_many([
+            ("POST", "/api/validations", _validation(i, status, attempts, is_flashed), None, "validation")
+            for i in route_ids
+        ])
+
+    def update(self, validation_id: str, fields: dict) -> Validation:
+        return self._call("PUT", f"/api/validations/{validation_id}", body=fields, key="validation")
+
+    def toggle_favorite(self, validation_id: str) -> Validation:
+        return self._call("POST", f"/api/validations/{validation_id}/favorite", key="validation")
+
+    def delete(self, validation_id: str):
+        return self._call("DELETE", f"/api/validations/{validation_id}")
+
+
+def _validation(route_id, status, attempts, is_flashed, personal_note=None):
+    body = {"routeId": route_id, "status": status, "attempts": attempts, "isFlashed": is_flashed}
+    if personal_note is not None:
+        body["personalNote"] = personal_note
+    return body
+
+
+class Comments(Resource):
+    """/api/comments"""
+
+    def for_route(self, route_id: str) -> List[Comment]:
+        return self._call("GET", f"/api/comments/route/{route_id}", key="comments")
+
+    def create(self, route_id: str, content: str, media_url: Optional[str] = None,
+               media_type: Optional[str] = None) -> Comment:
+        body = {"routeId": route_id, "content": content, "mediaUrl": media_url, "mediaType": media_type}
+        return self._call("POST", "/api/comments", body=body, key="comment")
+
+    def create_many(self, route_id: str, contents: Iterable[str]) -> List[Comment]:
+        return self._call_many([
+            ("POST", "/api/comments", {"routeId": route_id, "content": content}, None, "comment")
+            for content in contents
+        ])
+
+    def update(self, comment_id: str, content: str) -> Comment:
+        return self._call("PUT", f"/api/comments/{comment_id}", body={"content": content}, key="comment")
+
+    def delete(self, comment_id: str):
+        return self._call("DELETE", f"/api/comments/{comment_id}")
+
+
+class Friendships(Resource):
+    """/api/friendships"""
+
+    def list(self) -> List[UserSummary]:
+        return self._call("GET", "/api/friendships", key="friends")
+
+    def search(self, query: str) -> List[UserSummary]:
+        return self._call("GET", "/api/friendships/search", params={"q": query}, key="users")
+
+    def pending(self) -> PendingRequests:
+        return self._call("GET", "/api/friendships/pending")
+
+    def request(self, user_id: str) -> Friendship:
+        return self._call("POST", "/api/friendships", body={"userId": user_id}, key="friendship")
+
+    def request_many(self, user_ids: Iterable[str]) -> List[Friendship]:
+        return self._call_many([("POST", "/api/friendships", {"userId": i}, None, "friendship") for i in user_ids])
+
+    def accept(self, friendship_id: str) -> Friendship:
+        return self._call("PUT", f"/api/friendships/{friendship_id}/accept", key="friendship")
+
+    def reject(self, friendship_id: str) -> Friendship:
+        return self._call("PUT", f"/api/friendships/{friendship_id}/reject", key="friendship")
+
+    def delete(self, friendship_id: str):
+        return self._call("DELETE", f"/api/friendships/{friendship_id}")
+
+
+class LeaderboardApi(Resource):
+    """/api/leaderboard"""
+
+    def get(self, period: LeaderboardPeriod = "all", limit: int = 20) -> Leaderboard:
+        return self._call("GET", "/api/leaderboard", params={"period": period, "limit": limit})
+
+    def friends(self, period: LeaderboardPeriod = "all") -> Leaderboard:
+        return self._call("GET", "/api/leaderboard/friends", params={"period": period})
+
+    def user_details(self, user_id: str) -> dict:
+        return self._call("GET", f"/api/leaderboard/user/{user_id}/details")
+
+
+class Notifications(Resource):
+    """/api/notifications"""
+
+    def list(self, limit: int = 20, unread_only: bool = False) -> List[Notification]:
+        params = {"limit": limit, "unreadOnly": "true" if unread_only else "false"}
+        return self._call("GET", "/api/notifications", params=params, key="notifications")
+
+    def unread_count(self) -> int:
+        return self._call("GET", "/api/notifications/unread-count", key="count")
+
+    def mark_read(self, notification_id: str) -> Notification:
+        return self._call("PUT", f"/api/notifications/{notification_id}/read", key="notification")
+
+    def mark_all_read(self):
+        return self._call("PUT", "/api/notifications/read-all")
+
+    def delete(self, notification_id: str):
+        return self._call("DELETE", f"/api/notifications/{notification_id}")
+
+
+class PushSubscriptions(Resource):
+    """/api/push-subscriptions"""
+
+    def vapid_key(self) -> str:
+        return self._call("GET", "/api/push-subscriptions/vapid-key", key="vapidPublicKey")
+
+    def list(self) -> List[PushSubscription]:
+        return self._call("GET", "/api/push-subscriptions", key="subscriptions")
+
+    def subscribe(self, subscription: PushSubscriptionInput) -> PushSubscription:
+        """Register a device, or reactivate it when its endpoint is already known"""
+        return self._call("POST", "/api/push-subscriptions", body=subscription, key="subscription")
+
+    def subscribe_many(self, subscriptions: Iterable[PushSubscriptionInput]) -> List[PushSubscription]:
+        return self._call_many([
+            ("POST", "/api/push-subscriptions", s, None, "subscription") for s in subscriptions
+        ])
+
+    def delete(self, subscription_id: str):
+        return self._call("DELETE", f"/api/push-subscriptions/{subscription_id}")
+
+
+class GymLayouts(Resource):
+    """/api/gym-layout"""
+
+    def active(self) -> GymLayout:
+        return self._call("GET", "/api/gym-layout/active")
+
+    def list(self) -> List[GymLayout]:
+        return self._call("GET", "/api/gym-layout", key="layouts")
+
+    def get(self, layout_id: str) -> GymLayout:
+        return self._call("GET", f"/api/gym-layout/{layout_id}", key="layout")
+
+    def create(self, layout: GymLayout) -> GymLayout:
+        return self._call("POST", "/api/gym-layout", body=layout, key="layout")
+
+    def update(self, layout_id: str, layout: GymLayout) -> GymLayout:
+        return self._call("PUT", f"/api/gym-layout/{layout_id}", body=layout, key="layout")
+
+    def delete(self, layout_id: str):
+        return self._call("DELETE", f"/api/gym-layout/{layout_id}")
@@ -0,0 +1,249 @@
+"""Keep-alive HTTP/1.1 connection pools (threads and asyncio) and the response type"""
+
+import asyncio
+import http.client
+import json
+import queue
+import threading
+import time
+import urllib.parse
+
+from config import API_CLIENT_KEEPALIVE_S, LONG_TIMEOUT
+
+
+# Errors of a keep-alive connection the server closed while it sat in the pool
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+
+class ApiError(Exception):
+    """Non-2xx answer of the API"""
+
+    def __init__(self, response, message):
+        super().__init__(f"{response.method} {response.path} -> {response.status}: {message}")
+        self.response = response
+        self.status = response.status
+        self.message = message
+
+
+class Response:
+    """Status, headers and body of one request, with the time it took"""
+
+    def __init__(self, method, path, status, headers, body, elapsed_ms):
+        self.method = method
+        self.path = path
+        self.status = status
+        self.headers = headers  # [(name, value)], Set-Cookie can repeat
+        self.body = body
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def header(self, name):
+        name = name.lower()
+        return next((v for k, v in self.headers if k.lower() == name), None)
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class CookieJar:
+    """Session cookies of one client, shared by all its connections"""
+
+    def __init__(self):
+        self.cookies = {}
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        with self._lock:
+            for name, value in headers:
+                if name.lower() != "set-cookie":
+                    continue
+                key, _, rest = value.partition("=")
+                value = rest.split(";", 1)[0]
+                # Better Auth expires the cookie on sign out
+                if value and "max-age=0" not in rest.lower():
+                    self.cookies[key.strip()] = value
+                else:
+                    self.cookies.pop(key.strip(), None)
+
+    def header(self):
+        with self._lock:
+            return "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+
+    def clear(self):
+        with self._lock:
+            self.cookies.clear()
+
+
+def _host_port(api_url):
+    parsed = urllib.parse.urlsplit(api_url)
+    return parsed.hostname, parsed.port or 80
+
+
+class ConnectionPool:
+    """Up to `size` keep-alive http.client connections shared between threads"""
+
+    def __init__(self, api_url, size, timeout=LONG_TIMEOUT):
+        self.host, self.port = _host_port(api_url)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _checkout(self):
+        """An idle connection still inside the server's keep-alive window, or a new one"""
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+            if time.monotonic() - last_used < API_CLIENT_KEEPALIVE_S:
+                return conn, True
+            conn.close()
+
+    def request(self, method, path, data, headers):
+        """Send one request, return (status, headers, body, elapsed ms)"""
+        with self._slots:
+            while True:
+                conn, reused = self._checkout()
+                start = time.perf_counter()
+                try:
+                    conn.request(method, path, body=data, headers=headers)
+                    response = conn.getresponse()
+                    body = response.read()
+                except STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    if reused and method in IDEMPOTENT_METHODS:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                elapsed = (time.perf_counter() - start) * 1000
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._idle.put((conn, time.monotonic()))
+                return response.status, response.getheaders(), body, elapsed
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+
+
+class _AsyncConnection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.writer.close()
+
+
+async def _read_response(reader):
+    """Parse one HTTP/1.1 response, return (status, headers, body, keep alive)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise http.client.RemoteDisconnected("Remote end closed connection without response")
+    version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+    headers = []
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers.append((name.strip(), value.strip()))
+    fields = {k.lower(): v for k, v in headers}
+
+    if fields.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in fields:
+        body = await reader.readexactly(int(fields["content-length"]))
+    elif int(status) in (204, 304):
+        body = b""
+    else:
+        body = await reader.read()
+        fields["connection"] = "close"
+
+    keep_alive = fields.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+    return int(status), headers, body, keep_alive
+
+
+class AsyncConnectionPool:
+    """Up to `size` keep-alive asyncio connections shared between tasks"""
+
+    def __init__(self, api_url, size, timeout=LONG_TIMEOUT):
+        self.host, self.port = _host_port(api_url)
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _checkout(self):
+        while self._idle:
+            conn = self._idle.pop()
+            if time.monotonic() - conn.last_used < API_CLIENT_KEEPALIVE_S and not conn.reader.at_eof():
+                return conn, True
+            conn.close()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        return _AsyncConnection(reader, writer), False
+
+    async def request(self, method, path, data, headers):
+        """Send one request, return (status, headers, body, elapsed ms)"""
+        data = data or b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Accept-Encoding: identity"]
+        head.extend(f"{k}: {v}" for k, v in headers.items())
+        if data or method in ("POST", "PUT", "PATCH"):
+            head.append(f"Content-Length: {len(data)}")
+        raw = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data
+
+        async with self._slots:
+            while True:
+                conn, reused = await self._checkout()
+                start = time.perf_counter()
+                try:
+                    conn.writer.write(raw)
+                    await conn.writer.drain()
+                    status, response_headers, body, keep_alive = await asyncio.wait_for(
+                        _read_response(conn.reader), self.timeout
+                    )
+                except (*STALE_CONNECTION_ERRORS, asyncio.IncompleteReadError):
+                    conn.close()
+                    if reused and method in IDEMPOTENT_METHODS:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                elapsed = (time.perf_counter() - start) * 1000
+                if keep_alive:
+                    conn.last_used = time.monotonic()
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+                return status, response_headers, body, elapsed
+
+    async def close(self):
+        while self._idle:
+            conn = self._idle.pop()
+            conn.close()
+            try:
+                await conn.writer.wait_closed()
+            except OSError:
+                pass
@@ -0,0 +1,169 @@
+"""Shapes of the API's JSON, mirroring packages/database/src/schema (camelCase as on the wire)"""
+
+from typing import Any, List, Literal, Optional, TypedDict
+
+
+Difficulty = Literal[
+    "Vert", "Vert clair", "Bleu clair", "Bleu foncé", "Violet", "Rose",
+    "Rouge", "Orange", "Jaune", "Blanc", "Gris", "Noir",
+]
+HoldColorCategory = Literal[
+    "red", "blue", "green", "yellow", "orange", "purple", "pink", "black", "white", "grey",
+]
+RouteStatus = Literal["PENDING", "ACTIVE", "ARCHIVED"]
+ValidationStatus = Literal["EN_PROJET", "VALIDE"]
+FriendshipStatus = Literal["PENDING", "ACCEPTED", "REJECTED"]
+MediaType = Literal["IMAGE", "VIDEO"]
+LeaderboardPeriod = Literal["all", "week", "month", "year"]
+
+
+class UserSummary(TypedDict):
+    id: str
+    name: str
+    image: Optional[str]
+
+
+class User(UserSummary, total=False):
+    email: str
+    role: Literal["CLIMBER", "OPENER", "ADMIN"]
+
+
+class RouteInput(TypedDict, total=False):
+    """Body of POST/PUT /api/routes"""
+    name: str
+    difficulty: Difficulty
+    holdColorHex: str
+    holdColorCategory: HoldColorCategory
+    sector: str
+    routeTypes: List[str]
+    description: str
+    tips: str
+    mainPhoto: str
+    openingVideo: str
+    openedAt: str
+    holdMapping: Any
+
+
+class Route(RouteInput, total=False):
+    id: str
+    openerId: str
+    status: RouteStatus
+    closedAt: Optional[str]
+    createdAt: str
+    updatedAt: str
+    opener: UserSummary
+
+
+class RoutePage(TypedDict):
+    data: List[Route]
+    page: int
+    limit: int
+    total: int
+    totalPages: int
+
+
+class Validation(TypedDict, total=False):
+    id: str
+    userId: str
+    routeId: str
+    status: ValidationStatus
+    attempts: int
+    isFlashed: bool
+    isFavorite: bool
+    personalNote: Optional[str]
+    validatedAt: str
+    user: UserSummary
+    route: Route
+
+
+class Comment(TypedDict, total=False):
+    id: str
+    content: str
+    userId: str
+    routeId: str
+    mediaUrl: Optional[str]
+    mediaType: Optional[MediaType]
+    createdAt: str
+    user: UserSummary
+
+
+class Friendship(TypedDict, total=False):
+    id: str
+    requesterId: str
+    addresseeId: str
+    status: FriendshipStatus
+    createdAt: str
+    acceptedAt: Optional[str]
+
+
+class PendingRequest(TypedDict):
+    id: str
+    user: UserSummary
+    createdAt: str
+
+
+class PendingRequests(TypedDict):
+    received: List[PendingRequest]
+    sent: List[PendingRequest]
+
+
+class LeaderboardEntry(TypedDict, total=False):
+    rank: int
+    userId: str
+    name: str
+    image: Optional[str]
+    totalValidations: int
+    totalFlashed: int
+    totalPoints: float
+    maxDifficulty: Optional[Difficulty]
+    isCurrentUser: bool
+
+
+class Leaderboard(TypedDict):
+    leaderboard: List[LeaderboardEntry]
+    currentUser: LeaderboardEntry
+
+
+class Notification(TypedDict, total=False):
+    id: str
+    userId: str
+    type: Literal[
+        "FRIEND_REQUEST", "FRIEND_ACCEPTED", "ROUTE_VALIDATED", "COMMENT_RECEIVED",
+        "ROUTE_CREATED", "ACHIEVEMENT_UNLOCKED", "SYSTEM",
+    ]
+    title: str
+    message: str
+    link: Optional[str]
+    relatedUserId: Optional[str]
+    relatedRouteId: Optional[str]
+    read: bool
+    createdAt: str
+
+
+class PushSubscriptionInput(TypedDict, total=False):
+    platform: Literal["web", "ios", "android"]
+    endpoint: str
+    keys: dict
+    fcmToken: str
+    deviceName: str
+
+
+class PushSubscription(TypedDict, total=False):
+    id: str
+    userId: str
+    platform: Literal["web", "ios", "android"]
+    endpoint: Optional[str]
+    deviceName: Optional[str]
+    isActive: bool
+    createdAt: str
+    updatedAt: str
+
+
+class GymLayout(TypedDict, total=False):
+    id: str
+    name: str
+    svgContent: str
+    sectorMappings: Any
+    isActive: bool
+    createdAt: str
+    updatedAt: str
@@ -0,0 +1,96 @@
+"""Shared pieces of the standalone benchmarks: samples, the API process, DB activity"""
+
+import glob
+import os
+import urllib.parse
+
+from config import API_URL, PERF_DB_PATH
+from results_store import ResultsStore
+
+
+# ---------- performance history ----------
+
+class BenchSamples(list):
+    """Samples of one benchmark script, in the performance history's format"""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = script
+
+    def record(self, name, value):
+        self.append({"test": self.script, "kind": "bench", "name": name, "value": value})
+
+
+def save_bench_run(samples, suite):
+    """Store the samples as a run of `suite` in the performance history, return the run id"""
+    results = ResultsStore(PERF_DB_PATH)
+    try:
+        run_id = results.save_run(samples, suite=suite)
+        print(f"Results saved as run #{run_id} in {PERF_DB_PATH}")
+    finally:
+        results.close()
+    return run_id
+
+
+# ---------- API process ----------
+
+def api_pid(api_url=API_URL):
+    """Pid of the local process listening on the API port, None if not found"""
+    port = urllib.parse.urlsplit(api_url).port or 80
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # State 0A is LISTEN
+                    if int(fields[1].rsplit(":", 1)[1], 16) == port and fields[3] == "0A":
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    if not inodes:
+        return None
+    for fd in glob.glob("/proc/[0-9]*/fd/*"):
+        try:
+            target = os.readlink(fd)
+        except OSError:
+            continue
+        if target.startswith("socket:[") and target[8:-1] in inodes:
+            return int(fd.split("/")[2])
+    return None
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process, None if it cannot be read"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesised command name; utime and stime are the 14th and 15th overall
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+# ---------- DB activity ----------
+
+class DbActivity:
+    """Statements (pg_stat_statements) or, without it, committed transactions of the app database"""
+
+    def __init__(self):
+        from db import connect
+        from statements import StatementTracker
+
+        self.tracker = StatementTracker.connect()
+        self.conn = None if self.tracker else connect()
+        self.unit = "queries" if self.tracker else "transactions"
+
+    def count(self):
+        if self.tracker:
+            return sum(calls for _, calls, _, _ in self.tracker.snapshot().values())
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT xact_commit FROM pg_stat_database WHERE datname = current_database()")
+            return cur.fetchone()[0]
+
+    def close(self):
+        (self.tracker.conn if self.tracker else self.conn).close()
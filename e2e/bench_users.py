@@ -0,0 +1,47 @@
+"""Throwaway accounts with their own API sessions, for multi-user benchmarks"""
+
+import asyncio
+
+from api_client import ApiError, AsyncApiClient
+
+
+BENCH_PASSWORD = "bench-password-1"
+
+
+def bench_email(domain, index):
+    return f"climber-{index}@{domain}"
+
+
+async def sign_up_clients(domain, count, pool_size=1, concurrency=20):
+    """`count` signed-in clients, one per account climber-<i>@<domain> (created on first use)"""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        api = AsyncApiClient(pool_size=pool_size)
+        email = bench_email(domain, index)
+        async with slots:
+            try:
+                api.user = await api.sign_up(f"Bench climber {index}", email, BENCH_PASSWORD)
+            except ApiError:
+                # Left over from an earlier run
+                api.user = await api.sign_in(email, BENCH_PASSWORD)
+        return api
+
+    return await asyncio.gather(*(one(i) for i in range(count)))
+
+
+async def close_clients(clients):
+    await asyncio.gather(*(api.close() for api in clients))
+
+
+def delete_accounts(conn, domain):
+    """Remove the bench accounts of `domain` and everything they wrote"""
+    pattern = f"%@{domain}"
+    with conn.cursor() as cur:
+        users = "(SELECT id FROM users WHERE email LIKE %(p)s)"
+        for table, column in (("validations", "user_id"), ("comments", "user_id"), ("videos", "user_id"),
+                              ("friendships", "requester_id"), ("friendships", "addressee_id")):
+            cur.execute(f"DELETE FROM {table} WHERE {column} IN {users}", {"p": pattern})
+        # Sessions, accounts, notifications and push subscriptions cascade
+        cur.execute("DELETE FROM users WHERE email LIKE %(p)s", {"p": pattern})
+        return cur.rowcount
@@ -0,0 +1,356 @@
+"""
+A/B benchmark of two builds of the app
+
+Both refs are checked out in git worktrees, built, and served side by side
+on their own ports (see COMPARE_* in config.py). Rounds then alternate
+between the builds in ABBA order so machine noise hits both equally. Each
+round runs the selected E2E journeys (page timings) and direct requests to
+the API endpoints. Rounds repeat until the bootstrap confidence interval of
+every speedup is narrow enough, or COMPARE_MAX_ROUNDS is reached.
+
+Usage:
+    python run_tests.py compare <refA> <refB>
+    python run_tests.py compare main HEAD --rounds 10
+    python run_tests.py compare main . --no-browser     # "." = working tree (snapshot), API only
+    python run_tests.py compare main HEAD --journeys "test_admin_navigation.py -k leaderboard"
+"""
+
+import argparse
+import json
+import math
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from config import (
+    ADMIN_EMAIL,
+    ADMIN_PASSWORD,
+    COMPARE_API_PORTS,
+    COMPARE_WEB_PORTS,
+    COMPARE_JOURNEYS,
+    COMPARE_API_ENDPOINTS,
+    COMPARE_API_REPEATS,
+    COMPARE_MIN_ROUNDS,
+    COMPARE_MAX_ROUNDS,
+    COMPARE_CI_WIDTH,
+)
+from api_client import ApiClient
+from perf_stats import median, bootstrap_ratio_ci, mann_whitney_u
+
+
+E2E_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(E2E_DIR)
+WORKTREE_DIR = os.path.join(E2E_DIR, ".compare")
+IS_WINDOWS = sys.platform == "win32"
+
+
+def _git(*args, env=None):
+    return subprocess.run(
+        ["git", *args], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout.strip()
+
+
+def snapshot_working_tree():
+    """Commit of the working tree as it is (untracked files included), on top of HEAD
+
+    Staged in a copy of the index, so neither the index nor the files of the
+    developer's checkout are touched. The commit is not on any branch.
+    """
+    fd, index = tempfile.mkstemp(prefix="compare-index-")
+    os.close(fd)
+    try:
+        # A copy rather than a fresh index keeps git's stat cache: only changed files are hashed
+        shutil.copyfile(_git("rev-parse", "--path-format=absolute", "--git-path", "index"), index)
+        env = dict(os.environ, GIT_INDEX_FILE=index)
+        _git("add", "--all", env=env)
+        tree = _git("write-tree", env=env)
+    finally:
+        os.remove(index)
+    # Fixed identity and dates: the same tree on the same HEAD is the same commit, and --no-build finds its worktree
+    env = dict(os.environ, GIT_AUTHOR_NAME="compare", GIT_AUTHOR_EMAIL="compare@localhost",
+               GIT_AUTHOR_DATE="@0 +0000", GIT_COMMITTER_NAME="compare",
+               GIT_COMMITTER_EMAIL="compare@localhost", GIT_COMMITTER_DATE="@0 +0000")
+    return _git("commit-tree", tree, "-p", "HEAD", "-m", "compare: working tree snapshot", env=env)
+
+
+def resolve_ref(ref):
+    """Resolve a git ref to a commit sha ("." is a snapshot of the working tree)"""
+    if ref == ".":
+        return snapshot_working_tree()
+    return _git("rev-parse", "--verify", f"{ref}^{{commit}}")
+
+
+def wait_for_url(url, timeout=120):
+    """Poll a URL until it answers"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).close()
+            return
+        except Exception:
+            time.sleep(1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+class Build:
+    """One build of the app served on its own ports"""
+
+    def __init__(self, label, ref, api_port, web_port):
+        self.label = label
+        self.ref = ref
+        self.sha = resolve_ref(ref)
+        self.api_url = f"http://localhost:{api_port}"
+        self.base_url = f"http://localhost:{web_port}"
+        self.api_port = api_port
+        self.web_port = web_port
+        self.processes = []
+        # Always a separate checkout, so building never touches the developer's tree
+        self.path = os.path.join(WORKTREE_DIR, f"{label}-{self.sha[:12]}")
+
+    def _env(self):
+        env = dict(os.environ)
+        env.update({
+            "PORT": str(self.api_port),
+            "FRONTEND_URL": self.base_url,
+            "BETTER_AUTH_URL": self.api_url,
+            "VITE_API_URL": self.api_url,
+        })
+        return env
+
+    def _run(self, cmd):
+        subprocess.run(cmd, cwd=self.path, env=self._env(), check=True, shell=IS_WINDOWS)
+
+    def prepare(self):
+        """Check out and build the ref"""
+        if not os.path.isdir(self.path):
+            os.makedirs(WORKTREE_DIR, exist_ok=True)
+            subprocess.run(["git", "worktree", "add", "--detach", self.path, self.sha],
+                           cwd=REPO_ROOT, check=True)
+
+        # The API reads its settings from .env at the repository root
+        env_file = os.path.join(REPO_ROOT, ".env")
+        if os.path.exists(env_file):
+            with open(env_file) as src, open(os.path.join(self.path, ".env"), "w") as dst:
+                dst.write(src.read())
+
+        print(f"[{self.label}] Building {self.ref} ({self.sha[:12]}) in {self.path}")
+        self._run(["pnpm", "install", "--frozen-lockfile"])
+        self._run(["pnpm", "turbo", "build",
+                   "--filter=@climbtracker/api...", "--filter=@climbtracker/web..."])
+
+    def _spawn(self, cmd, log_name):
+        log = open(os.path.join(E2E_DIR, "reports", f"compare_{self.label}_{log_name}.log"), "w")
+        proc = subprocess.Popen(
+            cmd, cwd=self.path, env=self._env(), stdout=log, stderr=subprocess.STDOUT,
+            shell=IS_WINDOWS, start_new_session=not IS_WINDOWS,
+        )
+        self.processes.append((proc, log))
+
+    def start(self):
+        """Serve the built API and web app"""
+        self._spawn(["node", "apps/api/dist/index.js"], "api")
+        self._spawn(["pnpm", "--filter", "@climbtracker/web", "exec", "vite", "preview",
+                     "--port", str(self.web_port), "--strictPort"], "web")
+        wait_for_url(f"{self.api_url}/health")
+        wait_for_url(self.base_url)
+        print(f"[{self.label}] Serving web on {self.base_url}, API on {self.api_url}")
+
+    def stop(self):
+        for proc, log in self.processes:
+            if proc.poll() is None:
+                if IS_WINDOWS:
+                    proc.terminate()
+                else:
+                    os.killpg(proc.pid, signal.SIGTERM)
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+            log.close()
+        self.processes = []
+
+
+def run_journeys(build, journeys):
+    """Run the E2E journeys against a build, return {metric: [ms]}"""
+    fd, export_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    env = dict(os.environ, BASE_URL=build.base_url, API_URL=build.api_url, PERF_EXPORT=export_path)
+    env.pop("PERF_STORE", None)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *shlex.split(journeys)],
+            cwd=E2E_DIR, env=env,
+        )
+        with open(export_path) as f:
+            samples = json.load(f)
+    except (OSError, ValueError):
+        samples = []
+    finally:
+        os.remove(export_path)
+
+    metrics = {}
+    for s in samples:
+        if s["kind"] == "step" and s["name"].startswith("nav:"):
+            metrics.setdefault(f"page {s['name'][4:]}", []).append(s["value"])
+        elif s["kind"] == "vital" and s["name"].endswith(":first_contentful_paint"):
+            metrics.setdefault(f"fcp {s['name'].split(':')[0]}", []).append(s["value"])
+        elif s["kind"] == "api":
+            metrics.setdefault(f"browser {s['name']}", []).append(s["value"])
+    return metrics
+
+
+def run_api_benchmark(build, endpoints, repeats):
+    """Time direct API requests against a build, return {metric: [ms]}"""
+    metrics = {}
+    # One connection, so every request after the warm-up reuses it
+    with ApiClient(build.api_url, build.base_url, pool_size=1) as api:
+        api.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)
+        for endpoint in endpoints:
+            # Warm-up request so connection setup is not measured
+            api.request("GET", endpoint)
+            for _ in range(repeats):
+                response = api.request("GET", endpoint)
+                if response.status == 200:
+                    metrics.setdefault(f"endpoint {endpoint}", []).append(response.elapsed_ms)
+    return metrics
+
+
+def summarize(results_a, results_b, iterations=1000):
+    """Speedup of B over A for every metric measured on both builds"""
+    rows = []
+    for metric in sorted(set(results_a) & set(results_b)):
+        a, b = results_a[metric], results_b[metric]
+        if len(a) < 2 or len(b) < 2:
+            continue
+        speedup, low, high = bootstrap_ratio_ci(a, b, iterations=iterations)
+        if math.isnan(speedup):
+            # Candidate median of 0 ms: no ratio to report
+            continue
+        _, p = mann_whitney_u(a, b, alternative="two-sided")
+        rows.append({
+            "metric": metric,
+            "a_ms": median(a),
+            "b_ms": median(b),
+            "speedup": speedup,
+            "ci_low": low,
+            "ci_high": high,
+            "p": p,
+            "significant": p < 0.05 and not (low <= 1 <= high),
+            "samples": min(len(a), len(b)),
+        })
+    return rows
+
+
+def converged(rows, width=COMPARE_CI_WIDTH):
+    """True once every speedup CI is within +/- `width` of its estimate"""
+    return bool(rows) and all(
+        (r["ci_high"] - r["ci_low"]) / 2 <= width * r["speedup"] for r in rows
+    )
+
+
+def format_summary(rows, build_a, build_b):
+    lines = [
+        f"A = {build_a.ref} ({build_a.sha[:12]})   B = {build_b.ref} ({build_b.sha[:12]})",
+        f"{'Metric':<45} {'A (ms)':>9} {'B (ms)':>9} {'Speedup':>8}  {'95% CI':<15} {'p':>6}",
+    ]
+    for r in rows:
+        mark = " *" if r["significant"] else ""
+        lines.append(
+            f"{r['metric'][:45]:<45} {r['a_ms']:>9.1f} {r['b_ms']:>9.1f} {r['speedup']:>7.2f}x"
+            f"  [{r['ci_low']:.2f}, {r['ci_high']:.2f}]  {r['p']:>6.3f}{mark}"
+        )
+    lines.append("Speedup > 1 means B is faster. * = significant (p < 0.05, CI excludes 1)")
+    return "\n".join(lines)
+
+
+def compare(ref_a, ref_b, journeys=COMPARE_JOURNEYS, endpoints=COMPARE_API_ENDPOINTS,
+            repeats=COMPARE_API_REPEATS, min_rounds=COMPARE_MIN_ROUNDS,
+            max_rounds=COMPARE_MAX_ROUNDS, use_browser=True, build=True):
+    """Benchmark two refs against each other, return the summary rows"""
+    if ref_a == "." and ref_b == ".":
+        raise ValueError("Only one side of the comparison can be the working tree")
+
+    os.makedirs(os.path.join(E2E_DIR, "reports"), exist_ok=True)
+    builds = [
+        Build("A", ref_a, COMPARE_API_PORTS[0], COMPARE_WEB_PORTS[0]),
+        Build("B", ref_b, COMPARE_API_PORTS[1], COMPARE_WEB_PORTS[1]),
+    ]
+    results = {"A": {}, "B": {}}
+    rows = []
+    try:
+        for b in builds:
+            if build:
+                b.prepare()
+            b.start()
+
+        for round_no in range(max_rounds):
+            # ABBA interleaving cancels out linear drift of the machine
+            order = builds if round_no % 2 == 0 else builds[::-1]
+            for b in order:
+                print(f"Round {round_no + 1}/{max_rounds}: build {b.label}")
+                round_metrics = run_api_benchmark(b, endpoints, repeats)
+                if use_browser:
+                    round_metrics.update(run_journeys(b, journeys))
+                for metric, values in round_metrics.items():
+                    results[b.label].setdefault(metric, []).extend(values)
+
+            rows = summarize(results["A"], results["B"])
+            if round_no + 1 >= min_rounds and converged(rows):
+                print(f"Confidence intervals converged after {round_no + 1} rounds")
+                break
+        else:
+            print(f"Stopped after {max_rounds} rounds without full convergence")
+    finally:
+        for b in builds:
+            b.stop()
+
+    print("=" * 60)
+    print(format_summary(rows, *builds))
+
+    report_path = os.path.join(E2E_DIR, "reports",
+                               f"compare_{builds[0].sha[:8]}_{builds[1].sha[:8]}.json")
+    with open(report_path, "w") as f:
+        json.dump({"a": {"ref": ref_a, "sha": builds[0].sha},
+                   "b": {"ref": ref_b, "sha": builds[1].sha},
+                   "rows": rows, "samples": results}, f, indent=2)
+    print(f"Raw samples written to {report_path}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="run_tests.py compare",
+                                     description="A/B benchmark two builds of the app")
+    parser.add_argument("ref_a", help="Baseline git ref ('.' for the working tree)")
+    parser.add_argument("ref_b", help="Candidate git ref ('.' for the working tree)")
+    parser.add_argument("--journeys", default=COMPARE_JOURNEYS,
+                        help="pytest arguments selecting the E2E journeys")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="API endpoint to benchmark (repeatable)")
+    parser.add_argument("--repeats", type=int, default=COMPARE_API_REPEATS)
+    parser.add_argument("--min-rounds", type=int, default=COMPARE_MIN_ROUNDS)
+    parser.add_argument("--rounds", type=int, default=COMPARE_MAX_ROUNDS, help="Maximum rounds")
+    parser.add_argument("--no-browser", action="store_true", help="API benchmarks only")
+    parser.add_argument("--no-build", action="store_true", help="Reuse existing builds")
+    args = parser.parse_args(argv)
+
+    compare(
+        args.ref_a, args.ref_b,
+        journeys=args.journeys,
+        endpoints=args.endpoints or COMPARE_API_ENDPOINTS,
+        repeats=args.repeats,
+        min_rounds=args.min_rounds,
+        max_rounds=args.rounds,
+        use_browser=not args.no_browser,
+        build=not args.no_build,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
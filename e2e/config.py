@@ -4,6 +4,8 @@ import os
 # Base URLs
 BASE_URL = os.environ.get("BASE_URL", "http://localhost:5173")
 API_URL = os.environ.get("API_URL", "http://localhost:3000")
+# App database for query-level tools; falls back to DATABASE_URL in the repository's .env
+DATABASE_URL = os.environ.get("DATABASE_URL")
 
 # Test credentials
 ADMIN_EMAIL = "admin@climbtracker.com"
@@ -19,7 +21,210 @@ DEFAULT_TIMEOUT = 10
 LONG_TIMEOUT = 20
 SHORT_TIMEOUT = 5
 
+# Python API client (api_client/): keep-alive connections per client; idle
+# connections older than the keep-alive window are dropped (Node closes them after 5s)
+API_CLIENT_POOL_SIZE = 10
+API_CLIENT_KEEPALIVE_S = 4
+
+# Synthetic input (synthetic_input.py): RouteCardWithStatus opens the quick
+# status menu after a 500ms press. A long press that waits for the menu holds
+# up to LONG_PRESS_TIMEOUT seconds (the timer fires late under CPU throttling),
+# one without a condition holds the threshold plus a margin for timer jitter
+LONG_PRESS_MS = 500
+LONG_PRESS_MARGIN_MS = 100
+LONG_PRESS_TIMEOUT = SHORT_TIMEOUT
+
 # Browser settings - read from environment for CI/CD
 HEADLESS = os.environ.get("HEADLESS", "").lower() in ("true", "1", "yes")
 WINDOW_WIDTH = 430  # Mobile-like width (max-w-md)
 WINDOW_HEIGHT = 932
+
+# Performance results store (enabled by run_tests.py, off for plain pytest)
+PERF_STORE = os.environ.get("PERF_STORE", "").lower() in ("true", "1", "yes")
+PERF_DB_PATH = os.environ.get("PERF_DB_PATH", "perf_results.db")
+
+# Regression detection against the rolling baseline
+REGRESSION_BASELINE_RUNS = 10      # Previous runs forming the baseline
+REGRESSION_MIN_BASELINE_RUNS = 5   # Below this, a metric is not checked
+REGRESSION_Z_THRESHOLD = 3.0       # Robust z-score (scaled MADs above median)
+REGRESSION_MIN_CHANGE = 0.10       # Ignore slowdowns under 10%
+REGRESSION_P_VALUE = 0.05          # Mann-Whitney significance level
+
+# A/B build comparison (run_tests.py compare)
+COMPARE_API_PORTS = (3100, 3200)   # API port of build A and build B
+COMPARE_WEB_PORTS = (5180, 5280)   # Web (vite preview) port of build A and build B
+# Journeys that load pages through nav_helpers, so each one gives a per-page metric
+COMPARE_JOURNEYS = "test_admin_navigation.py::TestAdminNavigation::test_route_creation_page " \
+                   "test_admin_navigation.py::TestAdminNavigation::test_leaderboard_page"
+COMPARE_API_ENDPOINTS = [
+    "/api/routes",
+    "/api/routes?search=a",
+    "/api/routes/stats",
+    "/api/leaderboard",
+    "/api/leaderboard/friends",
+]
+COMPARE_API_REPEATS = 5            # Requests per endpoint per round
+COMPARE_MIN_ROUNDS = 4
+COMPARE_MAX_ROUNDS = 20
+COMPARE_CI_WIDTH = 0.05            # Stop once every speedup CI is narrower than +/-5%
+
+# Upload / image-serving benchmark (python upload_bench.py)
+UPLOAD_BENCH_SIZES_MB = [0.5, 2, 5, 10, 20]   # Phone photo up to twice the API's 10 MB limit
+UPLOAD_BENCH_PROXY_SIZES_KB = [200, 2048]     # Images served by the local stand-in origin
+UPLOAD_BENCH_CONCURRENCY = [1, 8, 32]
+UPLOAD_BENCH_DURATION = 15                    # Seconds per scenario and concurrency level
+UPLOAD_BENCH_RSS_INTERVAL = 0.25              # Seconds between API RSS samples
+
+# Routes hub query plans (python query_plans.py)
+QUERY_PLAN_SEED_ROUTES = 50000     # Synthetic routes inserted by --seed
+QUERY_PLAN_SLOW_MS = 50            # Plans slower than this are flagged
+
+# Step budgets in ms, by step prefix ("nav:routes" -> "nav")
+STEP_BUDGETS = {
+    "nav": 3000,
+    "tab": 1000,
+    "interaction": 3000,
+}
+
+# Continuous Chrome tracing, flushed to reports/traces/ when a step breaches its budget
+PERF_TRACE = os.environ.get("PERF_TRACE", "").lower() in ("true", "1", "yes")
+TRACE_BUFFER_EVENTS = 200000       # Ring buffer size (most recent trace events)
+
+# Harness self-profiling (see harness_profile.py)
+PERF_PROFILE_HARNESS = os.environ.get("PERF_PROFILE_HARNESS", "").lower() in ("true", "1", "yes")
+IMPLICIT_WAIT_THRESHOLD_MS = 250   # Slower findElement calls count as implicit waiting
+
+# API request amplification (api_calls.py)
+# Log API requests with a fetch wrapper in every page and hold all tests to the budgets below;
+# tests marked @pytest.mark.api_budget get the log and the budgets without it
+API_CALL_LOG = os.environ.get("API_CALL_LOG", "").lower() in ("true", "1", "yes")
+API_CALLS_PER_PAGE = 25            # Default per-step budget, override with @pytest.mark.api_budget
+DUPLICATE_WINDOW_MS = 2000         # Same request again within this window = duplicate
+N_PLUS_ONE_MIN_CALLS = 5           # Same endpoint for this many ids in one step = N+1
+POLLING_MIN_CALLS = 3              # Repeats at a steady interval needed to call it polling
+
+# JSON payload budgets (KB, uncompressed) per response and per page, override with @pytest.mark.api_budget
+PAYLOAD_BUDGETS_KB = {
+    "GET /api/routes": 60,
+    "GET /api/routes/:id": 20,
+    "GET /api/leaderboard": 100,
+    "GET /api/leaderboard/friends": 50,
+    "GET /api/notifications": 30,
+}
+PAGE_PAYLOAD_BUDGET_KB = 300
+# Record which response fields the UI reads (Proxy around parsed JSON) to report over-fetching
+PAYLOAD_FIELDS = os.environ.get("PAYLOAD_FIELDS", "").lower() in ("true", "1", "yes")
+
+# Leaderboard oracle (python leaderboard_oracle.py)
+LEADERBOARD_SEED_USERS = 500                    # Synthetic climbers inserted by --seed
+LEADERBOARD_SEED_ROUTES = 400
+LEADERBOARD_SEED_VALIDATIONS = 100000           # Approximate, one per (climber, route) pair at most
+LEADERBOARD_SEED_FRIENDS = 50                   # Seeded climbers made friends of the admin
+LEADERBOARD_BENCH_SIZES = [10000, 100000, 1000000]
+LEADERBOARD_API_REPEATS = 5
+
+# Comment thread scale test (python run_tests.py comments)
+COMMENT_SCALE = os.environ.get("COMMENT_SCALE", "false").lower() in ("true", "1", "yes")
+COMMENT_SCALE_SIZES = [10, 1000, 10000]         # Comments per seeded route
+COMMENT_SCALE_API_REPEATS = 10
+COMMENT_SCALE_RENDER_BUDGET_MS = 100            # Comments response -> painted list
+COMMENT_SCALE_PAYLOAD_BUDGET_KB = 100           # One comments response
+
+# Concurrent validation writes (python validation_bench.py)
+VALIDATION_BENCH_USERS = 50                     # Climbers, each with their own session
+VALIDATION_BENCH_ROUTES = 3                     # Popular routes they all write to
+VALIDATION_BENCH_DURATION = 30                  # Seconds
+VALIDATION_BENCH_DOUBLE_TAP = 0.1               # Share of writes sent twice at once
+
+# Friend search and friendship graph scale (python friend_graph_bench.py)
+FRIEND_GRAPH_SIZES = [10000, 100000, 500000]    # Synthetic climbers, the graph grows through each
+FRIEND_GRAPH_PROBE_DEGREES = [10, 100, 1000, 5000]  # Accepted friends of each probe account
+FRIEND_GRAPH_REPEATS = 5
+
+# Notification polling load model (python polling_load.py)
+POLLING_LOAD_CLIENTS = 2000                     # Idle tabs
+POLLING_LOAD_ACCOUNTS = 200                     # Signed-in sessions the tabs are spread over
+POLLING_LOAD_DURATION = 120                     # Seconds
+POLLING_LOAD_OBSERVE_S = 95                     # Idle time in Chrome to detect the polling cadence
+# Fallback when the cadence is not measured (NotificationBell.tsx), path -> period in s
+POLLING_LOAD_CADENCE = {"/api/notifications/unread-count": 30}
+
+# Web push stand-in and fan-out benchmark (python push_fanout.py)
+PUSH_STANDIN_URL = os.environ.get("PUSH_STANDIN_URL", "https://localhost:8443")  # Must be reachable from the API
+PUSH_STANDIN_LATENCY_MS = 50                    # Mean push service response time
+PUSH_STANDIN_JITTER_MS = 20
+PUSH_STANDIN_FAILURE_RATE = 0.0                 # Share of deliveries answering 500
+PUSH_FANOUT_DEVICES = 1000                      # Subscriptions of the single user in the "devices" scenario
+PUSH_FANOUT_USERS = 200                         # Users notified at once in the "users" scenario
+PUSH_FANOUT_DEVICES_PER_USER = 3
+PUSH_FANOUT_GONE = 0.1                          # Share of subscriptions answering 410 Gone
+
+# Webhook burst replay (python webhook_burst.py)
+# .env.example leaves STRIPE_WEBHOOK_SECRET empty: the API must run with the same value
+WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET") or "whsec_e2e_webhook_bench"
+WEBHOOK_BURST_CUSTOMERS = 200                   # Subscription lifecycles replayed (3 events each at most)
+WEBHOOK_BURST_CANCEL_SHARE = 0.3                # Lifecycles ending in customer.subscription.deleted
+WEBHOOK_BURST_CONCURRENCY = [1, 10, 50]         # Deliveries in flight, events of a customer in order
+WEBHOOK_BURST_SIZES = [50, 200, 1000]           # Redeliveries sent at once in the retry storm
+WEBHOOK_BURST_DUPLICATES = 3                    # Deliveries of every event in the retry storm
+
+# Record the analytics events of every test (analytics_events.py), wraps fetch and console.log in every page
+ANALYTICS_EVENTS = os.environ.get("ANALYTICS_EVENTS", "").lower() in ("true", "1", "yes")
+
+# Analytics ingestion load (python analytics_load.py), replaying reports/analytics_events
+ANALYTICS_LOAD_USERS = 1000                     # Virtual users replaying journeys at once
+ANALYTICS_LOAD_DURATION = 60                    # Seconds per submission mode
+ANALYTICS_LOAD_SPEEDUP = 10                     # Recorded gaps between events are divided by this
+ANALYTICS_LOAD_CONNECTIONS = 200                # Keep-alive connections shared by the virtual users
+ANALYTICS_BATCH_SIZE = 20                       # Events per POST /api/analytics/batch (API max 100)
+ANALYTICS_BATCH_INTERVAL_S = 5                  # Batched mode flushes at least this often
+
+# Per-test / per-step SQL statistics from pg_stat_statements
+PERF_DB_STATS = os.environ.get("PERF_DB_STATS", "").lower() in ("true", "1", "yes")
+
+# Network profiles applied through CDP (latency in ms, throughput in kbit/s).
+# Packet-loss bursts take the connection offline for `loss_burst_ms` every `loss_burst_every` s.
+NETWORK_PROFILES = {
+    "gym_wifi": {"latency": 120, "download_kbps": 3000, "upload_kbps": 750},
+    "3g": {"latency": 300, "download_kbps": 1600, "upload_kbps": 750},
+    "slow_3g": {"latency": 400, "download_kbps": 400, "upload_kbps": 400},
+    "flaky": {"latency": 200, "download_kbps": 1500, "upload_kbps": 500,
+              "loss_burst_every": 4.0, "loss_burst_ms": 800},
+}
+NETWORK_PROFILE = os.environ.get("NETWORK_PROFILE")  # Suite-wide profile, e.g. "gym_wifi"
+
+# Device profiles applied through CDP emulation (cpu_throttle: CPU slowdown factor)
+DEVICE_PROFILES = {
+    "phone": {"width": 430, "height": 932, "dpr": 3, "mobile": True, "touch": True, "cpu_throttle": 1},
+    "tablet": {"width": 820, "height": 1180, "dpr": 2, "mobile": True, "touch": True, "cpu_throttle": 1},
+    "desktop": {"width": 1440, "height": 900, "dpr": 1, "mobile": False, "touch": False, "cpu_throttle": 1},
+    "mid_range_phone": {"width": 412, "height": 915, "dpr": 2.625, "mobile": True, "touch": True,
+                        "cpu_throttle": 4},
+    "low_end_phone": {"width": 360, "height": 740, "dpr": 2, "mobile": True, "touch": True,
+                      "cpu_throttle": 6,
+                      "user_agent": "Mozilla/5.0 (Linux; Android 11; SM-A125F) AppleWebKit/537.36 "
+                                    "(KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36"},
+}
+DEVICE_PROFILE = os.environ.get("DEVICE_PROFILE")  # Suite-wide profile, e.g. "low_end_phone"
+# Run every browser test once per device, switching in place in one warm browser
+DEVICE_MATRIX = [d for d in os.environ.get("DEVICE_MATRIX", "").split(",") if d]
+LONG_TASK_MS = 50                  # Main-thread tasks longer than this block input
+
+# Service worker benchmark (cold / warm / offline loads)
+SW_PAGES = ["/routes", "/leaderboard"]
+SW_REPEATS = 3
+SW_IDLE_MS = 500                   # No network event for this long after load = page settled
+SW_LOAD_TIMEOUT = 30
+
+# Memory soak test (python run_tests.py soak)
+SOAK = os.environ.get("SOAK", "false").lower() in ("true", "1", "yes")
+SOAK_CYCLES = int(os.environ.get("SOAK_CYCLES", "200"))
+SOAK_WARMUP_CYCLES = 5             # Excluded from the trend (lazy chunks, caches filling up)
+SOAK_HEAP_SNAPSHOTS = os.environ.get("SOAK_HEAP_SNAPSHOTS", "true").lower() in ("true", "1", "yes")
+# Maximum retained growth over the whole soak, from the fitted trend
+SOAK_TOLERANCES = {
+    "js_heap_kb": 2048,
+    "dom_nodes": 500,
+    "event_listeners": 100,
+    "detached_nodes": 100,
+}
@@ -1,40 +1,62 @@
 """Pytest fixtures and configuration for E2E tests"""
 
+import csv
 import pytest
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 
-from config import BASE_URL, HEADLESS, WINDOW_WIDTH, WINDOW_HEIGHT
-from helpers import PageHelpers, AuthHelpers, NavigationHelpers
+from config import (
+    BASE_URL,
+    PERF_STORE,
+    PERF_DB_PATH,
+    PERF_PROFILE_HARNESS,
+    PERF_DB_STATS,
+    API_CALLS_PER_PAGE,
+    PAGE_PAYLOAD_BUDGET_KB,
+    PAYLOAD_FIELDS,
+    NETWORK_PROFILE,
+    DEVICE_PROFILE,
+    DEVICE_MATRIX,
+)
+from helpers import PageHelpers, AuthHelpers, NavigationHelpers, create_chrome_driver
+from harness_profile import profiler
+from perf import recorder, device_matrix
+from analytics_events import event_counts
+from api_calls import budget_violations, payload_sizes, session_fields, unread_fields
 
 
 # Create screenshots directory if it doesn't exist
 os.makedirs("screenshots", exist_ok=True)
 
 
-@pytest.fixture(scope="function")
-def driver():
-    """Create a Chrome WebDriver instance"""
-    chrome_options = Options()
+@pytest.fixture(scope="session")
+def device():
+    """Device profile of the test, parametrized over DEVICE_MATRIX when set"""
+    return DEVICE_PROFILE
+
+
+@pytest.fixture(scope="session")
+def warm_browser(request):
+    """Single Chrome instance shared by the device matrix"""
+    driver = create_chrome_driver(log_api_calls=True if _api_budget_marked(request.session.items) else None)
+    yield driver
+    driver.quit()
 
-    if HEADLESS:
-        chrome_options.add_argument("--headless")
 
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument(f"--window-size={WINDOW_WIDTH},{WINDOW_HEIGHT}")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-extensions")
+@pytest.fixture(scope="function")
+def driver(request, device):
+    """Create a Chrome WebDriver instance"""
+    if DEVICE_MATRIX:
+        from devices import switch_device
 
-    # Create driver using webdriver-manager
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+        # Switch layout in place instead of launching a browser per device
+        driver = request.getfixturevalue("warm_browser")
+        switch_device(driver, device)
+        driver.get(BASE_URL)
+        yield driver
+        return
 
-    # Set implicit wait
-    driver.implicitly_wait(5)
+    # api_budget tests get the API request log even when API_CALL_LOG is off
+    driver = create_chrome_driver(log_api_calls=True if _api_budget_marked([request.node]) else None)
 
     # Navigate to base URL
     driver.get(BASE_URL)
@@ -90,3 +112,275 @@ def lambda_logged_in(driver, page_helpers, auth_helpers):
         auth_helpers.register(LAMBDA_USER_NAME, LAMBDA_USER_EMAIL, LAMBDA_USER_PASSWORD)
 
     return driver
+
+
+# ==================== PERFORMANCE CAPTURE ====================
+
+# Fixtures that hand a WebDriver to the test
+DRIVER_FIXTURES = ("driver", "browser", "admin_logged_in", "lambda_logged_in")
+
+
+def _api_budget_marked(items):
+    """Whether any of the items opted in to API budgets with the api_budget marker"""
+    return any(item.get_closest_marker("api_budget") for item in items)
+
+
+def _item_driver(item):
+    """Return the WebDriver used by a test item, if any"""
+    funcargs = getattr(item, "funcargs", {})
+    for name in DRIVER_FIXTURES:
+        if name in funcargs:
+            return funcargs[name]
+    return None
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "network_profile(name): run the test body under a profile from NETWORK_PROFILES",
+    )
+    config.addinivalue_line(
+        "markers",
+        "webdriver_budget(commands=None, sleep=None): fail the test when its body issues "
+        "more WebDriver commands or sleeps longer (seconds) than allowed",
+    )
+    config.addinivalue_line(
+        "markers",
+        "api_budget(per_page, page_kb): log the test's API requests and fail it when a page load or "
+        "interaction (recorder step) makes more API requests (default API_CALLS_PER_PAGE) or reads more JSON (default "
+        "PAGE_PAYLOAD_BUDGET_KB) than allowed, or a response exceeds its PAYLOAD_BUDGETS_KB entry",
+    )
+    if PERF_PROFILE_HARNESS:
+        profiler.install()
+    if PERF_DB_STATS:
+        from statements import StatementTracker
+        recorder.statements = StatementTracker.connect()
+
+
+def pytest_generate_tests(metafunc):
+    if not DEVICE_MATRIX or "device" not in metafunc.fixturenames:
+        return
+    # Journeys sharing a class-scoped browser run end to end per device
+    scope = "class" if "browser" in metafunc.fixturenames else "function"
+    metafunc.parametrize("device", DEVICE_MATRIX, ids=DEVICE_MATRIX, scope=scope)
+
+
+def pytest_collection_modifyitems(config, items):
+    # Budgets need the profiler's command and sleep accounting
+    if any(item.get_closest_marker("webdriver_budget") for item in items):
+        profiler.install()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    if not profiler.installed:
+        yield
+        return
+
+    profiler.start_test(item.nodeid)
+    yield
+    costs, _ = profiler.finish_test()
+    for category, ms in costs.items():
+        recorder.record("harness", category, ms, test=item.nodeid)
+
+
+def pytest_runtest_setup(item):
+    recorder.current_test = item.nodeid
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    # Per-test network profile, applied to the test body only (not to login fixtures)
+    marker = item.get_closest_marker("network_profile")
+    conditioner = None
+    if marker is not None and _item_driver(item) is not None:
+        from network import conditioner_for
+        conditioner = conditioner_for(_item_driver(item))
+        conditioner.apply(marker.args[0])
+
+    if recorder.statements:
+        recorder.statements.start_test()
+    track_api_calls = recorder.api_calls is not None and _item_driver(item) is not None
+    if track_api_calls:
+        recorder.api_calls.start_test()
+    track_analytics = recorder.analytics is not None and _item_driver(item) is not None
+    if track_analytics:
+        recorder.analytics.start_test()
+    commands_before, sleep_before = profiler.usage()
+    outcome = yield
+    commands_after, sleep_after = profiler.usage()
+    item.harness_usage = (commands_after - commands_before, sleep_after - sleep_before)
+
+    if recorder.statements:
+        statements, path = recorder.statements.finish_test(item.nodeid)
+        queries = sum(s["calls"] for s in statements)
+        recorder.record("db", "queries", queries, test=item.nodeid)
+        recorder.record("db", "db_time", sum(s["ms"] for s in statements), test=item.nodeid)
+        recorder.attach(f"SQL statements ({queries} queries)", path, test=item.nodeid)
+
+    if track_api_calls:
+        findings, path = recorder.api_calls.finish_test(item.nodeid)
+        item.api_call_steps = [(name, calls) for name, calls in recorder.api_calls.steps
+                               if name != "(outside steps)"]
+        for finding in findings:
+            print(f"  [API] {finding}")
+        recorder.record("api_calls", "amplification_findings", len(findings), test=item.nodeid)
+        for endpoint, (kb, gzip_kb) in payload_sizes(recorder.api_calls.steps).items():
+            recorder.record("payload", f"{endpoint}:kb", kb, test=item.nodeid)
+            if gzip_kb:
+                recorder.record("payload", f"{endpoint}:gzip_kb", gzip_kb, test=item.nodeid)
+        recorder.attach(f"API calls ({len(findings)} findings)", path, test=item.nodeid)
+
+    if track_analytics:
+        events, path = recorder.analytics.finish_test(item.nodeid)
+        sent = sum(e["sent"] for e in events)
+        recorder.record("analytics", "events", len(events), test=item.nodeid)
+        recorder.record("analytics", "requests", sent, test=item.nodeid)
+        for name, count in event_counts(events).items():
+            recorder.record("analytics", f"{name}:count", count, test=item.nodeid)
+        if path:
+            print(f"  [Analytics] {len(events)} events, {sent} sent to the API")
+            recorder.attach(f"Analytics events ({len(events)})", path, test=item.nodeid)
+
+    if conditioner is not None:
+        conditioner.apply(NETWORK_PROFILE)
+
+    # Collect API calls the test triggered outside of NavigationHelpers
+    driver = _item_driver(item)
+    if driver is not None:
+        recorder.capture_api_latencies(driver)
+
+    # Budgets fail the test body itself (call phase), once everything above is recorded
+    if outcome.excinfo is None:
+        failures = [f for f in (_webdriver_budget_failure(item), _api_budget_failure(item)) if f]
+        if failures:
+            outcome.force_exception(pytest.fail.Exception("; ".join(failures), pytrace=False))
+
+
+def _webdriver_budget_failure(item):
+    """Why the test body broke its webdriver_budget marker, None if it did not"""
+    marker = item.get_closest_marker("webdriver_budget")
+    usage = getattr(item, "harness_usage", None)
+    if marker is None or usage is None:
+        return None
+
+    commands, sleep_ms = usage
+    max_commands = marker.kwargs.get("commands")
+    max_sleep = marker.kwargs.get("sleep")
+    problems = []
+    if max_commands is not None and commands > max_commands:
+        problems.append(f"{commands} WebDriver commands (max {max_commands})")
+    if max_sleep is not None and sleep_ms > max_sleep * 1000:
+        problems.append(f"{sleep_ms / 1000:.1f}s of time.sleep (max {max_sleep}s)")
+    return "WebDriver budget exceeded: " + ", ".join(problems) if problems else None
+
+
+def _api_budget_failure(item):
+    """Why the test's steps broke the API request and payload budgets, None if they did not"""
+    steps = getattr(item, "api_call_steps", None)
+    if not steps:
+        return None
+    marker = item.get_closest_marker("api_budget")
+    kwargs = marker.kwargs if marker else {}
+    violations = budget_violations(
+        steps,
+        per_page=kwargs.get("per_page", API_CALLS_PER_PAGE),
+        page_kb=kwargs.get("page_kb", PAGE_PAYLOAD_BUDGET_KB),
+    )
+    return f"API budget exceeded: {'; '.join(violations)}" if violations else None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.when != "call" or item.nodeid not in recorder.artifacts:
+        return
+    try:
+        import pytest_html
+    except ImportError:
+        return
+    # Report lives in reports/, artifacts are linked relative to it
+    extras = getattr(report, "extras", [])
+    for name, path in recorder.artifacts[item.nodeid]:
+        extras.append(pytest_html.extras.url(os.path.relpath(path, "reports"), name=name))
+    report.extras = extras
+
+
+def pytest_runtest_logreport(report):
+    if report.when == "call":
+        recorder.record("test", "duration", report.duration * 1000, test=report.nodeid)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if DEVICE_MATRIX:
+        _device_matrix_summary(terminalreporter)
+    if PAYLOAD_FIELDS and session_fields:
+        _over_fetch_summary(terminalreporter)
+
+    if not PERF_PROFILE_HARNESS or not profiler.totals:
+        return
+    terminalreporter.section("harness profile")
+    for line in profiler.summary().splitlines():
+        terminalreporter.write_line(line)
+    terminalreporter.write_line(f"Flame graph data: {profiler.write_folded()}")
+
+
+def _over_fetch_summary(terminalreporter):
+    """Response fields no test saw the UI read, per endpoint"""
+    terminalreporter.section("over-fetch (fields never read)")
+    for endpoint, usage in sorted(session_fields.items()):
+        unread = unread_fields(usage)
+        if not unread:
+            continue
+        terminalreporter.write_line(f"{endpoint}: {len(unread)} of {len(usage['present'])} fields unread")
+        for path in unread:
+            terminalreporter.write_line(f"    {path}")
+
+
+def _device_matrix_summary(terminalreporter):
+    """Per-device timings side by side, also written to reports/device_matrix.csv"""
+    matrix = device_matrix(recorder.samples, DEVICE_MATRIX)
+    if not matrix:
+        return
+    terminalreporter.section("device matrix (ms)")
+    terminalreporter.write_line(f"{'Test / step':<70}" + "".join(f"{d:>12}" for d in DEVICE_MATRIX))
+    for (test, metric), per_device in matrix.items():
+        label = test.split("::")[-1] if metric == "duration" else f"  {metric}"
+        cells = "".join(
+            f"{per_device[d]:>12.0f}" if d in per_device else f"{'-':>12}" for d in DEVICE_MATRIX
+        )
+        terminalreporter.write_line(f"{label[:70]:<70}{cells}")
+
+    os.makedirs("reports", exist_ok=True)
+    with open(os.path.join("reports", "device_matrix.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["test", "metric", *DEVICE_MATRIX])
+        for (test, metric), per_device in matrix.items():
+            writer.writerow([test, metric, *(round(per_device.get(d, 0), 1) for d in DEVICE_MATRIX)])
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if recorder.statements:
+        recorder.statements.close()
+
+    export_path = os.environ.get("PERF_EXPORT")
+    if export_path:
+        import json
+        with open(export_path, "w") as f:
+            json.dump(recorder.samples, f)
+
+    if not PERF_STORE or not recorder.samples:
+        return
+    from results_store import ResultsStore
+
+    store = ResultsStore(PERF_DB_PATH)
+    try:
+        run_id = store.save_run(
+            recorder.samples,
+            suite=os.environ.get("PERF_SUITE"),
+            exit_status=int(exitstatus),
+        )
+    finally:
+        store.close()
+    print(f"\nStored {len(recorder.samples)} performance samples as run {run_id} in {PERF_DB_PATH}")
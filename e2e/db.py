@@ -0,0 +1,24 @@
+"""Direct access to the app's Postgres database for query-level benchmarks"""
+
+import os
+
+import psycopg
+from dotenv import dotenv_values
+
+from config import DATABASE_URL
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def database_url():
+    """DATABASE_URL from the environment, else from the .env the API reads"""
+    return DATABASE_URL or dotenv_values(os.path.join(REPO_ROOT, ".env")).get("DATABASE_URL")
+
+
+def connect(autocommit=True):
+    """New connection to the app database"""
+    url = database_url()
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set (environment or .env at the repository root)")
+    return psycopg.connect(url, autocommit=autocommit)
@@ -0,0 +1,49 @@
+"""Device emulation (viewport, touch, CPU speed) through the Chrome DevTools Protocol"""
+
+from config import DEVICE_PROFILES
+
+
+def apply_device(driver, name):
+    """Emulate a named device from DEVICE_PROFILES in the running browser"""
+    if name not in DEVICE_PROFILES:
+        raise ValueError(f"Unknown device profile '{name}' (known: {', '.join(DEVICE_PROFILES)})")
+    settings = DEVICE_PROFILES[name]
+    touch = settings.get("touch", False)
+
+    driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+        "width": settings["width"],
+        "height": settings["height"],
+        "deviceScaleFactor": settings.get("dpr", 1),
+        "mobile": settings.get("mobile", False),
+    })
+    driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {
+        "enabled": touch,
+        "maxTouchPoints": 5 if touch else 1,
+    })
+    # Mouse input from WebDriver arrives as touch events, like a finger would
+    driver.execute_cdp_cmd("Emulation.setEmitTouchEventsForMouse", {
+        "enabled": touch,
+        "configuration": "mobile" if touch else "desktop",
+    })
+    driver.execute_cdp_cmd("Emulation.setCPUThrottlingRate", {"rate": settings.get("cpu_throttle", 1)})
+    if settings.get("user_agent"):
+        driver.execute_cdp_cmd("Emulation.setUserAgentOverride", {"userAgent": settings["user_agent"]})
+    print(f"  Device profile: {name}")
+
+
+def switch_device(driver, name):
+    """Forget all site data and switch a reused browser to another device"""
+    from config import BASE_URL, API_URL
+
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    for origin in (BASE_URL, API_URL):
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    apply_device(driver, name)
+
+
+def clear_device(driver):
+    """Back to the browser's own window, input and CPU speed"""
+    driver.execute_cdp_cmd("Emulation.clearDeviceMetricsOverride", {})
+    driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {"enabled": False})
+    driver.execute_cdp_cmd("Emulation.setEmitTouchEventsForMouse", {"enabled": False})
+    driver.execute_cdp_cmd("Emulation.setCPUThrottlingRate", {"rate": 1})
@@ -0,0 +1,269 @@
+"""
+Friend search and friendship graph scale benchmark
+
+Grows the user table through FRIEND_GRAPH_SIZES (10k -> 100k -> 500k
+synthetic climbers, inserted with SQL) with a power-law friendship graph:
+every climber sends a few requests, mostly to low-numbered climbers, which
+become hubs. Probe accounts (signed up through Better Auth) get exactly
+FRIEND_GRAPH_PROBE_DEGREES accepted friends, a tenth as many pending
+requests, and their friends a few validations.
+
+At each size it times, through the API:
+- GET /api/friendships/search for prefixes typed one key at a time, a
+  common first name, a single user, a miss (full scan) and a query matching
+  everyone, with the share of users each matches
+- GET /api/friendships, /pending, /api/leaderboard/friends and a search
+  for each probe, to show how they grow with the number of friends
+
+Usage:
+    python friend_graph_bench.py
+    python friend_graph_bench.py --sizes 10000,50000 --keep   # Keep the graph for another run
+    python friend_graph_bench.py --cleanup
+"""
+
+import argparse
+import asyncio
+
+from api_client import ApiError
+from bench import BenchSamples, save_bench_run
+from bench_users import close_clients, delete_accounts, sign_up_clients
+from config import (
+    ADMIN_EMAIL,
+    FRIEND_GRAPH_SIZES,
+    FRIEND_GRAPH_PROBE_DEGREES,
+    FRIEND_GRAPH_REPEATS,
+)
+from db import connect
+from perf_stats import median
+
+
+GRAPH_DOMAIN = "graph.bench"
+PROBE_DOMAIN = "friends.bench"
+ROUTE_PREFIX = "FG bench"
+# No name is a substring of another, so a first name selects 1/20 of the climbers
+FIRST_NAMES = ["Adele", "Bruno", "Camille", "Dorian", "Elodie", "Fabien", "Gaspard", "Hugo", "Ines", "Jules",
+               "Karim", "Louise", "Mathis", "Noemie", "Oscar", "Pauline", "Quentin", "Romane", "Sacha", "Theo"]
+SEARCHES = [
+    ("typing", "Ca"),
+    ("typing", "Cam"),
+    ("typing", "Cami"),
+    ("typing", "Camille"),
+    ("one user", "member-4242@"),
+    ("miss", "zzqx"),
+    ("everyone", "member"),
+]
+
+
+def seeded_count(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM users WHERE email LIKE %s", (f"%@{GRAPH_DOMAIN}",))
+        return cur.fetchone()[0]
+
+
+def grow(conn, start, end):
+    """Add climbers start+1..end and the requests they send"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO users (id, email, name, email_verified) "
+            "SELECT 'fgbench-' || g, 'member-' || g || '@' || %(domain)s, "
+            "(%(names)s::text[])[1 + g %% 20] || ' Bloc' || g, true "
+            "FROM generate_series(%(start)s + 1, %(end)s) g",
+            {"domain": GRAPH_DOMAIN, "names": FIRST_NAMES, "start": start, "end": end},
+        )
+        # 1-10 requests each (mean ~3), to climbers drawn with density ~ 1/rank^(2/3): power-law in-degree.
+        # Pairs are stored once, lowest id first, so (a, b) and (b, a) never both exist.
+        # Every LATERAL item references the row before it: an uncorrelated one may be evaluated once
+        # and rewound, giving all climbers the same count, target and status (a star).
+        cur.execute(
+            """
+            INSERT INTO friendships (id, requester_id, addressee_id, status, created_at, accepted_at)
+            SELECT gen_random_uuid(), 'fgbench-' || least(g, h), 'fgbench-' || greatest(g, h), s.status,
+                   now(), CASE WHEN s.status = 'ACCEPTED' THEN now() END
+            FROM generate_series(%(start)s + 1, %(end)s) g
+            CROSS JOIN LATERAL generate_series(1, 1 + least(floor(-ln(1 - random()) * 2)::int, 9 + 0 * g)) k
+            CROSS JOIN LATERAL (SELECT 1 + floor(%(end)s * power(random(), 3))::int AS h WHERE k IS NOT NULL) p
+            CROSS JOIN LATERAL (SELECT (CASE WHEN random() < 0.9 THEN 'ACCEPTED' ELSE 'PENDING' END)
+                                       ::friendship_status AS status WHERE h IS NOT NULL) s
+            WHERE h <> g
+            ON CONFLICT DO NOTHING
+            """,
+            {"start": start, "end": end},
+        )
+        edges = cur.rowcount
+        cur.execute("ANALYZE users")
+        cur.execute("ANALYZE friendships")
+    print(f"Added climbers {start + 1}-{end} and {edges} friendships")
+
+
+def degree_summary(conn):
+    """(max, p99, mean) accepted friends per seeded climber"""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            WITH ends AS (
+                SELECT requester_id AS id FROM friendships WHERE status = 'ACCEPTED' AND requester_id LIKE 'fgbench-%'
+                UNION ALL
+                SELECT addressee_id FROM friendships WHERE status = 'ACCEPTED' AND addressee_id LIKE 'fgbench-%'
+            ), degrees AS (SELECT count(*) AS d FROM ends GROUP BY id)
+            SELECT max(d), percentile_cont(0.99) WITHIN GROUP (ORDER BY d), avg(d) FROM degrees
+            """
+        )
+        return cur.fetchone()
+
+
+def attach_probes(conn, probes, degrees):
+    """Give each probe `degree` accepted friends (climbers 1..degree), degree/10 pending requests, and
+    the friends a few validations on bench routes"""
+    with conn.cursor() as cur:
+        for api, degree in zip(probes, degrees):
+            cur.execute(
+                "INSERT INTO friendships (id, requester_id, addressee_id, status, created_at, accepted_at) "
+                "SELECT gen_random_uuid(), %(probe)s, 'fgbench-' || g, 'ACCEPTED', now(), now() "
+                "FROM generate_series(1, %(n)s) g",
+                {"probe": api.user["id"], "n": degree},
+            )
+            cur.execute(
+                "INSERT INTO friendships (id, requester_id, addressee_id, status, created_at) "
+                "SELECT gen_random_uuid(), 'fgbench-' || g, %(probe)s, 'PENDING', now() "
+                "FROM generate_series(%(n)s + 1, %(n)s + greatest(%(n)s / 10, 1)) g",
+                {"probe": api.user["id"], "n": degree},
+            )
+        cur.execute("SELECT id FROM users WHERE email = %s", (ADMIN_EMAIL,))
+        opener = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO routes (id, name, difficulty, hold_color_hex, hold_color_category, sector, "
+            "opener_id, main_photo, status, opened_at, created_at, updated_at) "
+            "SELECT gen_random_uuid(), %(prefix)s || ' ' || g, "
+            "(enum_range(NULL::difficulty_color))[1 + g %% 12], '#FF5733', 'red', 'Secteur A', %(opener)s, "
+            "'/uploads/routes/bench.jpg', 'ACTIVE', now(), now(), now() FROM generate_series(1, 20) g",
+            {"prefix": ROUTE_PREFIX, "opener": opener},
+        )
+        cur.execute(
+            "INSERT INTO validations (id, user_id, route_id, validated_at, status, attempts, is_flashed) "
+            "SELECT gen_random_uuid(), 'fgbench-' || g, r.id, (now() AT TIME ZONE 'UTC') - random() * interval '60 days', "
+            "'VALIDE', 1, false FROM generate_series(1, %(n)s) g CROSS JOIN routes r "
+            "WHERE r.name LIKE %(prefix)s AND random() < 0.15",
+            {"n": max(degrees), "prefix": f"{ROUTE_PREFIX} %"},
+        )
+        cur.execute("ANALYZE validations")
+
+
+def match_share(conn, q):
+    """Share of users the search's ILIKE matches"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT avg((name ILIKE %(p)s OR email ILIKE %(p)s)::int) FROM users", {"p": f"%{q}%"})
+        return float(cur.fetchone()[0] or 0)
+
+
+async def timed(api, path, params=None):
+    """(median ms, KB) over FRIEND_GRAPH_REPEATS requests"""
+    times, kb = [], 0
+    for _ in range(FRIEND_GRAPH_REPEATS):
+        response = await api.request("GET", path, params=params)
+        if not response.ok:
+            raise ApiError(response, f"GET {path} answered {response.status}")
+        times.append(response.elapsed_ms)
+        kb = len(response.body) / 1024
+    return median(times), kb
+
+
+async def measure(conn, size, probes, degrees, record):
+    print(f"\n=== {size} climbers ===")
+    max_degree, p99_degree, mean_degree = degree_summary(conn)
+    print(f"Friends per climber: mean {mean_degree:.1f}, p99 {p99_degree:.0f}, max {max_degree}")
+    # The seeded power law puts p99 at ~4x the mean; a star or uniform graph stays close to it
+    if p99_degree < 2 * mean_degree:
+        print("  Warning: the degree distribution has no tail, the seeded graph is not a power law")
+    record(f"{size}:degree:max", max_degree)
+
+    print(f"\n  {'search':<10}{'q':<15}{'matches':>9}{'median':>10}")
+    searcher = probes[0]
+    for label, q in SEARCHES:
+        ms, _ = await timed(searcher, "/api/friendships/search", {"q": q})
+        share = match_share(conn, q)
+        record(f"{size}:search:{q}", ms)
+        print(f"  {label:<10}{q:<15}{share:>8.2%}{ms:>8.1f}ms")
+
+    print(f"\n  {'friends':>8}{'/friendships':>20}{'/pending':>10}{'/leaderboard/friends':>22}{'search':>10}")
+    for api, degree in zip(probes, degrees):
+        friends_ms, friends_kb = await timed(api, "/api/friendships")
+        pending_ms, _ = await timed(api, "/api/friendships/pending")
+        leaderboard_ms, _ = await timed(api, "/api/leaderboard/friends")
+        search_ms, _ = await timed(api, "/api/friendships/search", {"q": "Camille"})
+        for name, value in (("friendships", friends_ms), ("friendships_kb", friends_kb), ("pending", pending_ms),
+                            ("leaderboard_friends", leaderboard_ms), ("search", search_ms)):
+            record(f"{size}:probe{degree}:{name}", value)
+        print(f"  {degree:>8}{friends_ms:>9.1f}ms {friends_kb:>7.0f}KB{pending_ms:>8.1f}ms"
+              f"{leaderboard_ms:>20.1f}ms{search_ms:>8.1f}ms")
+
+
+async def run(sizes, degrees, keep):
+    conn = connect()
+    probes = []
+    samples = BenchSamples("friend_graph_bench.py")
+    record = samples.record
+
+    try:
+        if seeded_count(conn) > min(sizes):
+            # A kept graph bigger than the first size would skew it
+            cleanup(conn)
+        else:
+            remove_probes(conn)
+        probes = await sign_up_clients(PROBE_DOMAIN, len(degrees), pool_size=1)
+        for size in sizes:
+            current = seeded_count(conn)
+            if size > current:
+                grow(conn, current, size)
+            if size == sizes[0]:
+                attach_probes(conn, probes, degrees)
+            await measure(conn, size, probes, degrees, record)
+    finally:
+        await close_clients(probes)
+        if not keep:
+            cleanup(conn)
+        conn.close()
+    return samples
+
+
+def remove_probes(conn):
+    """Delete the probe accounts and the bench routes, keep the graph"""
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM validations WHERE route_id IN (SELECT id FROM routes WHERE name LIKE %s)",
+                    (f"{ROUTE_PREFIX} %",))
+        cur.execute("DELETE FROM routes WHERE name LIKE %s", (f"{ROUTE_PREFIX} %",))
+    return delete_accounts(conn, PROBE_DOMAIN)
+
+
+def cleanup(conn):
+    removed = remove_probes(conn) + delete_accounts(conn, GRAPH_DOMAIN)
+    print(f"Removed {removed} bench climbers and their friendships")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Friend search and friendship graph scale benchmark")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in FRIEND_GRAPH_SIZES),
+                        help="Comma-separated user counts, ascending")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded graph afterwards")
+    parser.add_argument("--cleanup", action="store_true", help="Remove the seeded graph and exit")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    if args.cleanup:
+        conn = connect()
+        try:
+            cleanup(conn)
+        finally:
+            conn.close()
+        return 0
+
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    # Friends and pending requests of a probe all come from the first size's climbers
+    degrees = [d for d in FRIEND_GRAPH_PROBE_DEGREES if d + d // 10 <= sizes[0]]
+    samples = asyncio.run(run(sizes, degrees, args.keep))
+    if not args.no_store:
+        save_bench_run(samples, "friend-graph")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,217 @@
+"""
+Self-profiling of the E2E harness
+
+Splits the wall time of every test into:
+- webdriver:<command>  WebDriver HTTP round trips outside explicit waits
+- implicit_wait        findElement(s) calls slow enough to have sat in the implicit wait
+- wait                 time inside WebDriverWait.until / until_not (polling included)
+- sleep                hard time.sleep() calls
+- python               everything else (harness code, pytest, fixtures)
+
+Each cost is charged to the stack of e2e functions (helpers.py, test_*.py,
+conftest.py) that caused it. Only the thread running the test is measured:
+commands from helper threads (network.py's loss bursts) overlap the test
+instead of adding to it, and are left out of its costs and budgets. At the end of the session a summary of the
+costliest functions is printed and a collapsed-stack file is written to
+reports/harness_profile.folded (open it with speedscope or flamegraph.pl).
+
+Enable with PERF_PROFILE_HARNESS=true. The profiler is also installed
+(without the summary) when a collected test has a webdriver_budget marker.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+from selenium.webdriver.support.wait import WebDriverWait
+
+from config import IMPLICIT_WAIT_THRESHOLD_MS
+
+
+E2E_DIR = os.path.dirname(os.path.abspath(__file__))
+FIND_COMMANDS = {"findElement", "findElements", "findChildElement", "findChildElements"}
+FOLDED_PATH = os.path.join("reports", "harness_profile.folded")
+
+_original_sleep = time.sleep
+_original_execute = RemoteConnection.execute
+_original_until = WebDriverWait.until
+_original_until_not = WebDriverWait.until_not
+
+
+class HarnessProfiler:
+    """Attributes test wall time to WebDriver commands, waits and sleeps"""
+
+    def __init__(self):
+        self.installed = False
+        self.wait_depth = 0
+        self.test = None
+        self.thread = None
+        self.test_costs = None
+        self.test_commands = None
+        self.folded = Counter()
+        self.by_function = defaultdict(Counter)
+        self.totals = Counter()
+        self.command_counts = Counter()
+        self._is_e2e_file = {}
+
+    # ---------- attribution ----------
+
+    def _stack(self):
+        """Collapsed stack of e2e frames (outermost first) for the current call"""
+        frames = []
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            is_e2e = self._is_e2e_file.get(filename)
+            if is_e2e is None:
+                is_e2e = (os.path.dirname(os.path.abspath(filename)) == E2E_DIR
+                          and not filename.endswith("harness_profile.py"))
+                self._is_e2e_file[filename] = is_e2e
+            if is_e2e:
+                frames.append(f"{os.path.basename(filename)[:-3]}.{frame.f_code.co_name}")
+            frame = frame.f_back
+        return list(reversed(frames))
+
+    def _charge(self, category, elapsed_ms, stack):
+        self.test_costs[category] += elapsed_ms
+        self.folded[";".join(stack + [category])] += elapsed_ms
+        leaf = stack[-1] if stack else "<outside e2e code>"
+        self.by_function[leaf][category] += elapsed_ms
+
+    # ---------- wrappers ----------
+
+    def _measured(self):
+        """Whether the caller is the test's thread, during a test"""
+        return self.test_costs is not None and threading.get_ident() == self.thread
+
+    def _execute(self, connection, command, params):
+        if not self._measured():
+            return _original_execute(connection, command, params)
+        self.test_commands[command] += 1
+        self.command_counts[command] += 1
+        if self.wait_depth:
+            return _original_execute(connection, command, params)
+
+        stack = self._stack()
+        start = time.perf_counter()
+        try:
+            return _original_execute(connection, command, params)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            if command in FIND_COMMANDS and elapsed > IMPLICIT_WAIT_THRESHOLD_MS:
+                self._charge("implicit_wait", elapsed, stack)
+            else:
+                self._charge(f"webdriver:{command}", elapsed, stack)
+
+    def _sleep(self, seconds):
+        if not self._measured() or self.wait_depth:
+            return _original_sleep(seconds)
+        stack = self._stack()
+        start = time.perf_counter()
+        try:
+            return _original_sleep(seconds)
+        finally:
+            self._charge("sleep", (time.perf_counter() - start) * 1000, stack)
+
+    def _wrap_wait(self, original):
+        profiler = self
+
+        def wrapper(wait, *args, **kwargs):
+            if not profiler._measured() or profiler.wait_depth:
+                return original(wait, *args, **kwargs)
+            stack = profiler._stack()
+            profiler.wait_depth += 1
+            start = time.perf_counter()
+            try:
+                return original(wait, *args, **kwargs)
+            finally:
+                profiler.wait_depth -= 1
+                profiler._charge("wait", (time.perf_counter() - start) * 1000, stack)
+        return wrapper
+
+    def install(self):
+        """Patch the WebDriver transport, explicit waits and time.sleep"""
+        if self.installed:
+            return
+        profiler = self
+        RemoteConnection.execute = lambda conn, command, params: profiler._execute(conn, command, params)
+        WebDriverWait.until = self._wrap_wait(_original_until)
+        WebDriverWait.until_not = self._wrap_wait(_original_until_not)
+        time.sleep = self._sleep
+        self.installed = True
+
+    def uninstall(self):
+        RemoteConnection.execute = _original_execute
+        WebDriverWait.until = _original_until
+        WebDriverWait.until_not = _original_until_not
+        time.sleep = _original_sleep
+        self.installed = False
+
+    # ---------- per test ----------
+
+    def start_test(self, nodeid):
+        self.test = nodeid
+        self.thread = threading.get_ident()
+        self.test_costs = Counter()
+        self.test_commands = Counter()
+        self._test_start = time.perf_counter()
+
+    def usage(self):
+        """WebDriver commands and hard sleep (ms) so far in the current test"""
+        if self.test_costs is None:
+            return 0, 0.0
+        return sum(self.test_commands.values()), self.test_costs["sleep"]
+
+    def finish_test(self):
+        """Close the current test, return (costs by category in ms, command counts)"""
+        if self.test_costs is None:
+            return Counter(), Counter()
+        wall = (time.perf_counter() - self._test_start) * 1000
+        costs, commands = self.test_costs, self.test_commands
+        accounted = sum(costs.values())
+        costs["python"] = max(0.0, wall - accounted)
+        self.folded[f"{self.test.split('::')[-1]};python"] += costs["python"]
+        self.by_function["<python overhead>"]["python"] += costs["python"]
+        self.totals.update(costs)
+        self.test = self.thread = self.test_costs = self.test_commands = None
+        return costs, commands
+
+    # ---------- reporting ----------
+
+    def write_folded(self, path=FOLDED_PATH):
+        """Write collapsed stacks (weights in ms) for flame graph tools"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            for stack, ms in sorted(self.folded.items()):
+                f.write(f"{stack} {int(round(ms))}\n")
+        return path
+
+    def summary(self, top=15):
+        """Suite-wide breakdown and the costliest harness functions"""
+        total = sum(self.totals.values()) or 1
+        lines = ["Harness time breakdown:"]
+        grouped = Counter()
+        for category, ms in self.totals.items():
+            grouped[category.split(":")[0]] += ms
+        for category, ms in grouped.most_common():
+            lines.append(f"  {category:<15} {ms / 1000:>8.1f}s  {ms / total * 100:>5.1f}%")
+
+        lines.append("Slowest WebDriver commands (outside waits):")
+        commands = Counter({k.split(":", 1)[1]: v for k, v in self.totals.items()
+                            if k.startswith("webdriver:")})
+        for command, ms in commands.most_common(8):
+            lines.append(f"  {command:<25} {ms / 1000:>8.1f}s  x{self.command_counts[command]}")
+
+        lines.append(f"Costliest harness functions (top {top}):")
+        ranked = sorted(self.by_function.items(), key=lambda kv: sum(kv[1].values()), reverse=True)
+        for function, costs in ranked[:top]:
+            breakdown = ", ".join(f"{c} {ms / 1000:.1f}s" for c, ms in costs.most_common(3))
+            lines.append(f"  {function:<50} {sum(costs.values()) / 1000:>8.1f}s  ({breakdown})")
+        return "\n".join(lines)
+
+
+# Shared profiler for the whole pytest session
+profiler = HarnessProfiler()
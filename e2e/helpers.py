@@ -1,12 +1,97 @@
 """Helper functions for E2E tests"""
 
 import time
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from webdriver_manager.chrome import ChromeDriverManager
 from config import DEFAULT_TIMEOUT, LONG_TIMEOUT, SHORT_TIMEOUT
+from perf import recorder, install_long_task_observer
+from synthetic_input import insert_text, scroll_into_view
+
+
+# Routes hub filter toggle: the button holding the "tune" Material icon
+TUNE_BUTTON = "//button[.//span[contains(@class, 'material-symbols-outlined') and normalize-space() = 'tune']]"
+
+
+def create_chrome_driver(log_api_calls=None):
+    """Create a Chrome WebDriver configured for the E2E suites
+
+    log_api_calls installs the API request log (api_calls.py) in its pages,
+    by default when API_CALL_LOG or PAYLOAD_FIELDS is set.
+    """
+    from config import (
+        HEADLESS, WINDOW_WIDTH, WINDOW_HEIGHT, PERF_TRACE, NETWORK_PROFILE, DEVICE_PROFILE,
+        API_CALL_LOG, PAYLOAD_FIELDS, ANALYTICS_EVENTS,
+    )
+
+    chrome_options = Options()
+
+    if HEADLESS:
+        chrome_options.add_argument("--headless")
+
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument(f"--window-size={WINDOW_WIDTH},{WINDOW_HEIGHT}")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+
+    if PERF_TRACE:
+        from tracing import enable_tracing
+        enable_tracing(chrome_options)
+
+    # Create driver using webdriver-manager
+    service = Service(ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+
+    # Set implicit wait
+    driver.implicitly_wait(5)
+
+    if PERF_TRACE:
+        from tracing import TraceBuffer
+        recorder.tracer = TraceBuffer(driver)
+
+    if NETWORK_PROFILE:
+        from network import conditioner_for
+        conditioner_for(driver).apply(NETWORK_PROFILE)
+
+    if DEVICE_PROFILE:
+        from devices import apply_device
+        apply_device(driver, DEVICE_PROFILE)
+
+    install_long_task_observer(driver)
+
+    if log_api_calls is None:
+        log_api_calls = API_CALL_LOG or PAYLOAD_FIELDS
+    # The fetch wrapper parses and gzips every response: off unless asked for, so timings stay unbiased
+    recorder.api_calls = None
+    if log_api_calls:
+        from api_calls import ApiCallLog
+        recorder.api_calls = ApiCallLog(driver)
+
+    recorder.analytics = None
+    if ANALYTICS_EVENTS:
+        from analytics_events import AnalyticsLog
+        recorder.analytics = AnalyticsLog(driver)
+
+    return driver
+
+
+def first_route():
+    """First route the routes hub lists, from the API: route cards open the detail page from JS, not a link"""
+    from api_client import ApiClient
+    from config import ADMIN_EMAIL, ADMIN_PASSWORD
+
+    with ApiClient(pool_size=1) as api:
+        api.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)
+        routes = api.routes.list()["data"]
+    assert routes, "The database has no route to open"
+    return routes[0]
 
 
 class PageHelpers:
@@ -62,9 +147,7 @@ class PageHelpers:
     def type_text(self, by, value, text, clear=True, timeout=DEFAULT_TIMEOUT):
         """Wait for input and type text"""
         element = self.wait_for_element(by, value, timeout)
-        if clear:
-            element.clear()
-        element.send_keys(text)
+        insert_text(self.driver, element, text, clear=clear)
         return element
 
     def element_exists(self, by, value, timeout=SHORT_TIMEOUT):
@@ -82,8 +165,7 @@ class PageHelpers:
 
     def scroll_to_element(self, element):
         """Scroll element into view"""
-        self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-        time.sleep(0.3)
+        scroll_into_view(self.driver, element)
 
     def take_screenshot(self, name):
         """Take a screenshot"""
@@ -106,15 +188,9 @@ class AuthHelpers:
         # Wait for login form to load
         time.sleep(0.5)
 
-        # Find and fill email input
-        email_input = self.helpers.wait_for_element(By.CSS_SELECTOR, "input[type='email']")
-        email_input.clear()
-        email_input.send_keys(email)
-
-        # Find and fill password input
-        password_input = self.helpers.wait_for_element(By.CSS_SELECTOR, "input[type='password']")
-        password_input.clear()
-        password_input.send_keys(password)
+        # Find and fill email and password inputs
+        self.helpers.type_text(By.CSS_SELECTOR, "input[type='email']", email)
+        self.helpers.type_text(By.CSS_SELECTOR, "input[type='password']", password)
 
         # Click login button
         login_btn = self.helpers.wait_for_clickable(By.CSS_SELECTOR, "button[type='submit']")
@@ -158,21 +234,14 @@ class AuthHelpers:
         # Wait for register form to load
         time.sleep(0.5)
 
-        # Find and fill name input
-        name_input = self.helpers.wait_for_element(By.CSS_SELECTOR, "input[type='text']")
-        name_input.clear()
-        name_input.send_keys(name)
-
-        # Find and fill email input
-        email_input = self.helpers.wait_for_element(By.CSS_SELECTOR, "input[type='email']")
-        email_input.clear()
-        email_input.send_keys(email)
+        # Find and fill name and email inputs
+        self.helpers.type_text(By.CSS_SELECTOR, "input[type='text']", name)
+        self.helpers.type_text(By.CSS_SELECTOR, "input[type='email']", email)
 
         # Find and fill password inputs
         password_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='password']")
         for pwd_input in password_inputs:
-            pwd_input.clear()
-            pwd_input.send_keys(password)
+            insert_text(self.driver, pwd_input, password)
 
         # Click register button
         register_btn = self.helpers.wait_for_clickable(By.CSS_SELECTOR, "button[type='submit']")
@@ -192,39 +261,59 @@ class NavigationHelpers:
         self.driver = driver
         self.helpers = page_helpers
 
+    def _navigate(self, path, page):
+        """Load a page and record its timings"""
+        from config import BASE_URL
+        with recorder.step(f"nav:{page}"):
+            self.driver.get(f"{BASE_URL}{path}")
+            self.helpers.wait_for_loading_to_finish()
+        recorder.capture_page_vitals(self.driver, page)
+        recorder.capture_api_latencies(self.driver)
+
+    def navigate_in_app(self, path, page):
+        """Client-side navigation without a page reload, like following an in-app link"""
+        with recorder.step(f"spa:{page}"):
+            self.driver.execute_script(
+                "window.history.pushState({}, '', arguments[0]);"
+                "window.dispatchEvent(new PopStateEvent('popstate'));",
+                path,
+            )
+            # Checked in the page: find_element would sit out the implicit wait when no spinner exists
+            WebDriverWait(self.driver, LONG_TIMEOUT, poll_frequency=0.05).until(
+                lambda d: d.execute_script(
+                    "return ![...document.querySelectorAll('.animate-spin')]"
+                    ".some(e => e.getClientRects().length > 0);"
+                )
+            )
+
     def go_to_routes(self):
         """Navigate to routes hub"""
-        from config import BASE_URL
-        self.driver.get(f"{BASE_URL}/routes")
-        self.helpers.wait_for_loading_to_finish()
+        self._navigate("/routes", "routes")
         print("Navigated to Routes Hub")
 
+    def go_to_route(self, route_id):
+        """Navigate to a route detail page"""
+        self._navigate(f"/routes/{route_id}", "route_detail")
+        print("Navigated to Route detail")
+
     def go_to_leaderboard(self):
         """Navigate to leaderboard"""
-        from config import BASE_URL
-        self.driver.get(f"{BASE_URL}/leaderboard")
-        self.helpers.wait_for_loading_to_finish()
+        self._navigate("/leaderboard", "leaderboard")
         print("Navigated to Leaderboard")
 
     def go_to_friends(self):
         """Navigate to friends page"""
-        from config import BASE_URL
-        self.driver.get(f"{BASE_URL}/friends")
-        self.helpers.wait_for_loading_to_finish()
+        self._navigate("/friends", "friends")
         print("Navigated to Friends")
 
     def go_to_admin(self):
         """Navigate to admin page (admin only)"""
-        from config import BASE_URL
-        self.driver.get(f"{BASE_URL}/admin")
-        self.helpers.wait_for_loading_to_finish()
+        self._navigate("/admin", "admin")
         print("Navigated to Admin")
 
     def go_to_dashboard(self):
         """Navigate to dashboard"""
-        from config import BASE_URL
-        self.driver.get(BASE_URL)
-        self.helpers.wait_for_loading_to_finish()
+        self._navigate("", "dashboard")
         print("Navigated to Dashboard")
 
     def click_bottom_nav(self, icon_name):
@@ -0,0 +1,458 @@
+"""
+Vectorized reference implementation of the leaderboard scoring
+
+Re-implements the rules of apps/api/src/routes/leaderboard.ts with NumPy,
+computing every user's points, totals and max difficulty in one pass over
+all validations:
+- points: sum over VALIDE validations of round(DIFFICULTY_POINTS[difficulty]
+  * getAttemptsMultiplier(attempts))
+- max difficulty: hardest difficulty with 3+ VALIDE validations
+- period: validations since now - 7/30/365 days (the friends leaderboard
+  has no "year", any other period means all time)
+
+It serves as an oracle for GET /api/leaderboard and /api/leaderboard/friends
+(every returned entry is checked against it, including the API's ordering
+and currentUser quirks), and as a baseline: the API computes points for 20
+users per request, the vectorized pass scores everyone at once.
+
+Usage:
+    python leaderboard_oracle.py --seed          # Insert synthetic users, routes and validations first
+    python leaderboard_oracle.py                 # Check the API against the oracle and time both
+    python leaderboard_oracle.py --synthetic     # Time the vectorized pass alone at LEADERBOARD_BENCH_SIZES
+    python leaderboard_oracle.py --cleanup       # Remove the synthetic data
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from api_client import ApiClient
+from bench import BenchSamples, save_bench_run
+from config import (
+    API_URL,
+    BASE_URL,
+    ADMIN_EMAIL,
+    ADMIN_PASSWORD,
+    LEADERBOARD_SEED_USERS,
+    LEADERBOARD_SEED_ROUTES,
+    LEADERBOARD_SEED_VALIDATIONS,
+    LEADERBOARD_SEED_FRIENDS,
+    LEADERBOARD_BENCH_SIZES,
+    LEADERBOARD_API_REPEATS,
+)
+from db import connect
+from perf_stats import median
+
+
+SEED_PREFIX = "LB bench"
+SEED_EMAIL_DOMAIN = "leaderboard.bench"
+
+# Same tables as leaderboard.ts
+DIFFICULTY_ORDER = [
+    "Vert", "Vert clair", "Bleu clair", "Bleu foncé", "Violet",
+    "Rose", "Rouge", "Orange", "Jaune", "Blanc", "Gris", "Noir",
+]
+DIFFICULTY_POINTS = np.array([10, 15, 23, 34, 51, 75, 112, 169, 255, 386, 570, 855], dtype=np.float64)
+PERIOD_DAYS = {"week": 7, "month": 30, "year": 365}
+FRIENDS_PERIOD_DAYS = {"week": 7, "month": 30}
+MAX_DIFFICULTY_MIN_VALIDATIONS = 3
+
+
+class Dataset:
+    """All validations as parallel arrays, users and difficulties as integer codes"""
+
+    def __init__(self, user_ids, user_idx, difficulty_idx, valide, attempts, flashed, validated_at):
+        self.user_ids = user_ids              # code -> user id
+        self.user_idx = user_idx              # per validation
+        self.difficulty_idx = difficulty_idx  # index in DIFFICULTY_ORDER
+        self.valide = valide
+        self.attempts = attempts
+        self.flashed = flashed
+        self.validated_at = validated_at      # epoch seconds (UTC)
+        self.index = {u: i for i, u in enumerate(user_ids)}
+
+    def __len__(self):
+        return len(self.user_idx)
+
+    @classmethod
+    def from_db(cls, conn):
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT v.user_id, r.difficulty::text, v.status = 'VALIDE', v.attempts, v.is_flashed, "
+                "extract(epoch from v.validated_at) "
+                "FROM validations v JOIN routes r ON r.id = v.route_id"
+            )
+            rows = cur.fetchall()
+        if not rows:
+            empty = np.array([], dtype=np.int64)
+            return cls(np.array([], dtype=object), empty, empty, empty.astype(bool), empty,
+                       empty.astype(bool), empty.astype(np.float64))
+        users, difficulties, valide, attempts, flashed, validated_at = zip(*rows)
+        user_ids, user_idx = np.unique(np.array(users, dtype=object), return_inverse=True)
+        names, codes = np.unique(np.array(difficulties, dtype=object), return_inverse=True)
+        order = np.array([DIFFICULTY_ORDER.index(n) for n in names])
+        return cls(
+            user_ids, user_idx, order[codes],
+            np.array(valide, dtype=bool),
+            np.array([a or 0 for a in attempts], dtype=np.int64),
+            np.array(flashed, dtype=bool),
+            np.array(validated_at, dtype=np.float64),
+        )
+
+    @classmethod
+    def synthetic(cls, validations, users=None, seed=0):
+        """Random validations shaped like a gym: few strong climbers, most on easy grades"""
+        rng = np.random.default_rng(seed)
+        users = users or max(100, validations // 200)
+        # Activity follows a long tail, difficulty a skewed distribution over the 12 colors
+        user_idx = np.minimum(rng.zipf(1.3, validations), users) - 1
+        difficulty_idx = np.minimum(rng.geometric(0.3, validations) - 1, len(DIFFICULTY_ORDER) - 1)
+        attempts = rng.geometric(0.4, validations)
+        now = time.time()
+        return cls(
+            np.array([f"user-{i}" for i in range(users)], dtype=object),
+            user_idx, difficulty_idx,
+            rng.random(validations) < 0.85,
+            attempts,
+            attempts == 1,
+            now - rng.random(validations) * 400 * 86400,
+        )
+
+
+def attempts_multiplier(attempts):
+    """getAttemptsMultiplier over an array (attempts 0/null count as 1)"""
+    attempts = np.where(attempts == 0, 1, attempts)
+    return np.select(
+        [attempts == 1, attempts == 2, attempts == 3, attempts == 4, attempts == 5, attempts == 6],
+        [1.3, 1.2, 1.1, 1.0, 0.9, 0.8],
+        default=0.7,
+    )
+
+
+def score(data, since=None):
+    """Per user code: points, VALIDE and flashed counts, any validation, max difficulty (-1 = none)"""
+    n_users = len(data.user_ids)
+    in_period = np.ones(len(data), dtype=bool) if since is None else data.validated_at >= since
+    counted = in_period & data.valide
+
+    # Math.round rounds halves up, unlike np.round
+    points = np.floor(DIFFICULTY_POINTS[data.difficulty_idx] * attempts_multiplier(data.attempts) + 0.5)
+    total_points = np.bincount(data.user_idx[counted], weights=points[counted], minlength=n_users)
+
+    levels = len(DIFFICULTY_ORDER)
+    per_level = np.bincount(
+        data.user_idx[counted] * levels + data.difficulty_idx[counted], minlength=n_users * levels
+    ).reshape(n_users, levels) >= MAX_DIFFICULTY_MIN_VALIDATIONS
+    max_difficulty = np.where(per_level.any(axis=1), levels - 1 - np.argmax(per_level[:, ::-1], axis=1), -1)
+
+    return {
+        "points": total_points.astype(np.int64),
+        "validations": np.bincount(data.user_idx[counted], minlength=n_users),
+        "flashed": np.bincount(data.user_idx[in_period & data.flashed], minlength=n_users),
+        "active": np.bincount(data.user_idx[in_period], minlength=n_users) > 0,
+        "has_points": np.bincount(data.user_idx[counted], minlength=n_users) > 0,
+        "max_difficulty": max_difficulty,
+    }
+
+
+def since_for(period, now, days=PERIOD_DAYS):
+    return now - days[period] * 86400 if period in days else None
+
+
+def ranking(scores):
+    """Every active user code, by points (the full leaderboard the API never computes)"""
+    active = np.flatnonzero(scores["active"])
+    return active[np.argsort(-scores["points"][active], kind="stable")]
+
+
+def _entry_mismatches(data, scores, entry, where):
+    code = data.index.get(entry["userId"])
+    if code is None:
+        return [f"{where}: user {entry['userId']} has no validations"]
+    expected = {
+        "totalPoints": int(scores["points"][code]),
+        "totalValidations": int(scores["validations"][code]),
+        "totalFlashed": int(scores["flashed"][code]),
+        "maxDifficulty": DIFFICULTY_ORDER[scores["max_difficulty"][code]] if scores["max_difficulty"][code] >= 0 else None,
+    }
+    return [
+        f"{where}: {entry.get('name') or entry['userId']} {field} is {entry.get(field)!r}, expected {value!r}"
+        for field, value in expected.items() if entry.get(field) != value
+    ]
+
+
+def _ordered_by_points(entries, where):
+    return [
+        f"{where}: rank {b['rank']} has more points ({b['totalPoints']}) than rank {a['rank']} ({a['totalPoints']})"
+        for a, b in zip(entries, entries[1:]) if b["totalPoints"] > a["totalPoints"]
+    ]
+
+
+def check_global(data, scores, response, user_id, limit):
+    """Mismatches between GET /api/leaderboard and the oracle"""
+    where = "leaderboard"
+    entries = response["leaderboard"]
+    problems = []
+    for entry in entries:
+        problems += _entry_mismatches(data, scores, entry, where)
+    problems += _ordered_by_points(entries, where)
+
+    # The API keeps the `limit` users with the most VALIDE validations; ties at the cut are arbitrary
+    active = np.flatnonzero(scores["active"])
+    if len(entries) != min(limit, len(active)):
+        problems.append(f"{where}: {len(entries)} entries, expected {min(limit, len(active))}")
+    returned = {data.index[e["userId"]] for e in entries if e["userId"] in data.index}
+    left_out = [c for c in active if c not in returned]
+    if returned and left_out:
+        cut = min(scores["validations"][c] for c in returned)
+        best_left = max(scores["validations"][c] for c in left_out)
+        if best_left > cut:
+            problems.append(f"{where}: a user with {best_left} validations is missing, last kept has {cut}")
+
+    # currentUser.rank only counts the returned users plus the current user, those with points
+    me = data.index.get(user_id)
+    my_points = int(scores["points"][me]) if me is not None else 0
+    pool = returned | ({me} if me is not None else set())
+    points = sorted((int(scores["points"][c]) for c in pool if scores["has_points"][c]), reverse=True)
+    rank = next((i + 1 for i, p in enumerate(points) if p <= my_points), len(points) + 1)
+    listed = next((e for e in entries if e["userId"] == user_id), None)
+    expected_me = {
+        "rank": rank,
+        "totalPoints": my_points,
+        "totalValidations": listed["totalValidations"] if listed else 0,
+        "maxDifficulty": DIFFICULTY_ORDER[scores["max_difficulty"][me]]
+        if me is not None and scores["max_difficulty"][me] >= 0 else None,
+    }
+    current = response["currentUser"]
+    problems += [
+        f"{where}: currentUser.{field} is {current.get(field)!r}, expected {value!r}"
+        for field, value in expected_me.items() if current.get(field) != value
+    ]
+    return problems
+
+
+def check_friends(data, scores, response, user_id, friend_ids):
+    """Mismatches between GET /api/leaderboard/friends and the oracle"""
+    where = "friends"
+    entries = response["leaderboard"]
+    problems = []
+    for entry in entries:
+        problems += _entry_mismatches(data, scores, entry, where)
+        if entry.get("isCurrentUser") != (entry["userId"] == user_id):
+            problems.append(f"{where}: isCurrentUser wrong for {entry['userId']}")
+    problems += _ordered_by_points(entries, where)
+
+    members = {user_id, *friend_ids}
+    expected = {u for u in members if u in data.index and scores["active"][data.index[u]]}
+    returned = {e["userId"] for e in entries}
+    if returned != expected:
+        problems.append(f"{where}: {len(returned - expected)} unexpected and {len(expected - returned)} "
+                        f"missing users")
+    me = data.index.get(user_id)
+    rank = next((e["rank"] for e in entries if e["userId"] == user_id), len(entries) + 1)
+    if response["currentUser"].get("rank") != rank:
+        problems.append(f"{where}: currentUser.rank is {response['currentUser'].get('rank')}, expected {rank}")
+    my_points = int(scores["points"][me]) if me is not None else 0
+    if response["currentUser"].get("totalPoints") != my_points:
+        problems.append(f"{where}: currentUser.totalPoints is {response['currentUser'].get('totalPoints')}, "
+                        f"expected {my_points}")
+    return problems
+
+
+def friend_ids_of(conn, user_id):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT CASE WHEN requester_id = %(u)s THEN addressee_id ELSE requester_id END "
+            "FROM friendships WHERE status = 'ACCEPTED' AND (requester_id = %(u)s OR addressee_id = %(u)s)",
+            {"u": user_id},
+        )
+        return [r[0] for r in cur.fetchall()]
+
+
+def time_vectorized(data, periods=("all", "week", "month", "year"), repeats=5):
+    """Median ms of scoring and ranking every user, per period"""
+    timings = {}
+    for period in periods:
+        runs = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            ranking(score(data, since_for(period, time.time())))
+            runs.append((time.perf_counter() - start) * 1000)
+        timings[period] = median(runs)
+    return timings
+
+
+def check_api(conn, repeats=LEADERBOARD_API_REPEATS, limit=20):
+    """Compare every period of both endpoints with the oracle, return (problems, samples)"""
+    load_start = time.perf_counter()
+    data = Dataset.from_db(conn)
+    load_ms = (time.perf_counter() - load_start) * 1000
+    print(f"{len(data)} validations of {len(data.user_ids)} users loaded in {load_ms:.0f}ms")
+
+    problems, samples = [], BenchSamples("leaderboard_oracle.py")
+    record = samples.record
+
+    with ApiClient(API_URL, BASE_URL, pool_size=1) as api:
+        user_id = api.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)["id"]
+        friend_ids = friend_ids_of(conn, user_id)
+        vectorized = time_vectorized(data)
+
+        print(f"\n{'endpoint':<34}{'API p50':>10}{'oracle':>10}{'users':>8}  result")
+        for endpoint, days in (("/api/leaderboard", PERIOD_DAYS), ("/api/leaderboard/friends", FRIENDS_PERIOD_DAYS)):
+            for period in ("all", "week", "month", "year"):
+                params = {"period": period, "limit": limit} if endpoint == "/api/leaderboard" else {"period": period}
+                api.request("GET", endpoint, params=params)  # warm-up
+                timings, response = [], None
+                for _ in range(repeats):
+                    requested_at = datetime.now(timezone.utc).timestamp()
+                    r = api.request("GET", endpoint, params=params)
+                    timings.append(r.elapsed_ms)
+                    response = r.json()["data"]
+                scores = score(data, since_for(period, requested_at, days))
+                if endpoint == "/api/leaderboard":
+                    found = check_global(data, scores, response, user_id, limit)
+                else:
+                    found = check_friends(data, scores, response, user_id, friend_ids)
+                problems += [f"period={period} {p}" for p in found]
+                name = f"{endpoint}?period={period}"
+                print(f"{name:<34}{median(timings):>8.1f}ms{vectorized[period]:>8.1f}ms"
+                      f"{len(response['leaderboard']):>8}  {'OK' if not found else f'{len(found)} mismatches'}")
+                record(f"{name}:api_ms", median(timings))
+        for period, ms in vectorized.items():
+            record(f"vectorized:{period}:ms", ms)
+        print(f"\nThe oracle ranks all {int(score(data)['active'].sum())} active users in "
+              f"{vectorized['all']:.1f}ms; the API scores {limit} per request")
+    return problems, samples
+
+
+def synthetic_benchmark(sizes=LEADERBOARD_BENCH_SIZES):
+    print(f"{'validations':>12}{'users':>8}{'all':>10}{'week':>10}")
+    samples = BenchSamples("leaderboard_oracle.py")
+    for size in sizes:
+        data = Dataset.synthetic(size)
+        timings = time_vectorized(data, periods=("all", "week"))
+        print(f"{size:>12}{len(data.user_ids):>8}{timings['all']:>8.1f}ms{timings['week']:>8.1f}ms")
+        samples.record(f"synthetic:{size}:ms", timings["all"])
+    return samples
+
+
+# ---------- synthetic data in the app database ----------
+
+def seed(conn, users=LEADERBOARD_SEED_USERS, routes=LEADERBOARD_SEED_ROUTES,
+         validations=LEADERBOARD_SEED_VALIDATIONS, friends=LEADERBOARD_SEED_FRIENDS):
+    """Insert climbers, routes and random (user, route) validations over the last 400 days"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM users WHERE email = %s", (ADMIN_EMAIL,))
+        row = cur.fetchone()
+        if not row:
+            raise RuntimeError(f"Admin {ADMIN_EMAIL} not found, seed the app first")
+        admin_id = row[0]
+        cur.execute(
+            "INSERT INTO users (id, email, name, email_verified) "
+            "SELECT gen_random_uuid(), 'climber-' || g || '@' || %(domain)s, %(prefix)s || ' climber ' || g, true "
+            "FROM generate_series(1, %(users)s) g",
+            {"domain": SEED_EMAIL_DOMAIN, "prefix": SEED_PREFIX, "users": users},
+        )
+        cur.execute(
+            """
+            INSERT INTO routes (id, name, difficulty, hold_color_hex, hold_color_category, sector,
+                                opener_id, main_photo, status, opened_at, created_at, updated_at)
+            SELECT gen_random_uuid(), %(prefix)s || ' ' || g,
+                   (enum_range(NULL::difficulty_color))[1 + least(floor(-ln(1 - random()) * 3)::int, 11)],
+                   '#FF5733', 'red', 'Secteur ' || chr(65 + g %% 6), %(opener)s,
+                   '/uploads/routes/bench.jpg', 'ACTIVE', now(), now(), now()
+            FROM generate_series(1, %(routes)s) g
+            """,
+            {"prefix": SEED_PREFIX, "opener": admin_id, "routes": routes},
+        )
+        # Each (user, route) pair at most once, as validations_user_route_unique requires.
+        # The attempts item references u and r: an uncorrelated LATERAL may be evaluated once and
+        # rewound, giving every validation the same attempts and flash flag.
+        cur.execute(
+            """
+            INSERT INTO validations (id, user_id, route_id, validated_at, status, attempts, is_flashed)
+            SELECT gen_random_uuid(), u.id, r.id,
+                   (now() AT TIME ZONE 'UTC') - random() * interval '400 days',
+                   (CASE WHEN random() < 0.85 THEN 'VALIDE' ELSE 'EN_PROJET' END)::validation_status,
+                   a.attempts, a.attempts = 1
+            FROM users u
+            CROSS JOIN routes r
+            CROSS JOIN LATERAL (SELECT 1 + floor(-ln(1 - random()) * 2.5)::int AS attempts
+                                WHERE u.id IS NOT NULL AND r.id IS NOT NULL) a
+            WHERE u.email LIKE %(email)s AND r.name LIKE %(route)s
+              AND random() < %(fraction)s
+            """,
+            {"email": f"%@{SEED_EMAIL_DOMAIN}", "route": f"{SEED_PREFIX} %",
+             "fraction": min(1.0, validations / (users * routes))},
+        )
+        inserted = cur.rowcount
+        cur.execute(
+            "SELECT v.attempts, count(*) FROM validations v JOIN users u ON u.id = v.user_id "
+            "WHERE u.email LIKE %s GROUP BY v.attempts ORDER BY v.attempts",
+            (f"%@{SEED_EMAIL_DOMAIN}",),
+        )
+        spread = cur.fetchall()
+        cur.execute(
+            "INSERT INTO friendships (id, requester_id, addressee_id, status, accepted_at) "
+            "SELECT gen_random_uuid(), %(admin)s, id, 'ACCEPTED', now() FROM users "
+            "WHERE email LIKE %(email)s ORDER BY email LIMIT %(friends)s",
+            {"admin": admin_id, "email": f"%@{SEED_EMAIL_DOMAIN}", "friends": friends},
+        )
+        cur.execute("ANALYZE validations")
+    print(f"Seeded {users} climbers, {routes} routes, {inserted} validations, {friends} friends of the admin")
+    print(f"Attempts per validation: {', '.join(f'{attempts}: {count}' for attempts, count in spread[:8])}"
+          f"{', ...' if len(spread) > 8 else ''}")
+    # Flashes (1 attempt) and several attempt counts exercise the multiplier table and its rounding
+    if len(spread) < 3:
+        print("  Warning: the seeded validations share too few attempt counts to check the scoring")
+
+
+def cleanup(conn):
+    with conn.cursor() as cur:
+        email = f"%@{SEED_EMAIL_DOMAIN}"
+        cur.execute("DELETE FROM friendships WHERE requester_id IN (SELECT id FROM users WHERE email LIKE %(e)s) "
+                    "OR addressee_id IN (SELECT id FROM users WHERE email LIKE %(e)s)", {"e": email})
+        cur.execute("DELETE FROM validations WHERE user_id IN (SELECT id FROM users WHERE email LIKE %s) "
+                    "OR route_id IN (SELECT id FROM routes WHERE name LIKE %s)", (email, f"{SEED_PREFIX} %"))
+        print(f"Removed {cur.rowcount} seeded validations")
+        cur.execute("DELETE FROM routes WHERE name LIKE %s", (f"{SEED_PREFIX} %",))
+        cur.execute("DELETE FROM users WHERE email LIKE %s", (email,))
+        print(f"Removed {cur.rowcount} seeded climbers")
+        cur.execute("ANALYZE validations")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the leaderboard API against a vectorized oracle")
+    parser.add_argument("--seed", action="store_true", help="Insert synthetic climbers and validations first")
+    parser.add_argument("--cleanup", action="store_true", help="Remove the synthetic data and exit")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Only time the vectorized pass on generated data (no database or API)")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    problems = []
+    if args.synthetic:
+        samples = synthetic_benchmark()
+    else:
+        conn = connect()
+        try:
+            if args.cleanup:
+                cleanup(conn)
+                return 0
+            if args.seed:
+                seed(conn)
+            problems, samples = check_api(conn)
+        finally:
+            conn.close()
+
+    for problem in problems:
+        print(f"  MISMATCH {problem}")
+    if not args.no_store and samples:
+        save_bench_run(samples, "leaderboard-oracle")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+"""JS heap and DOM retention sampling through the Chrome DevTools Protocol"""
+
+import math
+import os
+
+from selenium.common.exceptions import WebDriverException
+
+
+HEAP_DIR = os.path.join("reports", "heap")
+
+# Performance.getMetrics name -> sample key
+PERFORMANCE_METRICS = {
+    "JSHeapUsedSize": "js_heap_kb",
+    "Nodes": "dom_nodes",
+    "JSEventListeners": "event_listeners",
+    "Documents": "documents",
+}
+
+
+def detached_node_count(driver):
+    """DOM trees detached from the document but still retained, None if unsupported"""
+    try:
+        result = driver.execute_cdp_cmd("DOM.getDetachedDomNodes", {})
+    except WebDriverException:
+        # DOM.getDetachedDomNodes is experimental and missing from older Chrome
+        return None
+    return len(result.get("detachedNodes", []))
+
+
+def memory_sample(driver):
+    """Heap and DOM counters after a forced garbage collection"""
+    driver.execute_cdp_cmd("HeapProfiler.enable", {})
+    driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+    driver.execute_cdp_cmd("Performance.enable", {})
+    metrics = {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+
+    sample = {key: metrics.get(name, 0) for name, key in PERFORMANCE_METRICS.items()}
+    sample["js_heap_kb"] /= 1024
+    detached = detached_node_count(driver)
+    if detached is not None:
+        sample["detached_nodes"] = detached
+    return sample
+
+
+def take_heap_snapshot(driver, name):
+    """Write a .heapsnapshot (loadable in DevTools > Memory) and return its path"""
+    # Snapshots stream back as events, which execute_cdp_cmd cannot receive
+    import trio
+
+    async def capture():
+        async with driver.bidi_connection() as connection:
+            session, devtools = connection.session, connection.devtools
+            chunks = session.listen(devtools.heap_profiler.AddHeapSnapshotChunk, buffer_size=math.inf)
+            await session.execute(devtools.heap_profiler.enable())
+            await session.execute(devtools.heap_profiler.take_heap_snapshot(report_progress=False))
+            parts = []
+            while True:
+                try:
+                    parts.append(chunks.receive_nowait().chunk)
+                except trio.WouldBlock:
+                    return "".join(parts)
+
+    os.makedirs(HEAP_DIR, exist_ok=True)
+    path = os.path.join(HEAP_DIR, f"{name}.heapsnapshot")
+    with open(path, "w") as f:
+        f.write(trio.run(capture))
+    return path
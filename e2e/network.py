@@ -0,0 +1,101 @@
+"""Network condition emulation through the Chrome DevTools Protocol"""
+
+import threading
+import weakref
+
+from config import NETWORK_PROFILES
+
+
+class NetworkConditioner:
+    """Applies a named profile from NETWORK_PROFILES to one browser"""
+
+    def __init__(self, driver):
+        # Weak so the registry below does not keep quit drivers alive
+        self._driver = weakref.ref(driver)
+        self.profile = None
+        self._stop = None
+        self._thread = None
+
+    @property
+    def driver(self):
+        return self._driver()
+
+    def _emulate(self, offline, latency=0, download_kbps=None, upload_kbps=None):
+        self.driver.execute_cdp_cmd("Network.emulateNetworkConditions", {
+            "offline": offline,
+            "latency": latency,
+            # CDP expects bytes per second, -1 disables throttling
+            "downloadThroughput": download_kbps * 125 if download_kbps else -1,
+            "uploadThroughput": upload_kbps * 125 if upload_kbps else -1,
+        })
+
+    def apply(self, name):
+        """Switch to a named profile (None restores the real network)"""
+        self._stop_bursts()
+        if name is None:
+            self.clear()
+            return
+        if name not in NETWORK_PROFILES:
+            raise ValueError(f"Unknown network profile '{name}' (known: {', '.join(NETWORK_PROFILES)})")
+
+        settings = NETWORK_PROFILES[name]
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self._emulate(False, settings["latency"], settings["download_kbps"], settings["upload_kbps"])
+        self.profile = name
+        if settings.get("loss_burst_every"):
+            self._start_bursts(settings)
+        print(f"  Network profile: {name}")
+
+    def clear(self):
+        """Remove any emulation"""
+        self._stop_bursts()
+        if self.profile is not None:
+            self._emulate(False)
+            self.profile = None
+
+    def _start_bursts(self, settings):
+        """Periodically drop the connection to imitate packet-loss bursts
+
+        The packetLoss parameter of Network.emulateNetworkConditions only
+        applies to WebRTC, so loss on fetch/XHR is toggled from a thread. Its
+        commands are not charged to the test: harness_profile only measures
+        the test's own thread, which webdriver_budget counts from.
+        """
+        stop = threading.Event()
+
+        def run():
+            # Event.wait so that _stop_bursts interrupts a pause at once
+            while not stop.wait(settings["loss_burst_every"]):
+                try:
+                    self._emulate(True)
+                    if stop.wait(settings["loss_burst_ms"] / 1000):
+                        break
+                    self._emulate(False, settings["latency"],
+                                  settings["download_kbps"], settings["upload_kbps"])
+                except Exception:
+                    # Browser went away mid-burst
+                    break
+
+        self._stop = stop
+        self._thread = threading.Thread(target=run, name="network-loss-bursts", daemon=True)
+        self._thread.start()
+
+    def _stop_bursts(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._thread.join()
+            self._stop = self._thread = None
+            if self.profile is not None:
+                settings = NETWORK_PROFILES[self.profile]
+                self._emulate(False, settings["latency"],
+                              settings["download_kbps"], settings["upload_kbps"])
+
+
+_conditioners = weakref.WeakKeyDictionary()
+
+
+def conditioner_for(driver):
+    """The NetworkConditioner attached to a driver"""
+    if driver not in _conditioners:
+        _conditioners[driver] = NetworkConditioner(driver)
+    return _conditioners[driver]
@@ -0,0 +1,233 @@
+"""Performance timing capture for E2E tests"""
+
+import re
+import time
+from contextlib import contextmanager
+
+from config import API_URL, STEP_BUDGETS, LONG_TASK_MS
+
+
+# Path segments that look like database ids (cuid, uuid, numeric)
+ID_SEGMENT = re.compile(r"^(?=.*\d)[0-9a-zA-Z_-]{8,}$|^\d+$")
+
+
+def normalize_api_path(url):
+    """Turn an API URL into a stable endpoint key (no host, query or ids)"""
+    path = url.split("://", 1)[-1]
+    path = "/" + path.split("/", 1)[1] if "/" in path else "/"
+    path = path.split("?", 1)[0].split("#", 1)[0]
+    segments = [":id" if ID_SEGMENT.match(s) else s for s in path.split("/")]
+    return "/".join(segments) or "/"
+
+
+# Collects long tasks into window.__perfLongTasks as [startTime, duration]
+LONG_TASK_OBSERVER = """
+if (!window.__perfLongTasks) {
+    window.__perfLongTasks = [];
+    try {
+        new PerformanceObserver(list => {
+            for (const e of list.getEntries()) window.__perfLongTasks.push([e.startTime, e.duration]);
+        }).observe({type: 'longtask', buffered: true});
+    } catch (e) {}
+}
+"""
+
+
+def install_long_task_observer(driver):
+    """Observe long tasks in the current page and every page loaded after it"""
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": LONG_TASK_OBSERVER})
+    driver.execute_script(LONG_TASK_OBSERVER)
+
+
+def step_budget(name):
+    """Budget (ms) of a step from its prefix, None if unbudgeted"""
+    return STEP_BUDGETS.get(name.split(":", 1)[0])
+
+
+class PerfRecorder:
+    """Collects timing samples (ms) for the current test session"""
+
+    def __init__(self):
+        self.samples = []
+        self.artifacts = {}
+        self.current_test = None
+        self.tracer = None
+        self.statements = None
+        self.api_calls = None
+        self.analytics = None
+
+    def record(self, kind, name, value, test=None):
+        """Record a single sample"""
+        self.samples.append({
+            "test": test or self.current_test or "<session>",
+            "kind": kind,
+            "name": name,
+            "value": float(value),
+        })
+
+    def attach(self, name, path, test=None):
+        """Attach a file (trace, snapshot...) to a test's report entry"""
+        test = test or self.current_test or "<session>"
+        self.artifacts.setdefault(test, []).append((name, path))
+
+    @contextmanager
+    def step(self, name, budget=None):
+        """Time a block of test code as a named step"""
+        if self.tracer:
+            self.tracer.drain()
+        before = self.statements.snapshot() if self.statements else None
+        if self.api_calls:
+            pending = self.api_calls.drain()
+            if pending:
+                self.api_calls.add_step("(outside steps)", pending)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.record("step", name, elapsed)
+            if before is not None:
+                self._record_statements(name, before)
+            if self.api_calls:
+                calls = self.api_calls.drain()
+                self.api_calls.add_step(name, calls)
+                self.record("api_calls", f"{name}:requests", len(calls))
+                self.record("payload", f"{name}:kb", sum(c.get("bytes") or 0 for c in calls) / 1024)
+            if budget is None:
+                budget = step_budget(name)
+            if budget is not None and elapsed > budget:
+                self.budget_exceeded(name, elapsed, budget)
+
+    def _record_statements(self, name, before):
+        """SQL the step caused, kept for the test's statements report"""
+        statements = self.statements.delta(before, self.statements.snapshot())
+        self.statements.add_step(name, statements)
+        self.record("db", f"{name}:queries", sum(s["calls"] for s in statements))
+        self.record("db", f"{name}:db_time", sum(s["ms"] for s in statements))
+
+    @contextmanager
+    def interaction(self, driver, name):
+        """Time an interaction and record the main-thread blocking it caused"""
+        start = self._page_now(driver)
+        with self.step(f"interaction:{name}"):
+            yield
+        end = self._page_now(driver)
+        if end is None:
+            return
+        if start is None or start > end:
+            # The interaction loaded a new document
+            start = 0
+        try:
+            tasks = driver.execute_script(
+                "return (window.__perfLongTasks || [])"
+                ".filter(t => t[0] + t[1] >= arguments[0] && t[0] <= arguments[1]);",
+                start, end,
+            )
+        except Exception as e:
+            print(f"  Could not read long tasks: {e}")
+            return
+        durations = [duration for _, duration in tasks]
+        blocking = sum(max(0, d - LONG_TASK_MS) for d in durations)
+        self.record("main_thread", f"{name}:total_blocking_time", blocking)
+        self.record("main_thread", f"{name}:long_tasks", len(durations))
+        self.record("main_thread", f"{name}:longest_task", max(durations, default=0))
+        print(f"  {name}: TBT {blocking:.0f}ms, {len(durations)} long task(s)")
+
+    @staticmethod
+    def _page_now(driver):
+        try:
+            return driver.execute_script("return performance.now();")
+        except Exception:
+            return None
+
+    def budget_exceeded(self, name, elapsed, budget):
+        """Report a slow step, keeping its trace when tracing is on"""
+        print(f"  [SLOW] {name} took {elapsed:.0f}ms (budget {budget}ms)")
+        if self.tracer:
+            path = self.tracer.flush(f"{self.current_test}_{name}")
+            self.attach(f"trace {name} ({elapsed:.0f}ms)", path)
+
+    def capture_page_vitals(self, driver, page):
+        """Record navigation and paint timings of the last full page load"""
+        try:
+            vitals = driver.execute_script("""
+                const nav = performance.getEntriesByType('navigation')[0];
+                if (!nav) return null;
+                const paint = {};
+                for (const p of performance.getEntriesByType('paint')) {
+                    paint[p.name] = p.startTime;
+                }
+                // API waterfall: from the first request sent to the last response
+                const api = performance.getEntriesByType('resource')
+                    .filter(e => e.name.startsWith(arguments[0]));
+                const apiStart = Math.min(...api.map(e => e.startTime));
+                const apiEnd = Math.max(0, ...api.map(e => e.responseEnd));
+                return {
+                    ttfb: nav.responseStart - nav.requestStart,
+                    dom_content_loaded: nav.domContentLoadedEventEnd,
+                    load: nav.loadEventEnd,
+                    first_paint: paint['first-paint'],
+                    first_contentful_paint: paint['first-contentful-paint'],
+                    // Interactive once the DOM is ready and the data has arrived
+                    tti: Math.max(nav.domContentLoadedEventEnd, apiEnd),
+                    api_wait: api.length ? apiEnd - apiStart : null,
+                    api_requests: api.length,
+                };
+            """, API_URL)
+        except Exception as e:
+            print(f"  Could not read page vitals: {e}")
+            return
+        if not vitals:
+            return
+        for name, value in vitals.items():
+            if value is not None and value > 0:
+                self.record("vital", f"{page}:{name}", value)
+
+    def capture_api_latencies(self, driver):
+        """Record API request durations seen by the page since the last capture"""
+        try:
+            entries = driver.execute_script("""
+                const entries = performance.getEntriesByType('resource')
+                    .filter(e => e.name.startsWith(arguments[0]))
+                    .map(e => [e.name, e.duration]);
+                performance.clearResourceTimings();
+                return entries;
+            """, API_URL)
+        except Exception as e:
+            print(f"  Could not read API timings: {e}")
+            return
+        for url, duration in entries or []:
+            self.record("api", normalize_api_path(url), duration)
+
+
+def split_device(test, devices):
+    """Split a parametrized test id into (test id without the device, device)"""
+    if not test.endswith("]") or "[" not in test:
+        return test, None
+    base, params = test[:-1].split("[", 1)
+    ids = params.split("-")
+    device = next((i for i in ids if i in devices), None)
+    if device is None:
+        return test, None
+    rest = [i for i in ids if i != device]
+    return (f"{base}[{'-'.join(rest)}]" if rest else base), device
+
+
+def device_matrix(samples, devices):
+    """Test durations and step timings side by side per device: {(test, metric): {device: ms}}"""
+    values = {}
+    for s in samples:
+        if s["kind"] not in ("test", "step"):
+            continue
+        test, device = split_device(s["test"], devices)
+        if device is None:
+            continue
+        values.setdefault((test, s["name"]), {}).setdefault(device, []).append(s["value"])
+    return {
+        key: {device: sum(v) / len(v) for device, v in per_device.items()}
+        for key, per_device in sorted(values.items())
+    }
+
+
+# Shared recorder for the whole pytest session
+recorder = PerfRecorder()
@@ -0,0 +1,131 @@
+"""Robust statistics used to compare performance samples"""
+
+import math
+import random
+
+
+# Scale factor making the MAD a consistent estimator of the standard deviation
+MAD_SCALE = 1.4826
+
+
+def median(values):
+    """Median of a non-empty sequence"""
+    ordered = sorted(values)
+    n = len(ordered)
+    mid = n // 2
+    if n % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of a non-empty sequence, linearly interpolated"""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low = math.floor(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def mad(values, center=None):
+    """Median absolute deviation (unscaled)"""
+    if center is None:
+        center = median(values)
+    return median([abs(v - center) for v in values])
+
+
+def robust_z(value, baseline, min_scale=1.0):
+    """How many scaled MADs `value` lies above the baseline median"""
+    center = median(baseline)
+    scale = max(MAD_SCALE * mad(baseline, center), min_scale)
+    return (value - center) / scale
+
+
+def _normal_sf(z):
+    """Survival function of the standard normal distribution"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _ranks(values):
+    """Average ranks (1-based), ties sharing the mean rank"""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def mann_whitney_u(x, y, alternative="greater"):
+    """
+    Mann-Whitney U test of `x` against `y`.
+
+    `alternative` is "greater" (x tends to be larger than y) or
+    "two-sided". Returns (U, p_value) using the normal approximation with
+    tie and continuity corrections.
+    """
+    n1, n2 = len(x), len(y)
+    if not n1 or not n2:
+        return 0.0, 1.0
+
+    combined = list(x) + list(y)
+    ranks = _ranks(combined)
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+
+    n = n1 + n2
+    counts = {}
+    for v in combined:
+        counts[v] = counts.get(v, 0) + 1
+    tie_term = sum(t ** 3 - t for t in counts.values())
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+
+    if alternative == "two-sided":
+        z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+        return u, min(1.0, 2 * _normal_sf(z))
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, _normal_sf(z)
+
+
+def bootstrap_ratio_ci(a, b, confidence=0.95, iterations=2000, seed=0):
+    """
+    Bootstrap confidence interval of median(a) / median(b).
+
+    Returns (ratio, low, high). With `a` the baseline and `b` the candidate,
+    a ratio above 1 means the candidate is faster. All three are NaN when
+    the median of `b` is not positive.
+    """
+    if median(b) <= 0:
+        return float("nan"), float("nan"), float("nan")
+    rng = random.Random(seed)
+    ratios = []
+    for _ in range(iterations):
+        med_b = median(rng.choices(b, k=len(b)))
+        if med_b > 0:
+            ratios.append(median(rng.choices(a, k=len(a))) / med_b)
+    ratios.sort()
+    if not ratios:
+        return float("nan"), float("nan"), float("nan")
+    tail = (1 - confidence) / 2
+    low = ratios[int(tail * (len(ratios) - 1))]
+    high = ratios[int((1 - tail) * (len(ratios) - 1))]
+    return median(a) / median(b), low, high
+
+
+def linear_trend(values):
+    """Least-squares fit of values against their index, returns (slope, intercept)"""
+    n = len(values)
+    if n < 2:
+        return 0.0, values[0] if values else 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    sxx = sum((x - mean_x) ** 2 for x in range(n))
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    slope = sxy / sxx
+    return slope, mean_y - slope * mean_x
@@ -0,0 +1,203 @@
+"""
+Notification polling load model
+
+Every open tab polls the API in the background: NotificationBell asks for
+/api/notifications/unread-count on a timer. This tool:
+1. measures the app's real polling cadence: signs in with Chrome, leaves the
+   dashboard idle for POLLING_LOAD_OBSERVE_S and keeps the requests repeated
+   at a steady interval (api_calls.polling). With --no-browser, or when
+   nothing is detected, POLLING_LOAD_CADENCE is used.
+2. replays that cadence from POLLING_LOAD_CLIENTS idle clients (tabs opened
+   at random times, spread over POLLING_LOAD_ACCOUNTS sessions) for
+   POLLING_LOAD_DURATION seconds
+3. reports sustained requests/s and latency, DB queries/s (pg_stat_statements,
+   else transactions from pg_stat_database) and the API's CPU time (from
+   /proc, for the process listening on the API port or --api-pid), all per
+   1k connected users
+
+Usage:
+    python polling_load.py
+    python polling_load.py --clients 5000 --duration 300 --no-browser
+    python polling_load.py --api-pid 12345     # API not found from its port (other user, container)
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import urllib.parse
+
+from bench import BenchSamples, DbActivity, api_pid, cpu_seconds, save_bench_run
+from bench_users import close_clients, delete_accounts, sign_up_clients
+from config import (
+    LAMBDA_USER_EMAIL,
+    LAMBDA_USER_PASSWORD,
+    POLLING_LOAD_CLIENTS,
+    POLLING_LOAD_ACCOUNTS,
+    POLLING_LOAD_DURATION,
+    POLLING_LOAD_OBSERVE_S,
+    POLLING_LOAD_CADENCE,
+)
+from db import connect
+from perf_stats import percentile
+
+
+BENCH_DOMAIN = "polling.bench"
+
+
+def measure_cadence(observe_s=POLLING_LOAD_OBSERVE_S):
+    """{path: period in s} of the requests an idle, signed-in tab repeats"""
+    from api_calls import polling
+    from helpers import AuthHelpers, PageHelpers, create_chrome_driver
+    from perf import recorder
+
+    driver = create_chrome_driver(log_api_calls=True)
+    try:
+        AuthHelpers(driver, PageHelpers(driver)).login(LAMBDA_USER_EMAIL, LAMBDA_USER_PASSWORD)
+        recorder.api_calls.drain()
+        print(f"Watching an idle tab for {observe_s}s...")
+        time.sleep(observe_s)
+        calls = recorder.api_calls.drain()
+    finally:
+        driver.quit()
+
+    cadence = {}
+    for (method, url), period_ms in polling(calls).items():
+        if method == "GET":
+            parts = urllib.parse.urlsplit(url)
+            cadence[parts.path + (f"?{parts.query}" if parts.query else "")] = period_ms / 1000
+    return cadence
+
+
+# ---------- load ----------
+
+class PollStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = {}
+        self.pending = set()
+
+    def send(self, api, path):
+        """Fire a request without waiting for it, like setInterval does"""
+        task = asyncio.ensure_future(self._request(api, path))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _request(self, api, path):
+        start = time.perf_counter()
+        try:
+            response = await api.request("GET", path)
+        except Exception as e:
+            self.errors[type(e).__name__] = self.errors.get(type(e).__name__, 0) + 1
+            return
+        if response.ok:
+            self.latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            self.errors[str(response.status)] = self.errors.get(str(response.status), 0) + 1
+
+
+async def idle_tab(api, cadence, deadline, stats, rng):
+    """One open tab: each polled path at its period, from a random phase"""
+    loop = asyncio.get_running_loop()
+
+    async def poll(path, period):
+        next_at = loop.time() + rng.uniform(0, period)
+        while next_at < deadline:
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            stats.send(api, path)
+            next_at += period
+
+    await asyncio.gather(*(poll(path, period) for path, period in cadence.items()))
+
+
+async def run(clients, accounts, duration, cadence, pid):
+    accounts = min(accounts, clients)
+    print(f"Signing up {accounts} accounts...")
+    sessions = await sign_up_clients(BENCH_DOMAIN, accounts, pool_size=-(-clients // accounts))
+    db = DbActivity()
+    stats = PollStats()
+    try:
+        rng = random.Random(0)
+        queries_before, cpu_before = db.count(), cpu_seconds(pid) if pid else None
+        start = time.perf_counter()
+        print(f"{clients} idle tabs for {duration}s...")
+        deadline = asyncio.get_running_loop().time() + duration
+        await asyncio.gather(*(idle_tab(sessions[i % accounts], cadence, deadline, stats, rng)
+                               for i in range(clients)))
+        elapsed = time.perf_counter() - start
+        # In-flight requests still count towards DB and CPU
+        if stats.pending:
+            await asyncio.wait(stats.pending)
+        queries = db.count() - queries_before
+        cpu_after = cpu_seconds(pid) if pid else None
+        cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    finally:
+        db.close()
+        await close_clients(sessions)
+        conn = connect()
+        try:
+            delete_accounts(conn, BENCH_DOMAIN)
+        finally:
+            conn.close()
+    return report(clients, cadence, stats, elapsed, queries, db.unit, cpu)
+
+
+def report(clients, cadence, stats, elapsed, queries, db_unit, cpu):
+    """Print the capacity numbers, return the samples for the performance history"""
+    samples = BenchSamples("polling_load.py")
+    record = samples.record
+
+    per_1k = 1000 / clients
+    requests = len(stats.latencies) + sum(stats.errors.values())
+    expected = clients * sum(1 / period for period in cadence.values())
+    rps = requests / elapsed
+    print(f"\n{clients} clients polling {', '.join(f'{p} every {s:g}s' for p, s in cadence.items())}")
+    print(f"  Requests:   {rps:.1f}/s sustained (model {expected:.1f}/s), {rps * per_1k:.2f}/s per 1k users")
+    if stats.latencies:
+        print(f"  Latency:    p50 {percentile(stats.latencies, 50):.1f}ms, p95 {percentile(stats.latencies, 95):.1f}ms, "
+              f"p99 {percentile(stats.latencies, 99):.1f}ms")
+        record("latency:p95", percentile(stats.latencies, 95))
+    if stats.errors:
+        print(f"  Errors:     {', '.join(f'{k}: {v}' for k, v in sorted(stats.errors.items()))}")
+    print(f"  DB:         {queries / elapsed:.1f} {db_unit}/s, {queries / elapsed * per_1k:.2f}/s per 1k users, "
+          f"{queries / max(requests, 1):.1f} per request")
+    record("requests_per_s_per_1k", rps * per_1k)
+    record(f"db_{db_unit}_per_s_per_1k", queries / elapsed * per_1k)
+    record("errors", sum(stats.errors.values()))
+    if cpu is None:
+        print("  API CPU:    not measured (API process not found, pass --api-pid)")
+    else:
+        cores = cpu / elapsed
+        print(f"  API CPU:    {cores:.1%} of a core, {cores * per_1k:.2%} per 1k users, "
+              f"{cpu * 1000 / max(requests, 1):.2f}ms per request")
+        record("api_cpu_cores_per_1k", cores * per_1k)
+        record("api_cpu_ms_per_request", cpu * 1000 / max(requests, 1))
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Notification polling load model")
+    parser.add_argument("--clients", type=int, default=POLLING_LOAD_CLIENTS, help="Idle tabs to simulate")
+    parser.add_argument("--accounts", type=int, default=POLLING_LOAD_ACCOUNTS, help="Sessions they share")
+    parser.add_argument("--duration", type=float, default=POLLING_LOAD_DURATION, help="Seconds of load")
+    parser.add_argument("--no-browser", action="store_true", help="Use POLLING_LOAD_CADENCE, do not measure it")
+    parser.add_argument("--api-pid", type=int, help="API process for CPU time (default: found from its port)")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    cadence = {} if args.no_browser else measure_cadence()
+    if cadence:
+        print(f"Measured cadence: {', '.join(f'{p} every {s:.1f}s' for p, s in cadence.items())}")
+    else:
+        cadence = POLLING_LOAD_CADENCE
+        print(f"Using POLLING_LOAD_CADENCE: {cadence}")
+
+    pid = args.api_pid or api_pid()
+    samples = asyncio.run(run(args.clients, args.accounts, args.duration, cadence, pid))
+    if not args.no_store:
+        save_bench_run(samples, "polling-load")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,268 @@
+"""
+Web push fan-out benchmark
+
+Registers push subscriptions pointing at the local stand-in
+(push_standin.py), triggers notifications through the API and times their
+delivery. notify() runs after the API has answered, and pushes to a user's
+subscriptions one after the other, so fan-out is only visible at the push
+endpoints:
+- devices  one climber with PUSH_FANOUT_DEVICES subscriptions is notified:
+           the cost of the per-user sequential loop
+- users    PUSH_FANOUT_USERS climbers with PUSH_FANOUT_DEVICES_PER_USER
+           subscriptions each are notified at once: concurrency across
+           notify() calls
+Notifications are friend requests (FRIEND_REQUEST to the addressee) or,
+with --trigger comment, comments on routes the climbers opened
+(COMMENT_RECEIVED to the opener).
+
+PUSH_FANOUT_GONE of the subscriptions answer 410 Gone. Each scenario runs
+twice: after the first round those must be deactivated in
+push_subscriptions (and no other), and the second round must not push to
+them again.
+
+The API needs VAPID keys and must trust the stand-in's certificate, see
+`python push_standin.py --api-env`.
+
+Usage:
+    python push_fanout.py
+    python push_fanout.py --scenario devices --latency 300
+    python push_fanout.py --trigger comment --fail 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from api_client import ApiError, AsyncApiClient
+from bench import BenchSamples, save_bench_run
+from bench_users import close_clients, delete_accounts, sign_up_clients
+from config import (
+    PUSH_STANDIN_LATENCY_MS,
+    PUSH_STANDIN_JITTER_MS,
+    PUSH_STANDIN_FAILURE_RATE,
+    PUSH_FANOUT_DEVICES,
+    PUSH_FANOUT_USERS,
+    PUSH_FANOUT_DEVICES_PER_USER,
+    PUSH_FANOUT_GONE,
+)
+from db import connect
+from perf_stats import percentile
+from push_standin import GONE_PREFIX, PushStandIn
+
+
+BENCH_DOMAIN = "push.bench"
+ROUTE_PREFIX = "PF bench"
+QUIET_S = 10
+
+
+async def register(targets, per_user, standin, rng):
+    """Subscribe `per_user` devices per target, returns the number of gone endpoints"""
+    gone = 0
+    start = time.perf_counter()
+    for i, api in enumerate(targets):
+        subscriptions = []
+        for j in range(per_user):
+            is_gone = rng.random() < PUSH_FANOUT_GONE
+            gone += is_gone
+            subscriptions.append(standin.subscription(f"u{i}-d{j}", gone=is_gone))
+        await api.push_subscriptions.subscribe_many(subscriptions)
+    total = len(targets) * per_user
+    elapsed = time.perf_counter() - start
+    print(f"Registered {total} subscriptions ({gone} gone) in {elapsed:.1f}s, {total / elapsed:.0f}/s")
+    return gone
+
+
+def open_routes(conn, targets):
+    """A bench route opened by each target, {target index: route id}"""
+    routes = {}
+    with conn.cursor() as cur:
+        for i, api in enumerate(targets):
+            cur.execute(
+                "INSERT INTO routes (id, name, difficulty, hold_color_hex, hold_color_category, sector, "
+                "opener_id, main_photo, status, opened_at, created_at, updated_at) "
+                "VALUES (gen_random_uuid(), %s, 'Rouge', '#FF5733', 'red', 'Secteur A', %s, "
+                "'/uploads/routes/bench.jpg', 'ACTIVE', now(), now(), now()) RETURNING id",
+                (f"{ROUTE_PREFIX} {i}", api.user["id"]),
+            )
+            routes[i] = cur.fetchone()[0]
+    return routes
+
+
+async def trigger(sender, targets, kind, routes):
+    """One notification per target, sent at once; returns the API latencies in ms"""
+    async def one(i, api):
+        start = time.perf_counter()
+        if kind == "comment":
+            await sender.comments.create(routes[i], f"{ROUTE_PREFIX} comment")
+        else:
+            await sender.friendships.request(api.user["id"])
+        return (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(one(i, api) for i, api in enumerate(targets)))
+
+
+def subscription_state(conn, standin):
+    """(gone deactivated, gone still active, others deactivated) among the stand-in's subscriptions"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT count(*) FILTER (WHERE gone AND NOT is_active), count(*) FILTER (WHERE gone AND is_active), "
+            "count(*) FILTER (WHERE NOT gone AND NOT is_active) "
+            "FROM (SELECT is_active, endpoint LIKE %s AS gone FROM push_subscriptions WHERE endpoint LIKE %s) s",
+            (f"%/push/{GONE_PREFIX}%", f"{standin.url}/%"),
+        )
+        return cur.fetchone()
+
+
+def round_stats(deliveries, t0, api_ms):
+    """Fan-out timings of one round, delivery times relative to the trigger"""
+    statuses = {}
+    per_user = {}
+    for d in deliveries:
+        statuses[d["status"]] = statuses.get(d["status"], 0) + 1
+        user = d["token"].replace(GONE_PREFIX, "").split("-")[0]
+        per_user[user] = max(per_user.get(user, 0), (d["end"] - t0) * 1000)
+    stats = {"deliveries": len(deliveries), "statuses": statuses, "api_ms": api_ms,
+             "invalid": sum(not d["valid"] for d in deliveries),
+             "gone_hits": sum(d["token"].startswith(GONE_PREFIX) for d in deliveries)}
+    if deliveries:
+        first = min(d["start"] for d in deliveries)
+        last = max(d["end"] for d in deliveries)
+        busy = sum(d["end"] - d["start"] for d in deliveries)
+        stats.update(
+            first_ms=(first - t0) * 1000,
+            fanout_ms=(last - t0) * 1000,
+            per_s=len(deliveries) / max(last - first, 1e-9),
+            mean_in_flight=busy / max(last - first, 1e-9),
+            user_p50_ms=percentile(list(per_user.values()), 50),
+            user_p95_ms=percentile(list(per_user.values()), 95),
+        )
+    return stats
+
+
+def print_round(label, stats, max_in_flight):
+    print(f"  {label}: {stats['deliveries']} deliveries {stats['statuses']}, "
+          f"trigger API p50 {percentile(stats['api_ms'], 50):.0f}ms")
+    if stats["deliveries"]:
+        print(f"    first push after {stats['first_ms']:.0f}ms, last done after {stats['fanout_ms']:.0f}ms, "
+              f"{stats['per_s']:.0f} pushes/s")
+        print(f"    in flight: max {max_in_flight}, mean {stats['mean_in_flight']:.1f}; "
+              f"user fully notified p50 {stats['user_p50_ms']:.0f}ms, p95 {stats['user_p95_ms']:.0f}ms")
+    if stats["invalid"]:
+        print(f"    {stats['invalid']} pushes without VAPID authorization or aes128gcm payload")
+
+
+async def run_scenario(scenario, kind, standin, conn, record, seed=0):
+    users, per_user = (1, PUSH_FANOUT_DEVICES) if scenario == "devices" else (PUSH_FANOUT_USERS,
+                                                                               PUSH_FANOUT_DEVICES_PER_USER)
+    print(f"\n=== {scenario}: {users} user(s) x {per_user} subscriptions, {kind} notifications ===")
+    sender, *targets = await sign_up_clients(BENCH_DOMAIN, users + 1, pool_size=10)
+    try:
+        gone = await register(targets, per_user, standin, random.Random(seed))
+        routes = open_routes(conn, targets) if kind == "comment" else {}
+        expected = users * per_user
+        timeout = QUIET_S + expected * (standin.latency_ms + 3 * standin.jitter_ms) / 1000 * 2
+
+        for round_no in (1, 2):
+            if round_no == 2:
+                # A new request needs the pending one gone
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM friendships WHERE requester_id = %s", (sender.user["id"],))
+                expected -= gone
+            standin.reset()
+            t0 = time.perf_counter()
+            api_ms = await trigger(sender, targets, kind, routes)
+            deliveries = standin.wait_for(expected, QUIET_S, timeout)
+            if round_no == 2:
+                # Pushes to endpoints that should be deactivated would come on top
+                await asyncio.sleep(2 + 2 * standin.latency_ms / 1000)
+                deliveries = standin.snapshot()
+            stats = round_stats(deliveries, t0, api_ms)
+            print_round(f"Round {round_no}", stats, standin.max_in_flight)
+            prefix = f"{scenario}:round{round_no}"
+            for name in ("fanout_ms", "per_s", "user_p95_ms"):
+                if name in stats:
+                    record(f"{prefix}:{name}", stats[name])
+            record(f"{prefix}:max_in_flight", standin.max_in_flight)
+            record(f"{prefix}:missing", max(0, expected - stats["deliveries"]))
+
+            if round_no == 1:
+                # The last 410 is deactivated right after its response
+                await asyncio.sleep(1)
+                cleaned, still_active, wrongly = subscription_state(conn, standin)
+                print(f"  410 cleanup: {cleaned}/{gone} gone subscriptions deactivated, {still_active} still active, "
+                      f"{wrongly} others deactivated")
+                record(f"{scenario}:gone_still_active", still_active)
+                record(f"{scenario}:wrongly_deactivated", wrongly)
+            else:
+                print(f"  Pushes to deactivated endpoints: {stats['gone_hits']}")
+                record(f"{scenario}:gone_pushed_again", stats["gone_hits"])
+    finally:
+        await close_clients([sender, *targets])
+        cleanup(conn)
+
+
+def cleanup(conn):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM comments WHERE route_id IN (SELECT id FROM routes WHERE name LIKE %s)",
+                    (f"{ROUTE_PREFIX} %",))
+        cur.execute("DELETE FROM routes WHERE name LIKE %s", (f"{ROUTE_PREFIX} %",))
+    # Subscriptions and notifications cascade
+    delete_accounts(conn, BENCH_DOMAIN)
+
+
+async def check_api():
+    """Fail early when the API cannot send web push"""
+    async with AsyncApiClient(pool_size=1) as api:
+        try:
+            await api.push_subscriptions.vapid_key()
+        except ApiError:
+            raise SystemExit("The API has no VAPID keys: start it with the environment from "
+                             "`python push_standin.py --api-env`")
+
+
+async def run(scenarios, kind, latency_ms, jitter_ms, failure_rate):
+    await check_api()
+    standin = PushStandIn(latency_ms=latency_ms, jitter_ms=jitter_ms, failure_rate=failure_rate).start()
+    print(f"Push stand-in on {standin.url}: {latency_ms:g}ms +- {jitter_ms:g}ms, {failure_rate:.0%} failures")
+    conn = connect()
+    samples = BenchSamples("push_fanout.py")
+    record = samples.record
+
+    try:
+        for scenario in scenarios:
+            await run_scenario(scenario, kind, standin, conn, record)
+    finally:
+        standin.stop()
+        conn.close()
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Web push fan-out benchmark")
+    parser.add_argument("--scenario", choices=["devices", "users", "all"], default="all")
+    parser.add_argument("--trigger", choices=["friend", "comment"], default="friend")
+    parser.add_argument("--latency", type=float, default=PUSH_STANDIN_LATENCY_MS, help="Mean push service ms")
+    parser.add_argument("--jitter", type=float, default=PUSH_STANDIN_JITTER_MS)
+    parser.add_argument("--fail", type=float, default=PUSH_STANDIN_FAILURE_RATE, help="Share answering 500")
+    parser.add_argument("--cleanup", action="store_true", help="Remove leftovers of an aborted run and exit")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    if args.cleanup:
+        conn = connect()
+        try:
+            cleanup(conn)
+        finally:
+            conn.close()
+        return 0
+
+    scenarios = ["devices", "users"] if args.scenario == "all" else [args.scenario]
+    samples = asyncio.run(run(scenarios, args.trigger, args.latency, args.jitter, args.fail))
+    if not args.no_store:
+        save_bench_run(samples, "push-fanout")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,272 @@
+"""
+Local stand-in for web push services (FCM, Mozilla autopush...)
+
+The API's web-push library POSTs encrypted payloads to each subscription's
+endpoint over HTTPS. This server hands out endpoints under
+PUSH_STANDIN_URL, records every delivery (arrival, duration, status,
+concurrency) and injects latency and failures:
+- every request waits PUSH_STANDIN_LATENCY_MS +- PUSH_STANDIN_JITTER_MS
+- endpoints whose token starts with "gone-" answer 410, like an
+  unsubscribed browser
+- PUSH_STANDIN_FAILURE_RATE of the other requests answer 500
+
+The API must trust the stand-in's self-signed certificate: start it with
+NODE_EXTRA_CA_CERTS pointing to the file `python push_standin.py --api-env`
+prints, along with VAPID keys if the API has none.
+
+Usage:
+    python push_standin.py --api-env                 # Certificate and VAPID keys for the API's environment
+    python push_standin.py --latency 200 --fail 0.05 # Serve and print deliveries until Ctrl-C
+"""
+
+import argparse
+import base64
+import os
+import random
+import secrets
+import ssl
+import subprocess
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import (
+    PUSH_STANDIN_URL,
+    PUSH_STANDIN_LATENCY_MS,
+    PUSH_STANDIN_JITTER_MS,
+    PUSH_STANDIN_FAILURE_RATE,
+)
+
+
+CERT_DIR = os.path.join("reports", "push_standin")
+GONE_PREFIX = "gone-"
+
+# NIST P-256, for subscription (p256dh) and VAPID keys
+P256_P = 2 ** 256 - 2 ** 224 + 2 ** 192 + 2 ** 96 - 1
+P256_N = 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551
+P256_G = (0x6B17D1F2E12C4247F8BCE6E563A440F277037D812DEB33A0F4A13945D898C296,
+          0x4FE342E2FE1A7F9B8EE7EB4A7C0F9E162BCE33576B315ECECBB6406837BF51F5)
+
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _add(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a[0] == b[0] and (a[1] + b[1]) % P256_P == 0:
+        return None
+    if a == b:
+        slope = (3 * a[0] * a[0] - 3) * pow(2 * a[1], -1, P256_P)
+    else:
+        slope = (b[1] - a[1]) * pow(b[0] - a[0], -1, P256_P)
+    x = (slope * slope - a[0] - b[0]) % P256_P
+    return x, (slope * (a[0] - x) - a[1]) % P256_P
+
+
+def p256_keypair():
+    """(private scalar, uncompressed public point) as base64url, the format of VAPID and p256dh keys"""
+    d = secrets.randbelow(P256_N - 1) + 1
+    point, addend, k = None, P256_G, d
+    while k:
+        if k & 1:
+            point = _add(point, addend)
+        addend = _add(addend, addend)
+        k >>= 1
+    public = b"\x04" + point[0].to_bytes(32, "big") + point[1].to_bytes(32, "big")
+    return b64url(d.to_bytes(32, "big")), b64url(public)
+
+
+def ensure_certificate(host):
+    """Self-signed certificate and key for `host`, created on first use; returns (cert, key) paths"""
+    cert, key = os.path.join(CERT_DIR, "cert.pem"), os.path.join(CERT_DIR, "key.pem")
+    if not os.path.exists(cert):
+        os.makedirs(CERT_DIR, exist_ok=True)
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+             "-nodes", "-keyout", key, "-out", cert, "-days", "365", "-subj", f"/CN={host}",
+             "-addext", f"subjectAltName=DNS:{host},DNS:localhost,IP:127.0.0.1"],
+            check=True, capture_output=True,
+        )
+    return cert, key
+
+
+class TLSThreadingHTTPServer(ThreadingHTTPServer):
+    """HTTPS server whose TLS handshakes run in the request threads
+
+    Wrapping the listening socket would run every handshake in accept(), one
+    at a time on the serve_forever thread, and cap the deliveries a fan-out
+    can start at once.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, context):
+        super().__init__(address, handler)
+        self.context = context
+
+    def finish_request(self, request, client_address):
+        try:
+            tls = self.context.wrap_socket(request, server_side=True)
+        except OSError:
+            # Client gone or not speaking TLS, as accept() would have dropped it
+            return
+        with tls:
+            super().finish_request(tls, client_address)
+
+
+class PushStandIn:
+    """HTTPS push service stand-in recording deliveries"""
+
+    def __init__(self, url=PUSH_STANDIN_URL, latency_ms=PUSH_STANDIN_LATENCY_MS, jitter_ms=PUSH_STANDIN_JITTER_MS,
+                 failure_rate=PUSH_STANDIN_FAILURE_RATE):
+        self.url = url.rstrip("/")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.server = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.deliveries = []
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    def subscription(self, token=None, gone=False):
+        """Body of POST /api/push-subscriptions for a new endpoint on this stand-in"""
+        token = (GONE_PREFIX if gone else "") + (token or secrets.token_hex(8))
+        _, p256dh = p256_keypair()
+        return {
+            "platform": "web",
+            "endpoint": f"{self.url}/push/{token}",
+            "keys": {"p256dh": p256dh, "auth": b64url(secrets.token_bytes(16))},
+            "deviceName": f"Push bench {token}",
+        }
+
+    def start(self):
+        parts = urllib.parse.urlsplit(self.url)
+        cert, key = ensure_certificate(parts.hostname)
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                start = time.perf_counter()
+                with standin.lock:
+                    standin.in_flight += 1
+                    standin.max_in_flight = max(standin.max_in_flight, standin.in_flight)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                token = self.path.rsplit("/", 1)[-1]
+                time.sleep(max(0.0, random.gauss(standin.latency_ms, standin.jitter_ms)) / 1000)
+                if token.startswith(GONE_PREFIX):
+                    status = 410
+                elif random.random() < standin.failure_rate:
+                    status = 500
+                else:
+                    status = 201
+                self.send_response(status)
+                if status == 201:
+                    self.send_header("Location", f"{standin.url}/message/{secrets.token_hex(8)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                with standin.lock:
+                    standin.in_flight -= 1
+                    standin.deliveries.append({
+                        "token": token,
+                        "start": start,
+                        "end": time.perf_counter(),
+                        "status": status,
+                        "bytes": len(body),
+                        # What web-push sends: VAPID authorization and an aes128gcm payload
+                        "valid": self.headers.get("Authorization", "").startswith("vapid ")
+                        and self.headers.get("Content-Encoding") == "aes128gcm",
+                    })
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        self.server = TLSThreadingHTTPServer(("", parts.port or 443), Handler, context)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.deliveries)
+
+    def wait_for(self, count, quiet_s, timeout):
+        """Wait until `count` deliveries arrived, or none for `quiet_s`; returns the deliveries"""
+        deadline = time.perf_counter() + timeout
+        last_change, seen = time.perf_counter(), 0
+        while time.perf_counter() < deadline:
+            n = len(self.deliveries)
+            if n >= count:
+                break
+            if n != seen:
+                seen, last_change = n, time.perf_counter()
+            elif time.perf_counter() - last_change > quiet_s:
+                break
+            time.sleep(0.05)
+        return self.snapshot()
+
+
+def api_env(url=PUSH_STANDIN_URL):
+    """Environment lines the API needs to deliver to the stand-in"""
+    cert, _ = ensure_certificate(urllib.parse.urlsplit(url).hostname)
+    private, public = p256_keypair()
+    return [
+        f"NODE_EXTRA_CA_CERTS={os.path.abspath(cert)}",
+        "# Only if the API has no VAPID keys yet:",
+        f"VAPID_PUBLIC_KEY={public}",
+        f"VAPID_PRIVATE_KEY={private}",
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local web push service stand-in")
+    parser.add_argument("--api-env", action="store_true", help="Print the API environment for the stand-in")
+    parser.add_argument("--latency", type=float, default=PUSH_STANDIN_LATENCY_MS, help="Mean ms per delivery")
+    parser.add_argument("--jitter", type=float, default=PUSH_STANDIN_JITTER_MS, help="Standard deviation, ms")
+    parser.add_argument("--fail", type=float, default=PUSH_STANDIN_FAILURE_RATE, help="Share answering 500")
+    args = parser.parse_args(argv)
+
+    if args.api_env:
+        print("\n".join(api_env()))
+        return 0
+
+    standin = PushStandIn(latency_ms=args.latency, jitter_ms=args.jitter, failure_rate=args.fail).start()
+    print(f"Push stand-in on {standin.url}/push/<token> (Ctrl-C to stop)")
+    try:
+        reported = 0
+        while True:
+            time.sleep(10)
+            deliveries = standin.snapshot()
+            if len(deliveries) != reported:
+                statuses = {}
+                for d in deliveries[reported:]:
+                    statuses[d["status"]] = statuses.get(d["status"], 0) + 1
+                print(f"  {len(deliveries) - reported} deliveries {statuses}, max {standin.max_in_flight} in flight")
+                reported = len(deliveries)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
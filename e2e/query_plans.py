@@ -0,0 +1,342 @@
+"""
+Query plans of the routes hub for every pairwise filter combination
+
+GET /api/routes builds its WHERE clause from difficulty, holdColorCategory,
+sector, status, openedAtFrom/To and a leading-wildcard LIKE on name and
+description, then runs the page query and a separate count(*). This tool
+enumerates the filter combinations pairwise (every pair of filter values
+appears in at least one request), drives each through the API for its
+latency, and runs EXPLAIN (ANALYZE, BUFFERS) on the SQL Drizzle generates
+for it. The report ranks the slowest plans and groups sequential scans by
+the filters that caused them, to show which indexes are missing.
+
+Usage:
+    python query_plans.py --seed             # Insert QUERY_PLAN_SEED_ROUTES synthetic routes first
+    python query_plans.py                    # Capture plans on the current data
+    python query_plans.py --no-api --top 30  # Plans only
+    python query_plans.py --cleanup          # Remove the synthetic routes
+"""
+
+import argparse
+import json
+import os
+import urllib.parse
+from datetime import datetime, timedelta
+
+from api_client import ApiClient
+from config import (
+    API_URL,
+    BASE_URL,
+    ADMIN_EMAIL,
+    ADMIN_PASSWORD,
+    QUERY_PLAN_SEED_ROUTES,
+    QUERY_PLAN_SLOW_MS,
+)
+from db import connect
+
+
+REPORT_PATH = os.path.join("reports", "query_plans.txt")
+JSON_PATH = os.path.join("reports", "query_plans.json")
+SEED_PREFIX = "QP bench"
+
+# Filter values tried per query parameter (None = parameter absent)
+FILTER_VALUES = {
+    "difficulty": [None, ["Vert"], ["Rouge", "Noir"]],
+    "holdColorCategory": [None, ["red"], ["blue", "green"]],
+    "sector": [None, "one", "two"],             # Resolved to real sectors at run time
+    "status": [None, ["PENDING"], ["ACTIVE", "ARCHIVED"]],
+    "search": [None, "a", "dalle"],
+    "opened": [None, "from", "to", "range"],
+    "sortField": ["createdAt", "openedAt", "name", "difficulty"],
+    "page": [1, 40],
+}
+
+SORT_COLUMNS = {"createdAt": "created_at", "openedAt": "opened_at", "name": "name", "difficulty": "difficulty"}
+LIMIT = 12
+
+
+def pairwise(parameters):
+    """Greedy all-pairs combinations of {name: [values]}, as a list of dicts"""
+    names = list(parameters)
+    uncovered = {
+        (a, i, b, j)
+        for x, a in enumerate(names) for b in names[x + 1:]
+        for i in range(len(parameters[a])) for j in range(len(parameters[b]))
+    }
+    combinations = []
+    while uncovered:
+        # Start from an uncovered pair, then pick each other value to cover the most new pairs
+        a, i, b, j = min(uncovered)
+        choice = {a: i, b: j}
+        for name in names:
+            if name in choice:
+                continue
+            choice[name] = max(
+                range(len(parameters[name])),
+                key=lambda v: sum(
+                    ((n, choice[n], name, v) if names.index(n) < names.index(name)
+                     else (name, v, n, choice[n])) in uncovered
+                    for n in choice
+                ),
+            )
+        for x, p in enumerate(names):
+            for q in names[x + 1:]:
+                uncovered.discard((p, choice[p], q, choice[q]))
+        combinations.append({name: parameters[name][choice[name]] for name in names})
+    return combinations
+
+
+def resolve(combo, sectors):
+    """Concrete filters for a combination: query string pairs and SQL values"""
+    filters = dict(combo)
+    if filters["sector"] is not None:
+        filters["sector"] = sectors[:1] if filters["sector"] == "one" else sectors[:2]
+    now = datetime.now().replace(microsecond=0)
+    opened = filters.pop("opened")
+    if opened in ("from", "range"):
+        filters["openedAtFrom"] = now - timedelta(days=90)
+    if opened in ("to", "range"):
+        filters["openedAtTo"] = now - timedelta(days=30)
+    return filters
+
+
+def query_string(filters):
+    """Query string the web app would send for these filters"""
+    pairs = []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, list):
+            pairs.extend((key, v) for v in value)
+        elif isinstance(value, datetime):
+            pairs.append((key, value.isoformat()))
+        else:
+            pairs.append((key, str(value)))
+    pairs.append(("limit", str(LIMIT)))
+    return urllib.parse.urlencode(pairs)
+
+
+def route_queries(filters):
+    """The page and count queries GET /api/routes runs, as (sql, params) pairs"""
+    where, params = [], []
+    for key, column in (("difficulty", "difficulty"), ("holdColorCategory", "hold_color_category"),
+                        ("sector", "sector")):
+        if filters.get(key):
+            where.append(f'"routes"."{column}" in ({", ".join(["%s"] * len(filters[key]))})')
+            params.extend(filters[key])
+    if filters.get("status"):
+        where.append(f'"routes"."status" in ({", ".join(["%s"] * len(filters["status"]))})')
+        params.extend(filters["status"])
+    else:
+        where.append('"routes"."status" = %s')
+        params.append("ACTIVE")
+    if filters.get("search"):
+        where.append('("routes"."name" like %s or "routes"."description" like %s)')
+        params.extend([f"%{filters['search']}%"] * 2)
+    if filters.get("openedAtFrom"):
+        where.append('"routes"."opened_at" >= %s')
+        params.append(filters["openedAtFrom"])
+    if filters.get("openedAtTo"):
+        where.append('"routes"."opened_at" <= %s')
+        params.append(filters["openedAtTo"])
+    where_sql = " and ".join(f"({w})" for w in where)
+
+    # Relational findMany with the opener joined laterally, as Drizzle emits it
+    page_sql = (
+        'select "routes".*, "routes_opener"."data" as "opener" from "routes" '
+        'left join lateral (select json_build_array("routes_opener"."id", "routes_opener"."name", '
+        '"routes_opener"."image") as "data" from (select * from "users" "routes_opener" '
+        'where "routes_opener"."id" = "routes"."opener_id" limit 1) "routes_opener") "routes_opener" on true '
+        f'where {where_sql} order by "routes"."{SORT_COLUMNS[filters["sortField"]]}" desc '
+        "limit %s offset %s"
+    )
+    page_params = params + [LIMIT, (filters["page"] - 1) * LIMIT]
+    count_sql = f'select count(*) from "routes" where {where_sql}'
+    return [("page", page_sql, page_params), ("count", count_sql, list(params))]
+
+
+def explain(conn, sql, params):
+    """EXPLAIN (ANALYZE, BUFFERS) of a query, returns the JSON plan"""
+    with conn.cursor() as cur:
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        plan = cur.fetchone()[0]
+    return plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def analyze_plan(plan):
+    """Execution time, buffers, sequential scans and disk sorts of a plan"""
+    root = plan["Plan"]
+    seq_scans, disk_sorts = [], 0
+    for node in plan_nodes(root):
+        if node["Node Type"] == "Seq Scan":
+            seq_scans.append({
+                "relation": node.get("Relation Name"),
+                "filter": node.get("Filter", ""),
+                "rows_removed": node.get("Rows Removed by Filter", 0) * node.get("Actual Loops", 1),
+                "ms": node.get("Actual Total Time", 0) * node.get("Actual Loops", 1),
+            })
+        if node.get("Sort Space Type") == "Disk":
+            disk_sorts += 1
+    return {
+        "ms": plan.get("Execution Time", 0),
+        "shared_hit": root.get("Shared Hit Blocks", 0),
+        "shared_read": root.get("Shared Read Blocks", 0),
+        "seq_scans": seq_scans,
+        "disk_sorts": disk_sorts,
+    }
+
+
+def seed(conn, count):
+    """Insert synthetic routes spread over every filter dimension"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM users WHERE email = %s", (ADMIN_EMAIL,))
+        row = cur.fetchone()
+        if not row:
+            raise RuntimeError(f"Opener {ADMIN_EMAIL} not found, seed the app first")
+        cur.execute(
+            """
+            INSERT INTO routes (id, name, difficulty, hold_color_hex, hold_color_category, sector,
+                                description, opener_id, main_photo, status, opened_at, created_at, updated_at)
+            SELECT gen_random_uuid(),
+                   %(prefix)s || ' ' || g || ' ' || (ARRAY['dalle', 'dévers', 'réglette', 'toit', 'dièdre'])[1 + g %% 5],
+                   (enum_range(NULL::difficulty_color))[1 + floor(random() * 12)::int],
+                   '#FF5733',
+                   (enum_range(NULL::hold_color_category))[1 + floor(random() * 10)::int],
+                   'Secteur ' || chr(65 + floor(random() * 12)::int),
+                   md5(g::text) || ' ' || (ARRAY['prises fuyantes', 'départ assis', 'jeté final', 'talon'])[1 + g %% 4],
+                   %(opener)s,
+                   '/uploads/routes/bench.jpg',
+                   (ARRAY['ACTIVE', 'ACTIVE', 'ACTIVE', 'PENDING', 'ARCHIVED'])[1 + g %% 5]::route_status,
+                   now() - random() * interval '730 days',
+                   now() - random() * interval '730 days',
+                   now()
+            FROM generate_series(1, %(count)s) g
+            """,
+            {"prefix": SEED_PREFIX, "opener": row[0], "count": count},
+        )
+        cur.execute("ANALYZE routes")
+    print(f"Seeded {count} routes")
+
+
+def cleanup(conn):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM routes WHERE name LIKE %s", (f"{SEED_PREFIX} %",))
+        print(f"Removed {cur.rowcount} seeded routes")
+        cur.execute("ANALYZE routes")
+
+
+def capture(conn, use_api=True):
+    """Plans (and API latency) of every pairwise filter combination"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT sector FROM routes GROUP BY sector ORDER BY count(*) DESC LIMIT 2")
+        sectors = [r[0] for r in cur.fetchall()] or ["Secteur A"]
+        cur.execute("SELECT count(*) FROM routes")
+        total_routes = cur.fetchone()[0]
+
+    api = None
+    if use_api:
+        api = ApiClient(API_URL, BASE_URL, pool_size=1)
+        api.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)
+
+    results = []
+    try:
+        combos = pairwise(FILTER_VALUES)
+        print(f"{len(combos)} pairwise filter combinations over {total_routes} routes")
+        for combo in combos:
+            filters = resolve(combo, sectors)
+            qs = query_string(filters)
+            result = {"query": qs, "filters": sorted(k for k, v in filters.items()
+                                                     if v is not None and k not in ("sortField", "page")),
+                      "plans": {}}
+            if api:
+                response = api.request("GET", f"/api/routes?{qs}")
+                result["api_ms"] = response.elapsed_ms if response.status == 200 else None
+            for name, sql, params in route_queries(filters):
+                result["plans"][name] = analyze_plan(explain(conn, sql, params))
+            result["db_ms"] = sum(p["ms"] for p in result["plans"].values())
+            results.append(result)
+    finally:
+        if api:
+            api.close()
+    return results
+
+
+def format_report(results, top=20):
+    """Ranked text report: slowest plans, then sequential scans grouped by filters"""
+    lines = [f"Slowest combinations (page + count query, top {top}):"]
+    for r in sorted(results, key=lambda r: r["db_ms"], reverse=True)[:top]:
+        flags = []
+        for name, plan in r["plans"].items():
+            if plan["seq_scans"]:
+                flags.append(f"{name}: seq scan {', '.join(s['relation'] for s in plan['seq_scans'])}")
+            if plan["disk_sorts"]:
+                flags.append(f"{name}: sort on disk")
+        api = f"  api {r['api_ms']:.0f}ms" if r.get("api_ms") else ""
+        slow = " SLOW" if r["db_ms"] > QUERY_PLAN_SLOW_MS else ""
+        buffers = sum(p["shared_hit"] + p["shared_read"] for p in r["plans"].values())
+        lines.append(f"  {r['db_ms']:>8.1f}ms{api}  {buffers:>7} buffers{slow}  ?{r['query']}")
+        if flags:
+            lines.append(f"  {'':>10}{'; '.join(flags)}")
+
+    grouped = {}
+    for r in results:
+        for name, plan in r["plans"].items():
+            for scan in plan["seq_scans"]:
+                key = (scan["relation"], name, ", ".join(r["filters"]) or "(no filter)")
+                entry = grouped.setdefault(key, {"count": 0, "ms": 0.0, "rows_removed": 0, "filter": scan["filter"]})
+                entry["count"] += 1
+                entry["ms"] += scan["ms"]
+                entry["rows_removed"] += scan["rows_removed"]
+
+    lines.append("")
+    lines.append("Sequential scans by active filters (worst total time first):")
+    if not grouped:
+        lines.append("  none")
+    for (relation, query, filters), e in sorted(grouped.items(), key=lambda kv: kv[1]["ms"], reverse=True):
+        lines.append(
+            f"  {relation:<10} {query:<6} {e['ms']:>9.1f}ms over {e['count']:>2} plans, "
+            f"{e['rows_removed'] // max(e['count'], 1):>8} rows filtered/plan  filters: {filters}"
+        )
+        lines.append(f"  {'':<18}Filter: {e['filter'][:160]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Capture routes hub query plans per filter combination")
+    parser.add_argument("--seed", nargs="?", type=int, const=QUERY_PLAN_SEED_ROUTES,
+                        help="Insert synthetic routes first (default count from config)")
+    parser.add_argument("--cleanup", action="store_true", help="Remove the synthetic routes and exit")
+    parser.add_argument("--no-api", action="store_true", help="Skip the API requests")
+    parser.add_argument("--top", type=int, default=20, help="Slowest combinations to list")
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        if args.cleanup:
+            cleanup(conn)
+            return 0
+        if args.seed:
+            seed(conn, args.seed)
+        results = capture(conn, use_api=not args.no_api)
+    finally:
+        conn.close()
+
+    report = format_report(results, args.top)
+    print(report)
+    os.makedirs("reports", exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        f.write(report + "\n")
+    with open(JSON_PATH, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nReport: {REPORT_PATH}, raw plans summary: {JSON_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+"""
+Performance regression detection against a rolling baseline
+
+Each metric of a run (test duration, step timing, page vital, API latency)
+is compared with the same metric over the previous runs stored in the
+results store. A slowdown is only flagged when it is large in robust terms
+(median/MAD z-score), large in relative terms, and - when enough samples
+exist - significant under a one-sided Mann-Whitney U test.
+
+Usage:
+    python regression.py                # Check the latest stored run
+    python regression.py --run 42       # Check a specific run
+"""
+
+import argparse
+
+from config import (
+    PERF_DB_PATH,
+    REGRESSION_BASELINE_RUNS,
+    REGRESSION_MIN_BASELINE_RUNS,
+    REGRESSION_Z_THRESHOLD,
+    REGRESSION_MIN_CHANGE,
+    REGRESSION_P_VALUE,
+)
+from perf_stats import median, robust_z, mann_whitney_u
+from results_store import ResultsStore
+
+
+def detect_regressions(store, run_id,
+                       window=REGRESSION_BASELINE_RUNS,
+                       min_runs=REGRESSION_MIN_BASELINE_RUNS,
+                       z_threshold=REGRESSION_Z_THRESHOLD,
+                       min_change=REGRESSION_MIN_CHANGE,
+                       p_value=REGRESSION_P_VALUE):
+    """Return the significant slowdowns of `run_id`, worst first"""
+    run = store.run(run_id)
+    suite = run["suite"] if run else None
+    regressions = []
+    for key, current in store.run_samples(run_id).items():
+        # Only runs of the same suite (and network profile) form the baseline
+        per_run = store.history(key, run_id, window, suite=suite)
+        if len(per_run) < min_runs:
+            continue
+
+        # One value per baseline run so a chatty step does not dominate
+        baseline = [median(values) for values in per_run.values()]
+        base_med = median(baseline)
+        cur_med = median(current)
+        if base_med <= 0:
+            continue
+
+        change = (cur_med - base_med) / base_med
+        z = robust_z(cur_med, baseline, min_scale=max(1.0, 0.01 * base_med))
+        if change < min_change or z < z_threshold:
+            continue
+
+        p = None
+        if len(current) >= 3:
+            raw_baseline = [v for values in per_run.values() for v in values]
+            _, p = mann_whitney_u(current, raw_baseline)
+            if p >= p_value:
+                continue
+
+        test, kind, name = key
+        regressions.append({
+            "test": test,
+            "kind": kind,
+            "name": name,
+            "baseline": base_med,
+            "current": cur_med,
+            "change": change,
+            "z": z,
+            "p": p,
+            "baseline_runs": len(per_run),
+        })
+
+    regressions.sort(key=lambda r: r["z"], reverse=True)
+    return regressions
+
+
+def format_regressions(regressions):
+    """Human readable regression report"""
+    if not regressions:
+        return "No performance regressions detected"
+    lines = [f"{len(regressions)} performance regression(s) detected:"]
+    for r in regressions:
+        p = f", p={r['p']:.3f}" if r["p"] is not None else ""
+        lines.append(
+            f"  [{r['kind']}] {r['name']} in {r['test']}: "
+            f"{r['baseline']:.0f}ms -> {r['current']:.0f}ms "
+            f"(+{r['change'] * 100:.0f}%, z={r['z']:.1f}{p}, {r['baseline_runs']} baseline runs)"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect performance regressions")
+    parser.add_argument("--db", default=PERF_DB_PATH, help="Results store path")
+    parser.add_argument("--run", type=int, help="Run id to check (default: latest)")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    try:
+        run_id = args.run
+        if run_id is None:
+            latest = store.latest_run()
+            if not latest:
+                print("No runs stored yet")
+                return 0
+            run_id = latest["id"]
+        regressions = detect_regressions(store, run_id)
+        print(format_regressions(regressions))
+        return 1 if regressions else 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
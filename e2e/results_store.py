@@ -0,0 +1,132 @@
+"""SQLite store of performance results, keyed by git commit"""
+
+import os
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    commit_sha TEXT NOT NULL,
+    branch TEXT,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    suite TEXT,
+    exit_status INTEGER,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_key ON samples(test, kind, name, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_commit ON runs(commit_sha);
+"""
+
+
+def _git(*args):
+    """Run a git command from the e2e directory, None if git is unavailable"""
+    try:
+        return subprocess.run(
+            ["git", *args],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def git_info():
+    """Return (commit_sha, branch, dirty) for the working tree"""
+    sha = _git("rev-parse", "HEAD") or "unknown"
+    branch = _git("rev-parse", "--abbrev-ref", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    return sha, branch, dirty
+
+
+class ResultsStore:
+    """Historical performance results of E2E runs"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def save_run(self, samples, suite=None, exit_status=None, commit=None):
+        """Store a run and its samples, return the new run id"""
+        sha, branch, dirty = git_info()
+        if commit:
+            sha, branch, dirty = commit, None, False
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (commit_sha, branch, dirty, suite, exit_status, started_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha, branch, int(dirty), suite, exit_status,
+                 datetime.now(timezone.utc).isoformat(timespec="seconds")),
+            )
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO samples (run_id, test, kind, name, value) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, s["test"], s["kind"], s["name"], s["value"]) for s in samples],
+            )
+        return run_id
+
+    def latest_run(self, suite=None):
+        """Most recent run, optionally restricted to a suite"""
+        if suite:
+            row = self.conn.execute(
+                "SELECT * FROM runs WHERE suite = ? ORDER BY id DESC LIMIT 1", (suite,)
+            ).fetchone()
+        else:
+            row = self.conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        return dict(row) if row else None
+
+    def runs(self, limit=20):
+        """Most recent runs, newest first"""
+        rows = self.conn.execute(
+            "SELECT r.*, COUNT(s.run_id) AS sample_count FROM runs r "
+            "LEFT JOIN samples s ON s.run_id = r.id "
+            "GROUP BY r.id ORDER BY r.id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def run_samples(self, run_id):
+        """Samples of one run grouped by (test, kind, name)"""
+        grouped = {}
+        for row in self.conn.execute(
+            "SELECT test, kind, name, value FROM samples WHERE run_id = ?", (run_id,)
+        ):
+            grouped.setdefault((row["test"], row["kind"], row["name"]), []).append(row["value"])
+        return grouped
+
+    def history(self, key, before_run_id, limit, suite=None):
+        """Values of `key` in the `limit` runs preceding `before_run_id`, grouped per run"""
+        test, kind, name = key
+        rows = self.conn.execute(
+            "SELECT run_id, value FROM samples "
+            "WHERE test = ? AND kind = ? AND name = ? AND run_id IN ("
+            "  SELECT DISTINCT s.run_id FROM samples s JOIN runs r ON r.id = s.run_id"
+            "  WHERE s.test = ? AND s.kind = ? AND s.name = ? AND s.run_id < ?"
+            "  AND (? IS NULL OR r.suite = ?)"
+            "  ORDER BY s.run_id DESC LIMIT ?"
+            ")",
+            (test, kind, name, test, kind, name, before_run_id, suite, suite, limit),
+        ).fetchall()
+        per_run = {}
+        for row in rows:
+            per_run.setdefault(row["run_id"], []).append(row["value"])
+        return per_run
+
+    def run(self, run_id):
+        """A single run, None if unknown"""
+        row = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
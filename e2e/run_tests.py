@@ -7,7 +7,17 @@ Usage:
     python run_tests.py admin              # Run admin tests only
     python run_tests.py lambda             # Run lambda tests only
     python run_tests.py full               # Run full navigation suite
+    python run_tests.py network            # Key pages under each network profile
+    python run_tests.py sw                 # Service worker cold / warm / offline loads
+    python run_tests.py soak               # Memory retention over repeated navigation cycles
+    python run_tests.py comments           # Comment thread scaling curve (10 / 1k / 10k comments)
+    python run_tests.py --network=3g       # Run under a network profile from config.py
+    python run_tests.py --device=low_end_phone  # Run under a device profile (CPU throttled)
+    python run_tests.py --devices=phone,tablet,desktop  # Every test on each device, one browser
     python run_tests.py --headless         # Run in headless mode
+    python run_tests.py --no-store         # Do not record performance results
+    python run_tests.py --fail-on-regression  # Exit non-zero on perf regressions
+    python run_tests.py compare <refA> <refB> # A/B benchmark two builds (see compare.py)
 """
 
 import subprocess
@@ -22,21 +32,67 @@ def main():
     # Parse arguments
     args = sys.argv[1:]
     headless = "--headless" in args
-    args = [a for a in args if a != "--headless"]
+    store_results = "--no-store" not in args
+    fail_on_regression = "--fail-on-regression" in args
+    network = next((a.split("=", 1)[1] for a in args if a.startswith("--network=")), None)
+    device = next((a.split("=", 1)[1] for a in args if a.startswith("--device=")), None)
+    devices = next((a.split("=", 1)[1] for a in args if a.startswith("--devices=")), None)
+    args = [a for a in args if a not in ("--headless", "--no-store", "--fail-on-regression")
+            and not a.startswith(("--network=", "--device=", "--devices="))]
+
+    if args and args[0] == "compare":
+        if headless:
+            os.environ["HEADLESS"] = "true"
+        from compare import main as compare_main
+        sys.exit(compare_main(args[1:]))
 
     # Determine which tests to run
     test_file = None
+    suite = "all"
     if "admin" in args:
         test_file = "test_admin_navigation.py"
+        suite = "admin"
     elif "lambda" in args:
         test_file = "test_lambda_user_navigation.py"
+        suite = "lambda"
     elif "full" in args:
         test_file = "test_full_navigation.py"
+        suite = "full"
+    elif "network" in args:
+        test_file = "test_network_profiles.py"
+        suite = "network"
+    elif "sw" in args:
+        test_file = "test_service_worker.py"
+        suite = "sw"
+    elif "soak" in args:
+        test_file = "test_soak.py"
+        suite = "soak"
+        os.environ["SOAK"] = "true"
+    elif "comments" in args:
+        test_file = "test_comment_scale.py"
+        suite = "comments"
+        os.environ["COMMENT_SCALE"] = "true"
 
     # Set headless mode via environment
     if headless:
         os.environ["HEADLESS"] = "true"
 
+    # Suite-wide network/device profiles; results are only compared with runs under the same ones
+    if network:
+        os.environ["NETWORK_PROFILE"] = network
+        suite = f"{suite}@{network}"
+    if device:
+        os.environ["DEVICE_PROFILE"] = device
+        suite = f"{suite}@{device}"
+    if devices:
+        os.environ["DEVICE_MATRIX"] = devices
+        suite = f"{suite}@{devices.replace(',', '+')}"
+
+    # Record performance results in the history store
+    if store_results:
+        os.environ["PERF_STORE"] = "true"
+        os.environ["PERF_SUITE"] = suite
+
     # Build pytest command
     cmd = ["python", "-m", "pytest"]
 
@@ -60,8 +116,52 @@ def main():
     print("="*60)
 
     # Run tests
+    previous_run = latest_run_id(suite) if store_results else None
     result = subprocess.run(cmd)
-    sys.exit(result.returncode)
+    returncode = result.returncode
+
+    if store_results:
+        if check_regressions(suite, previous_run) and fail_on_regression and returncode == 0:
+            returncode = 1
+
+    sys.exit(returncode)
+
+
+def latest_run_id(suite):
+    """Id of the most recent stored run of a suite, None if there is none"""
+    from config import PERF_DB_PATH
+    from results_store import ResultsStore
+
+    if not os.path.exists(PERF_DB_PATH):
+        return None
+    store = ResultsStore(PERF_DB_PATH)
+    try:
+        latest = store.latest_run(suite)
+    finally:
+        store.close()
+    return latest["id"] if latest else None
+
+
+def check_regressions(suite, previous_run=None):
+    """Compare the run just stored against the rolling baseline"""
+    from config import PERF_DB_PATH
+    from regression import detect_regressions, format_regressions
+    from results_store import ResultsStore
+
+    if not os.path.exists(PERF_DB_PATH):
+        return []
+    store = ResultsStore(PERF_DB_PATH)
+    try:
+        latest = store.latest_run(suite)
+        if not latest or latest["id"] == previous_run:
+            return []
+        regressions = detect_regressions(store, latest["id"])
+    finally:
+        store.close()
+
+    print("="*60)
+    print(format_regressions(regressions))
+    return regressions
 
 
 if __name__ == "__main__":
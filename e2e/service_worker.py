@@ -0,0 +1,135 @@
+"""Service worker control and cache-aware page load capture through CDP"""
+
+import math
+
+from config import BASE_URL, SW_IDLE_MS, SW_LOAD_TIMEOUT
+
+
+# Where a response came from; everything but "network" avoided a round trip
+CACHE_SOURCES = ("memory_cache", "http_cache", "sw_cache", "sw_http_cache")
+
+
+def reset_service_worker(driver):
+    """Unregister the service worker and drop its caches and the HTTP cache"""
+    driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+        "origin": BASE_URL,
+        "storageTypes": "service_workers,cache_storage",
+    })
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+
+
+def wait_for_controller(driver):
+    """Wait until sw.js is active, True once it controls the page"""
+    return driver.execute_async_script(
+        "const done = arguments[arguments.length - 1];"
+        "if (!('serviceWorker' in navigator)) { done(false); return; }"
+        "navigator.serviceWorker.ready.then(() => done(!!navigator.serviceWorker.controller));"
+    )
+
+
+def set_offline(driver, offline):
+    """Cut (or restore) the browser's network"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.emulateNetworkConditions", {
+        "offline": offline,
+        "latency": 0,
+        "downloadThroughput": -1,
+        "uploadThroughput": -1,
+    })
+
+
+def _source(response, served_from_memory):
+    if served_from_memory:
+        return "memory_cache"
+    if response.from_disk_cache:
+        return "http_cache"
+    if response.from_service_worker:
+        source = response.service_worker_response_source
+        if source is not None and source.value == "cache-storage":
+            return "sw_cache"
+        if source is not None and source.value == "http-cache":
+            return "sw_http_cache"
+    return "network"
+
+
+def capture_load(driver, url):
+    """Navigate to `url` and return its requests until the network goes idle"""
+    # Network events are needed per request, which execute_cdp_cmd cannot receive
+    import trio
+
+    async def capture():
+        async with driver.bidi_connection() as connection:
+            session, devtools = connection.session, connection.devtools
+            network = devtools.network
+            events = session.listen(
+                network.ResponseReceived, network.LoadingFinished, network.LoadingFailed,
+                network.RequestServedFromCache, devtools.page.LoadEventFired,
+                buffer_size=math.inf,
+            )
+            await session.execute(network.enable())
+            await session.execute(devtools.page.enable())
+            await session.execute(devtools.page.navigate(url))
+
+            requests, from_memory = {}, set()
+            loaded = False
+            with trio.move_on_after(SW_LOAD_TIMEOUT):
+                while True:
+                    with trio.move_on_after(SW_IDLE_MS / 1000) as idle:
+                        event = await events.receive()
+                    if idle.cancelled_caught:
+                        if loaded:
+                            break
+                        continue
+                    if isinstance(event, devtools.page.LoadEventFired):
+                        loaded = True
+                        continue
+                    if isinstance(event, network.RequestServedFromCache):
+                        from_memory.add(event.request_id)
+                        continue
+                    entry = requests.setdefault(event.request_id, {
+                        "type": "Other", "source": "network", "bytes": 0, "failed": False,
+                    })
+                    if isinstance(event, network.ResponseReceived):
+                        entry["type"] = event.type_.value
+                        entry["source"] = _source(event.response, event.request_id in from_memory)
+                    elif isinstance(event, network.LoadingFinished):
+                        entry["bytes"] = event.encoded_data_length
+                    else:
+                        entry["type"] = event.type_.value
+                        entry["failed"] = True
+            return list(requests.values())
+
+    return trio.run(capture)
+
+
+def summarize_load(requests):
+    """Cache hit ratio per resource type and bytes transferred over the network"""
+    by_type = {}
+    for r in requests:
+        hits, total = by_type.get(r["type"], (0, 0))
+        by_type[r["type"]] = (hits + (r["source"] in CACHE_SOURCES), total + 1)
+    return {
+        "requests": len(requests),
+        "failed": sum(r["failed"] for r in requests),
+        "network_requests": sum(r["source"] == "network" and not r["failed"] for r in requests),
+        "transfer_kb": sum(r["bytes"] for r in requests if r["source"] == "network") / 1024,
+        "hit_ratio": {t: hits / total for t, (hits, total) in sorted(by_type.items())},
+    }
+
+
+def first_render(driver):
+    """First contentful paint (ms) of the current document, 0 if it never painted"""
+    return driver.execute_script(
+        "const p = performance.getEntriesByName('first-contentful-paint')[0];"
+        "return p ? p.startTime : 0;"
+    )
+
+
+def rendered_content(driver):
+    """What the page shows: 'app', 'offline_page' (offline.html) or 'error'"""
+    return driver.execute_script(
+        "const root = document.getElementById('root');"
+        "if (root && root.children.length) return 'app';"
+        "if (document.title.includes('Hors ligne')) return 'offline_page';"
+        "return 'error';"
+    )
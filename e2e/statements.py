@@ -0,0 +1,116 @@
+"""
+SQL statement statistics per test and per step, from pg_stat_statements
+
+Snapshots the app database's pg_stat_statements before and after every test
+and every recorder step; the deltas (calls, total time, rows per normalized
+statement) are attached to the test in the HTML report. pg_stat_statements
+is server-wide, so run the suite against a database nothing else is using.
+"""
+
+import os
+import re
+
+from db import connect
+
+
+STATEMENTS_DIR = os.path.join("reports", "db_statements")
+
+
+class StatementTracker:
+    """pg_stat_statements deltas of the current test and its steps"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = 'pg_stat_statements' AND column_name = 'total_exec_time'"
+            )
+            # Renamed from total_time in PostgreSQL 13
+            time_column = "total_exec_time" if cur.fetchone() else "total_time"
+        self.snapshot_sql = (
+            f"SELECT queryid, min(query), sum(calls), sum({time_column}), sum(rows) "
+            "FROM pg_stat_statements "
+            "WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) "
+            "AND query NOT LIKE '%pg_stat_statements%' "
+            "GROUP BY queryid"
+        )
+        self.test_start = None
+        self.steps = []
+
+    @classmethod
+    def connect(cls):
+        """Tracker on the app database, None (with the reason printed) if unavailable"""
+        try:
+            conn = connect()
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+                if not cur.fetchone():
+                    conn.close()
+                    print("pg_stat_statements is not installed "
+                          "(CREATE EXTENSION pg_stat_statements; needs shared_preload_libraries)")
+                    return None
+            return cls(conn)
+        except Exception as e:
+            print(f"SQL statement tracking disabled: {e}")
+            return None
+
+    def snapshot(self):
+        with self.conn.cursor() as cur:
+            cur.execute(self.snapshot_sql)
+            return {row[0]: row[1:] for row in cur.fetchall()}
+
+    @staticmethod
+    def delta(before, after):
+        """Statements that ran between two snapshots, costliest first"""
+        statements = []
+        for queryid, (query, calls, total_ms, rows) in after.items():
+            prev = before.get(queryid, (query, 0, 0.0, 0))
+            if calls - prev[1] <= 0:
+                continue
+            statements.append({
+                "query": " ".join(query.split()),
+                "calls": int(calls - prev[1]),
+                "ms": float(total_ms - prev[2]),
+                "rows": int(rows - prev[3]),
+            })
+        statements.sort(key=lambda s: s["ms"], reverse=True)
+        return statements
+
+    # ---------- per test ----------
+
+    def start_test(self):
+        self.test_start = self.snapshot()
+        self.steps = []
+
+    def add_step(self, name, statements):
+        self.steps.append((name, statements))
+
+    def finish_test(self, nodeid):
+        """Close the current test, return (its statements, report file path)"""
+        if self.test_start is None:
+            return [], None
+        statements = self.delta(self.test_start, self.snapshot())
+        self.test_start = None
+
+        os.makedirs(STATEMENTS_DIR, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", nodeid)[:150]
+        path = os.path.join(STATEMENTS_DIR, f"{safe_name}.txt")
+        with open(path, "w") as f:
+            f.write(format_statements(f"Test {nodeid}", statements))
+            for name, step_statements in self.steps:
+                f.write("\n\n" + format_statements(f"Step {name}", step_statements))
+        return statements, path
+
+    def close(self):
+        self.conn.close()
+
+
+def format_statements(title, statements):
+    calls = sum(s["calls"] for s in statements)
+    total = sum(s["ms"] for s in statements)
+    lines = [f"{title}: {calls} queries, {total:.1f}ms in the database"]
+    lines.append(f"  {'calls':>6} {'total ms':>9} {'rows':>7}  statement")
+    for s in statements:
+        lines.append(f"  {s['calls']:>6} {s['ms']:>9.1f} {s['rows']:>7}  {s['query'][:300]}")
+    return "\n".join(lines)
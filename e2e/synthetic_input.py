@@ -0,0 +1,105 @@
+"""
+Touch, pointer and text input dispatched through the Chrome DevTools Protocol
+
+Events go through Input.dispatch*, so the page sees the same trusted
+mousedown/touchstart/input events as from a real user, without the
+per-character round trips of send_keys or the fixed pauses of ActionChains.
+Touch events are used when the page emulates a touch device (devices.py).
+"""
+
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from config import LONG_PRESS_MS, LONG_PRESS_MARGIN_MS, LONG_PRESS_TIMEOUT
+
+
+# Centre the element without smooth scrolling and return its centre point
+CENTER_SCRIPT = """
+const el = arguments[0];
+el.scrollIntoView({block: 'center', inline: 'center', behavior: 'instant'});
+const r = el.getBoundingClientRect();
+return [r.left + r.width / 2, r.top + r.height / 2, navigator.maxTouchPoints > 1];
+"""
+
+# Focus the input and select its content so inserted text replaces it
+FOCUS_SCRIPT = """
+const el = arguments[0];
+el.scrollIntoView({block: 'center', behavior: 'instant'});
+el.focus();
+if (arguments[1] && typeof el.select === 'function') el.select();
+"""
+
+
+def scroll_into_view(driver, element):
+    """Scroll `element` to the centre of the viewport, instantly"""
+    driver.execute_script(CENTER_SCRIPT, element)
+
+
+def _press(driver, x, y, touch):
+    if touch:
+        driver.execute_cdp_cmd("Input.dispatchTouchEvent", {
+            "type": "touchStart",
+            "touchPoints": [{"x": x, "y": y}],
+        })
+    else:
+        driver.execute_cdp_cmd("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y})
+        driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+            "type": "mousePressed", "x": x, "y": y, "button": "left", "clickCount": 1,
+        })
+
+
+def _release(driver, x, y, touch):
+    if touch:
+        driver.execute_cdp_cmd("Input.dispatchTouchEvent", {"type": "touchEnd", "touchPoints": []})
+    else:
+        driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+            "type": "mouseReleased", "x": x, "y": y, "button": "left", "clickCount": 1,
+        })
+
+
+def tap(driver, element):
+    """Tap (or click) the centre of `element`"""
+    x, y, touch = driver.execute_script(CENTER_SCRIPT, element)
+    _press(driver, x, y, touch)
+    _release(driver, x, y, touch)
+
+
+def long_press(driver, element, until=None, timeout=LONG_PRESS_TIMEOUT,
+               hold_ms=LONG_PRESS_MS + LONG_PRESS_MARGIN_MS):
+    """Press and hold `element` past the app's long-press threshold
+
+    With `until` (a CSS selector), the press is held until a matching element
+    is in the page, so a throttled CPU that fires the app's timer late does not
+    turn it into a tap; returns whether it appeared within `timeout` seconds.
+    Without it, the press is held `hold_ms` and True is returned.
+    """
+    x, y, touch = driver.execute_script(CENTER_SCRIPT, element)
+    # Dispatch returns once the page handled the event, so the app's timer is running
+    _press(driver, x, y, touch)
+    try:
+        if until is None:
+            time.sleep(hold_ms / 1000)
+            return True
+        # execute_script rather than find_elements, which sits in the implicit wait while nothing matches
+        WebDriverWait(driver, timeout, poll_frequency=0.05).until(
+            lambda d: d.execute_script("return document.querySelector(arguments[0]) !== null;", until))
+        return True
+    except TimeoutException:
+        return False
+    finally:
+        _release(driver, x, y, touch)
+
+
+def insert_text(driver, element, text, clear=True):
+    """Type `text` into an input in one input event, replacing its content when `clear`"""
+    driver.execute_script(FOCUS_SCRIPT, element, clear)
+    if text:
+        driver.execute_cdp_cmd("Input.insertText", {"text": text})
+    elif clear:
+        # Nothing to insert over the selection, delete it like a user would
+        for event_type in ("keyDown", "keyUp"):
+            driver.execute_cdp_cmd("Input.dispatchKeyEvent", {
+                "type": event_type, "key": "Backspace", "code": "Backspace", "windowsVirtualKeyCode": 8,
+            })
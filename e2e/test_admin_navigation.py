@@ -19,6 +19,9 @@ from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 from config import BASE_URL, ADMIN_EMAIL, ADMIN_PASSWORD, DEFAULT_TIMEOUT
+from helpers import TUNE_BUTTON, first_route
+from perf import recorder
+from synthetic_input import insert_text
 
 
 class TestAdminNavigation:
@@ -35,9 +38,11 @@ class TestAdminNavigation:
         assert "/routes" in driver.current_url
         print("Admin login successful")
 
-    def test_routes_hub_loads(self, admin_logged_in, page_helpers):
+    @pytest.mark.api_budget
+    def test_routes_hub_loads(self, admin_logged_in, page_helpers, nav_helpers):
         """Test routes hub page loads correctly"""
         driver = admin_logged_in
+        nav_helpers.go_to_routes()
 
         # Verify page title
         title = page_helpers.wait_for_element(By.XPATH, "//h1[contains(text(), 'Exploration')]")
@@ -49,6 +54,7 @@ class TestAdminNavigation:
 
         print("Routes hub loaded successfully")
 
+    @pytest.mark.webdriver_budget(commands=30, sleep=1.5)
     def test_routes_search_filter(self, admin_logged_in, page_helpers):
         """Test search functionality on routes hub"""
         driver = admin_logged_in
@@ -59,26 +65,21 @@ class TestAdminNavigation:
             By.CSS_SELECTOR,
             "input[placeholder*='Rechercher']"
         )
-        search_input.send_keys("test")
+        insert_text(driver, search_input, "test", clear=False)
         time.sleep(1)
 
         print("Search filter tested")
 
+    @pytest.mark.webdriver_budget(commands=15, sleep=1.0)
     def test_routes_toggle_filters_panel(self, admin_logged_in, page_helpers):
         """Test opening the filters panel"""
         driver = admin_logged_in
         page_helpers.wait_for_loading_to_finish()
 
-        # Click the filter button (tune icon)
-        filter_buttons = driver.find_elements(By.CSS_SELECTOR, "button")
-        for btn in filter_buttons:
-            try:
-                icon = btn.find_element(By.CSS_SELECTOR, "span.material-symbols-outlined")
-                if icon.text == "tune":
-                    btn.click()
-                    break
-            except NoSuchElementException:
-                continue
+        # Click the filter button (tune icon), found in one lookup
+        filter_buttons = driver.find_elements(By.XPATH, TUNE_BUTTON)
+        if filter_buttons:
+            filter_buttons[0].click()
 
         time.sleep(0.5)
 
@@ -112,12 +113,13 @@ class TestAdminNavigation:
         # Try to click on a grade filter button (colored buttons)
         grade_buttons = driver.find_elements(By.CSS_SELECTOR, "button.rounded-lg, button.rounded-xl")
         if grade_buttons:
-            for btn in grade_buttons[:3]:  # Try first 3 buttons
-                try:
-                    btn.click()
-                    time.sleep(0.3)
-                except:
-                    continue
+            with recorder.interaction(driver, "grade_filter_panel"):
+                for btn in grade_buttons[:3]:  # Try first 3 buttons
+                    try:
+                        btn.click()
+                        time.sleep(0.3)
+                    except:
+                        continue
 
         print("Grade filter tested")
 
@@ -143,24 +145,17 @@ class TestAdminNavigation:
 
     # ========== ROUTE DETAIL ==========
 
-    def test_route_detail_page(self, admin_logged_in, page_helpers):
+    @pytest.mark.api_budget
+    def test_route_detail_page(self, admin_logged_in, page_helpers, nav_helpers):
         """Test navigating to a route detail page"""
         driver = admin_logged_in
-        page_helpers.wait_for_loading_to_finish()
-        time.sleep(1)
-
-        # Find a route card and click it
-        route_cards = driver.find_elements(By.CSS_SELECTOR, "a[href*='/routes/']")
-        if route_cards:
-            route_cards[0].click()
-            page_helpers.wait_for_loading_to_finish()
-            time.sleep(0.5)
+        route = first_route()
+        nav_helpers.go_to_route(route["id"])
 
-            # Verify we're on a route detail page
-            assert "/routes/" in driver.current_url
-            print("Route detail page loaded")
-        else:
-            print("No route cards found to click")
+        # Verify we're on the route's detail page
+        assert f"/routes/{route['id']}" in driver.current_url
+        assert route["name"] in driver.execute_script("return document.body.textContent")
+        print("Route detail page loaded")
 
     def test_route_detail_status_buttons(self, admin_logged_in, page_helpers):
         """Test route detail page has admin status buttons"""
@@ -222,6 +217,7 @@ class TestAdminNavigation:
 
     # ========== LEADERBOARD ==========
 
+    @pytest.mark.api_budget
     def test_leaderboard_page(self, admin_logged_in, page_helpers, nav_helpers):
         """Test leaderboard page loads"""
         driver = admin_logged_in
@@ -274,8 +270,9 @@ class TestAdminNavigation:
         # Look for a details button or clickable user card
         details_buttons = driver.find_elements(By.XPATH, "//button[contains(., 'Details') or contains(., 'details')]")
         if details_buttons:
-            details_buttons[0].click()
-            time.sleep(1)
+            with recorder.interaction(driver, "kiviat_details_modal"):
+                details_buttons[0].click()
+                time.sleep(1)
 
             # Check if modal opened
             modal_exists = page_helpers.element_exists(
@@ -301,6 +298,7 @@ class TestAdminNavigation:
 
     # ========== FRIENDS ==========
 
+    @pytest.mark.api_budget
     def test_friends_page(self, admin_logged_in, page_helpers, nav_helpers):
         """Test friends page loads"""
         driver = admin_logged_in
@@ -365,7 +363,7 @@ class TestAdminNavigation:
         assert search_input is not None
 
         # Try searching
-        search_input.send_keys("test")
+        insert_text(driver, search_input, "test", clear=False)
 
         # Click search button
         search_buttons = driver.find_elements(By.CSS_SELECTOR, "button")
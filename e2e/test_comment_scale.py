@@ -0,0 +1,253 @@
+"""
+Comment thread scale test
+
+Seeds one route per COMMENT_SCALE_SIZES entry (10, 1k, 10k comments by
+default) and draws the scaling curve of:
+- GET /api/comments/route/:routeId: latency and payload of the page the app
+  asks for (the API's default limit), of the last page (OFFSET cost) and of
+  the whole thread in one response
+- CommentList on the route detail page: time from the comments response to
+  the painted list, JS heap and DOM nodes, as shipped and with the whole
+  thread requested (what the page would cost without pagination)
+
+The curve goes to reports/comment_scale.csv and the performance history;
+the size at which the unpaginated list crosses COMMENT_SCALE_RENDER_BUDGET_MS
+or the response crosses COMMENT_SCALE_PAYLOAD_BUDGET_KB is printed as the
+point where pagination or virtualisation becomes necessary.
+
+Run with: python run_tests.py comments
+"""
+
+import csv
+import json
+import os
+
+import pytest
+from selenium.webdriver.support.ui import WebDriverWait
+
+from api_client import ApiClient
+from config import (
+    BASE_URL,
+    LONG_TIMEOUT,
+    ADMIN_EMAIL,
+    ADMIN_PASSWORD,
+    COMMENT_SCALE,
+    COMMENT_SCALE_SIZES,
+    COMMENT_SCALE_API_REPEATS,
+    COMMENT_SCALE_RENDER_BUDGET_MS,
+    COMMENT_SCALE_PAYLOAD_BUDGET_KB,
+)
+from memory import memory_sample
+from perf import recorder
+from perf_stats import median
+
+
+pytestmark = pytest.mark.skipif(not COMMENT_SCALE, reason="comment scale mode only (python run_tests.py comments)")
+
+ROUTE_PREFIX = "CS bench"
+# Page size of GET /api/comments/route/:routeId when no limit is given (comments.ts), which CommentList relies on
+API_DEFAULT_LIMIT = 20
+
+# Rewrites the comments request to `limit` (null: as the app sends it) and times
+# the response -> list committed (marker comment in the DOM) -> next frame
+COMMENT_RENDER_PROBE = """
+(() => {
+  const limit = %(limit)s, marker = %(marker)s;
+  const state = window.__commentScale = {};
+  const originalFetch = window.fetch;
+  window.fetch = async function (input, init) {
+    let url = typeof input === 'string' ? input : input.url;
+    if (!url.includes('/api/comments/route/')) return originalFetch.call(this, input, init);
+    if (limit) {
+      const u = new URL(url, location.href);
+      u.searchParams.set('limit', limit);
+      input = typeof input === 'string' ? u.href : new Request(u.href, input);
+    }
+    const response = await originalFetch.call(this, input, init);
+    state.responseAt = performance.now();
+    return response;
+  };
+  new MutationObserver((mutations, observer) => {
+    if (!state.responseAt) return;
+    for (const m of mutations) {
+      for (const node of m.addedNodes) {
+        if (node.textContent && node.textContent.includes(marker)) {
+          state.committedAt = performance.now();
+          observer.disconnect();
+          requestAnimationFrame(() => setTimeout(() => { state.paintedAt = performance.now(); }));
+          return;
+        }
+      }
+    }
+  }).observe(document, {childList: true, subtree: true});
+})();
+"""
+
+# comments -> column -> value, filled by both tests and written out at the end
+curve = {}
+
+
+def comment_marker(index):
+    """Text unique to the index-th newest seeded comment"""
+    return f"{ROUTE_PREFIX} comment #{index}."
+
+
+@pytest.fixture(scope="module")
+def comment_threads():
+    """{size: route id} of seeded routes with that many comments, removed afterwards"""
+    from db import connect
+
+    conn = connect()
+    delete_threads(conn)
+    threads = {}
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM users WHERE email = %s", (ADMIN_EMAIL,))
+        admin_id = cur.fetchone()[0]
+        for size in COMMENT_SCALE_SIZES:
+            cur.execute(
+                "INSERT INTO routes (id, name, difficulty, hold_color_hex, hold_color_category, sector, "
+                "opener_id, main_photo, status, opened_at, created_at, updated_at) "
+                "VALUES (gen_random_uuid(), %s, 'Rouge', '#FF5733', 'red', 'Secteur A', %s, "
+                "'/uploads/routes/bench.jpg', 'ACTIVE', now(), now(), now()) RETURNING id",
+                (f"{ROUTE_PREFIX} {size}", admin_id),
+            )
+            route_id = cur.fetchone()[0]
+            # Comment #0 is the newest, one a minute back in time
+            cur.execute(
+                "INSERT INTO comments (id, content, user_id, route_id, created_at) "
+                "SELECT gen_random_uuid(), %(prefix)s || ' comment #' || g || '. ' "
+                "|| 'Belle voie, le crux au troisieme point est dur pour les petits.', "
+                "%(user)s, %(route)s, now() - g * interval '1 minute' "
+                "FROM generate_series(0, %(size)s - 1) g",
+                {"prefix": ROUTE_PREFIX, "user": admin_id, "route": route_id, "size": size},
+            )
+            threads[size] = route_id
+        cur.execute("ANALYZE comments")
+    print(f"\nSeeded comment threads of {', '.join(str(s) for s in COMMENT_SCALE_SIZES)} comments")
+
+    yield threads
+
+    delete_threads(conn)
+    conn.close()
+    write_curve()
+
+
+def delete_threads(conn):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM comments WHERE route_id IN (SELECT id FROM routes WHERE name LIKE %s)",
+                    (f"{ROUTE_PREFIX} %",))
+        cur.execute("DELETE FROM routes WHERE name LIKE %s", (f"{ROUTE_PREFIX} %",))
+
+
+def write_curve():
+    if not curve:
+        return
+    path = os.path.join("reports", "comment_scale.csv")
+    os.makedirs("reports", exist_ok=True)
+    columns = sorted({column for row in curve.values() for column in row})
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["comments", *columns])
+        writer.writeheader()
+        for size in sorted(curve):
+            writer.writerow({"comments": size, **curve[size]})
+    recorder.attach("Comment thread scaling curve (CSV)", path)
+
+
+def crossing(points, budget):
+    """Comment count at which the (comments, value) curve first reaches `budget`, linearly interpolated"""
+    previous = None
+    for size, value in sorted(points):
+        if value >= budget:
+            if previous is None or value == previous[1]:
+                return size
+            (s0, v0) = previous
+            return round(s0 + (budget - v0) * (size - s0) / (value - v0))
+        previous = (size, value)
+    return None
+
+
+def print_threshold(what, points, budget, unit):
+    size = crossing(points, budget)
+    if size is None:
+        print(f"  {what} stays under {budget}{unit} up to {max(s for s, _ in points)} comments")
+    else:
+        print(f"  {what} reaches {budget}{unit} at ~{size} comments: paginate or virtualise below that")
+
+
+def timed_get(api, route_id, **params):
+    """(median ms, KB) of GET /api/comments/route/:routeId over COMMENT_SCALE_API_REPEATS requests"""
+    times, size_kb = [], 0
+    for _ in range(COMMENT_SCALE_API_REPEATS):
+        response = api.request("GET", f"/api/comments/route/{route_id}", params=params)
+        assert response.ok, f"GET comments answered {response.status}"
+        times.append(response.elapsed_ms)
+        size_kb = len(response.body) / 1024
+    return median(times), size_kb
+
+
+def render_comments(driver, route_id, limit, marker):
+    """Comments response -> painted list (ms), then heap and DOM after a forced GC"""
+    script = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": COMMENT_RENDER_PROBE % {"limit": json.dumps(limit), "marker": json.dumps(marker)},
+    })
+    try:
+        driver.get(f"{BASE_URL}/routes/{route_id}")
+        state = WebDriverWait(driver, LONG_TIMEOUT * 4).until(
+            lambda d: d.execute_script("const s = window.__commentScale; return s && s.paintedAt ? s : null")
+        )
+    finally:
+        driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script["identifier"]})
+    return state["paintedAt"] - state["responseAt"], memory_sample(driver)
+
+
+class TestCommentScale:
+    """Cost of long comment threads, API and CommentList"""
+
+    def test_api_scaling(self, comment_threads):
+        """Latency and payload of the comments endpoint per thread size"""
+        print(f"\n  {'comments':>8}  {'page 1':>16}  {'last page':>9}  {'whole thread':>18}")
+        with ApiClient(pool_size=1) as api:
+            api.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)
+            for size, route_id in comment_threads.items():
+                first_ms, first_kb = timed_get(api, route_id)
+                last_page = max(1, -(-size // API_DEFAULT_LIMIT))
+                last_ms, _ = timed_get(api, route_id, page=last_page)
+                all_ms, all_kb = timed_get(api, route_id, limit=size)
+                curve.setdefault(size, {}).update(
+                    api_page_ms=first_ms, api_page_kb=first_kb, api_last_page_ms=last_ms,
+                    api_all_ms=all_ms, api_all_kb=all_kb,
+                )
+                for name, value in curve[size].items():
+                    if name.startswith("api_"):
+                        recorder.record("comment_scale", f"{size}:{name}", value)
+                print(f"  {size:>8}  {first_ms:>7.1f}ms {first_kb:>5.1f}KB  {last_ms:>7.1f}ms  "
+                      f"{all_ms:>7.1f}ms {all_kb:>7.1f}KB")
+
+        print_threshold("Whole-thread response", [(s, c["api_all_kb"]) for s, c in curve.items()],
+                        COMMENT_SCALE_PAYLOAD_BUDGET_KB, "KB")
+
+    def test_render_scaling(self, comment_threads, admin_logged_in):
+        """CommentList render time and memory per thread size"""
+        driver = admin_logged_in
+        failures = []
+        print(f"\n  {'comments':>8}  {'as shipped':>24}  {'whole thread':>26}")
+        for size, route_id in comment_threads.items():
+            shown = min(size, API_DEFAULT_LIMIT)
+            app_ms, app_memory = render_comments(driver, route_id, None, comment_marker(shown - 1))
+            all_ms, all_memory = render_comments(driver, route_id, size, comment_marker(size - 1))
+            curve.setdefault(size, {}).update(
+                render_page_ms=app_ms, heap_page_kb=app_memory["js_heap_kb"], nodes_page=app_memory["dom_nodes"],
+                render_all_ms=all_ms, heap_all_kb=all_memory["js_heap_kb"], nodes_all=all_memory["dom_nodes"],
+            )
+            for name in ("render_page_ms", "heap_page_kb", "nodes_page", "render_all_ms", "heap_all_kb", "nodes_all"):
+                recorder.record("comment_scale", f"{size}:{name}", curve[size][name])
+            print(f"  {size:>8}  {app_ms:>7.0f}ms {app_memory['js_heap_kb']:>7.0f}KB {app_memory['dom_nodes']:>6.0f}n"
+                  f"  {all_ms:>7.0f}ms {all_memory['js_heap_kb']:>8.0f}KB {all_memory['dom_nodes']:>7.0f}n")
+            if app_ms > COMMENT_SCALE_RENDER_BUDGET_MS:
+                failures.append(f"{size} comments: {app_ms:.0f}ms")
+
+        print_threshold("Unpaginated CommentList", [(s, c["render_all_ms"]) for s, c in curve.items()],
+                        COMMENT_SCALE_RENDER_BUDGET_MS, "ms")
+        # The whole-thread curve is informational; what users get must stay within budget
+        assert not failures, (f"CommentList as shipped exceeds {COMMENT_SCALE_RENDER_BUDGET_MS}ms: "
+                              f"{', '.join(failures)}")
@@ -23,57 +23,52 @@ Run with: pnpm test:e2e:full
 import pytest
 import time
 import uuid
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 
+from helpers import create_chrome_driver
+from perf import recorder
+from synthetic_input import insert_text, long_press
 from config import (
     BASE_URL,
     ADMIN_EMAIL,
     ADMIN_PASSWORD,
     DEFAULT_TIMEOUT,
     LONG_TIMEOUT,
-    HEADLESS,
-    WINDOW_WIDTH,
-    WINDOW_HEIGHT
+    DEVICE_MATRIX,
 )
 
+# Overlay of QuickStatusMenu, rendered once the long press fired
+QUICK_STATUS_MENU = ".fixed.inset-0.z-50"
+
 
 class TestFullUserJourney:
     """Complete E2E test in a single browser session"""
 
     @pytest.fixture(scope="class")
-    def browser(self):
+    def browser(self, request, device):
         """Create a single browser instance for all tests in this class"""
-        chrome_options = Options()
-
-        if HEADLESS:
-            chrome_options.add_argument("--headless")
+        if DEVICE_MATRIX:
+            from devices import switch_device
 
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument(f"--window-size={WINDOW_WIDTH},{WINDOW_HEIGHT}")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-extensions")
+            # Same warm browser for every device of the matrix
+            driver = request.getfixturevalue("warm_browser")
+            switch_device(driver, device)
+            yield driver
+            return
 
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.implicitly_wait(5)
+        driver = create_chrome_driver()
 
         yield driver
 
         driver.quit()
 
     @pytest.fixture(scope="class")
-    def test_data(self):
-        """Shared test data across all tests"""
+    def test_data(self, device):
+        """Shared test data across all tests (fresh per device of the matrix)"""
         unique_id = uuid.uuid4().hex[:8]
         return {
             "lambda_email": f"selenium_test_{unique_id}@climbtracker.com",
@@ -121,20 +116,17 @@ class TestFullUserJourney:
     def click_tab(self, driver, tab_text):
         """Click a tab button by text"""
         try:
-            btn = self.wait_for_clickable(driver, By.XPATH, f"//button[contains(., '{tab_text}')]", timeout=5)
-            btn.click()
-            time.sleep(0.5)
+            with recorder.step(f"tab:{tab_text}"):
+                btn = self.wait_for_clickable(driver, By.XPATH, f"//button[contains(., '{tab_text}')]", timeout=5)
+                btn.click()
+                time.sleep(0.5)
             return True
         except TimeoutException:
             return False
 
-    def long_press(self, driver, element, duration=1.5):
-        """Perform a long press on an element"""
-        actions = ActionChains(driver)
-        actions.click_and_hold(element)
-        actions.pause(duration)
-        actions.release()
-        actions.perform()
+    def long_press(self, driver, element):
+        """Long press an element, held until the quick status menu opens; returns whether it did"""
+        return long_press(driver, element, until=QUICK_STATUS_MENU)
 
     def login(self, driver, email, password):
         """Login with credentials"""
@@ -142,12 +134,10 @@ class TestFullUserJourney:
         time.sleep(0.5)
 
         email_input = self.wait_for_element(driver, By.CSS_SELECTOR, "input[type='email']")
-        email_input.clear()
-        email_input.send_keys(email)
+        insert_text(driver, email_input, email)
 
         password_input = self.wait_for_element(driver, By.CSS_SELECTOR, "input[type='password']")
-        password_input.clear()
-        password_input.send_keys(password)
+        insert_text(driver, password_input, password)
 
         login_btn = self.wait_for_clickable(driver, By.CSS_SELECTOR, "button[type='submit']")
         login_btn.click()
@@ -168,17 +158,14 @@ class TestFullUserJourney:
         time.sleep(0.5)
 
         name_input = self.wait_for_element(driver, By.CSS_SELECTOR, "input[type='text']")
-        name_input.clear()
-        name_input.send_keys(name)
+        insert_text(driver, name_input, name)
 
         email_input = self.wait_for_element(driver, By.CSS_SELECTOR, "input[type='email']")
-        email_input.clear()
-        email_input.send_keys(email)
+        insert_text(driver, email_input, email)
 
         password_inputs = driver.find_elements(By.CSS_SELECTOR, "input[type='password']")
         for pwd_input in password_inputs:
-            pwd_input.clear()
-            pwd_input.send_keys(password)
+            insert_text(driver, pwd_input, password)
 
         register_btn = self.wait_for_clickable(driver, By.CSS_SELECTOR, "button[type='submit']")
         register_btn.click()
@@ -215,8 +202,7 @@ class TestFullUserJourney:
             inputs = driver.find_elements(By.CSS_SELECTOR, "input[type='text'], input:not([type])")
             if inputs:
                 # First text input is usually the name
-                inputs[0].clear()
-                inputs[0].send_keys(test_data["test_route_name"])
+                insert_text(driver, inputs[0], test_data["test_route_name"])
                 print(f"  Entered route name: {test_data['test_route_name']}")
 
             # Try to select difficulty (click on a colored button)
@@ -263,9 +249,9 @@ class TestFullUserJourney:
 
         # Test search
         search_input = self.wait_for_element(driver, By.CSS_SELECTOR, "input[placeholder*='Rechercher']")
-        search_input.send_keys("test")
+        insert_text(driver, search_input, "test")
         time.sleep(0.5)
-        search_input.clear()
+        insert_text(driver, search_input, "")
         print("  Search filter tested")
 
         # Open filters panel
@@ -276,13 +262,14 @@ class TestFullUserJourney:
         # Click some grade filters
         grade_buttons = driver.find_elements(By.CSS_SELECTOR, "button.rounded-lg, button.rounded-xl")
         clicked = 0
-        for btn in grade_buttons[:3]:
-            try:
-                btn.click()
-                clicked += 1
-                time.sleep(0.2)
-            except:
-                continue
+        with recorder.interaction(driver, "grade_filter_panel"):
+            for btn in grade_buttons[:3]:
+                try:
+                    btn.click()
+                    clicked += 1
+                    time.sleep(0.2)
+                except:
+                    continue
         print(f"  Clicked {clicked} filter buttons")
 
         # Toggle view mode
@@ -313,14 +300,9 @@ class TestFullUserJourney:
             # Try long press on first route card
             try:
                 card = route_cards[0]
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
-                time.sleep(0.3)
-
-                self.long_press(driver, card, 1.5)
-                time.sleep(1)
 
-                # Check if a menu/modal appeared
-                menu_visible = len(driver.find_elements(By.CSS_SELECTOR, ".fixed, [role='menu'], [role='dialog']")) > 0
+                with recorder.interaction(driver, "quick_status_menu"):
+                    menu_visible = self.long_press(driver, card)
 
                 if menu_visible:
                     print("  Quick status menu appeared")
@@ -427,8 +409,9 @@ class TestFullUserJourney:
         # Try to open details modal
         details_btns = driver.find_elements(By.XPATH, "//button[contains(., 'Details') or contains(., 'details') or contains(., 'Détails')]")
         if details_btns:
-            details_btns[0].click()
-            time.sleep(1)
+            with recorder.interaction(driver, "kiviat_details_modal"):
+                details_btns[0].click()
+                time.sleep(1)
 
             # Check if modal opened
             modal = driver.find_elements(By.CSS_SELECTOR, ".fixed.inset-0, [role='dialog']")
@@ -465,8 +448,7 @@ class TestFullUserJourney:
 
         # Test search functionality
         search_input = self.wait_for_element(driver, By.CSS_SELECTOR, "input[placeholder*='Rechercher']")
-        search_input.clear()
-        search_input.send_keys("test")
+        insert_text(driver, search_input, "test")
 
         # Click search button
         self.click_icon_button(driver, "search")
@@ -595,11 +577,9 @@ class TestFullUserJourney:
 
         if route_cards:
             card = route_cards[0]
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
-            time.sleep(0.3)
 
-            self.long_press(driver, card, 1.5)
-            time.sleep(1)
+            with recorder.interaction(driver, "quick_status_menu"):
+                self.long_press(driver, card)
 
             # Try to select validation status
             status_options = driver.find_elements(By.XPATH, "//button[contains(., 'Projet') or contains(., 'Essai') or contains(., 'Flash')]")
@@ -659,8 +639,7 @@ class TestFullUserJourney:
 
         # Search for admin
         search_input = self.wait_for_element(driver, By.CSS_SELECTOR, "input[placeholder*='Rechercher']")
-        search_input.clear()
-        search_input.send_keys("admin")
+        insert_text(driver, search_input, "admin")
 
         self.click_icon_button(driver, "search")
         time.sleep(1)
@@ -701,8 +680,9 @@ class TestFullUserJourney:
         # Try details modal
         details_btns = driver.find_elements(By.XPATH, "//button[contains(., 'Details')]")
         if details_btns:
-            details_btns[0].click()
-            time.sleep(1)
+            with recorder.interaction(driver, "kiviat_details_modal"):
+                details_btns[0].click()
+                time.sleep(1)
             self.click_icon_button(driver, "close")
             print("  Details modal tested")
 
@@ -26,6 +26,9 @@ from config import (
     LAMBDA_USER_NAME,
     DEFAULT_TIMEOUT
 )
+from helpers import TUNE_BUTTON
+from perf import recorder
+from synthetic_input import insert_text
 
 
 class TestLambdaUserNavigation:
@@ -101,6 +104,7 @@ class TestLambdaUserNavigation:
         # Note: This might still be visible, depends on implementation
         print(f"Create route FAB visible for lambda: {fab_exists}")
 
+    @pytest.mark.webdriver_budget(commands=30, sleep=1.5)
     def test_routes_search_filter(self, lambda_logged_in, page_helpers):
         """Test search functionality on routes hub"""
         driver = lambda_logged_in
@@ -111,26 +115,21 @@ class TestLambdaUserNavigation:
             By.CSS_SELECTOR,
             "input[placeholder*='Rechercher']"
         )
-        search_input.send_keys("test")
+        insert_text(driver, search_input, "test", clear=False)
         time.sleep(1)
 
         print("Search filter tested for lambda user")
 
+    @pytest.mark.webdriver_budget(commands=15, sleep=1.0)
     def test_routes_toggle_filters_panel(self, lambda_logged_in, page_helpers):
         """Test opening the filters panel"""
         driver = lambda_logged_in
         page_helpers.wait_for_loading_to_finish()
 
-        # Click the filter button (tune icon)
-        filter_buttons = driver.find_elements(By.CSS_SELECTOR, "button")
-        for btn in filter_buttons:
-            try:
-                icon = btn.find_element(By.CSS_SELECTOR, "span.material-symbols-outlined")
-                if icon.text == "tune":
-                    btn.click()
-                    break
-            except NoSuchElementException:
-                continue
+        # Click the filter button (tune icon), found in one lookup
+        filter_buttons = driver.find_elements(By.XPATH, TUNE_BUTTON)
+        if filter_buttons:
+            filter_buttons[0].click()
 
         time.sleep(0.5)
 
@@ -164,13 +163,14 @@ class TestLambdaUserNavigation:
         # Try clicking various filter buttons
         filter_buttons = driver.find_elements(By.CSS_SELECTOR, "button.rounded-lg, button.rounded-xl, button.rounded-full")
         clicked_count = 0
-        for btn in filter_buttons[:5]:
-            try:
-                btn.click()
-                clicked_count += 1
-                time.sleep(0.2)
-            except:
-                continue
+        with recorder.interaction(driver, "grade_filter_panel"):
+            for btn in filter_buttons[:5]:
+                try:
+                    btn.click()
+                    clicked_count += 1
+                    time.sleep(0.2)
+                except:
+                    continue
 
         print(f"Clicked {clicked_count} filter buttons")
 
@@ -293,8 +293,9 @@ class TestLambdaUserNavigation:
         # Look for a details button
         details_buttons = driver.find_elements(By.XPATH, "//button[contains(., 'Details') or contains(., 'details')]")
         if details_buttons:
-            details_buttons[0].click()
-            time.sleep(1)
+            with recorder.interaction(driver, "kiviat_details_modal"):
+                details_buttons[0].click()
+                time.sleep(1)
 
             # Check if modal opened
             modal_exists = page_helpers.element_exists(
@@ -368,7 +369,7 @@ class TestLambdaUserNavigation:
             By.CSS_SELECTOR,
             "input[placeholder*='Rechercher']"
         )
-        search_input.send_keys("admin")
+        insert_text(driver, search_input, "admin", clear=False)
 
         # Click search button
         search_buttons = driver.find_elements(By.CSS_SELECTOR, "button")
@@ -0,0 +1,57 @@
+"""
+E2E Tests under emulated network conditions
+
+Loads the routes hub and the leaderboard under each profile of
+NETWORK_PROFILES (gym Wi-Fi, 3G, flaky...) and records time-to-interactive
+and API wait, so payload size and request waterfalls show up as numbers in
+the performance history.
+
+Run with: python run_tests.py network
+"""
+
+import pytest
+
+from config import NETWORK_PROFILES
+from perf import recorder
+
+
+PAGES = ["routes", "leaderboard"]
+
+
+def page_metrics(test, page):
+    """Latest navigation metrics recorded for a page in this test"""
+    metrics = {}
+    for sample in recorder.samples:
+        if sample["test"] != test:
+            continue
+        if sample["name"] == f"nav:{page}":
+            metrics["load"] = sample["value"]
+        elif sample["name"].startswith(f"{page}:"):
+            metrics[sample["name"].split(":", 1)[1]] = sample["value"]
+    return metrics
+
+
+class TestNetworkProfiles:
+    """Key pages under each network profile"""
+
+    @pytest.mark.parametrize("profile", [
+        pytest.param(name, marks=pytest.mark.network_profile(name)) for name in NETWORK_PROFILES
+    ])
+    def test_key_pages_under_profile(self, profile, admin_logged_in, nav_helpers, request):
+        """Routes hub and leaderboard load and report TTI / API wait"""
+        driver = admin_logged_in
+
+        nav_helpers.go_to_routes()
+        assert "/routes" in driver.current_url
+        nav_helpers.go_to_leaderboard()
+        assert "/leaderboard" in driver.current_url
+
+        print(f"\nProfile {profile}:")
+        for page in PAGES:
+            m = page_metrics(request.node.nodeid, page)
+            print(
+                f"  {page:<12} load {m.get('load', 0):>7.0f}ms  "
+                f"tti {m.get('tti', 0):>7.0f}ms  "
+                f"api wait {m.get('api_wait', 0):>7.0f}ms  "
+                f"({m.get('api_requests', 0):.0f} API requests)"
+            )
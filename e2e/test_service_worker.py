@@ -0,0 +1,90 @@
+"""
+Service worker cache effectiveness (cold vs. warm vs. offline)
+
+Loads key pages in three states:
+- cold     no service worker, empty caches
+- warm     sw.js installed and controlling the page, its cache populated
+- offline  warm, then the network cut
+
+The HTTP cache is cleared before every measured load so hits come from the
+service worker alone. Each load records the cache hit ratio per resource
+type, the bytes transferred over the network and the first contentful
+paint, so a change in caching strategy shows up in the performance history.
+
+Run with: python run_tests.py sw
+"""
+
+import pytest
+
+from config import BASE_URL, SW_PAGES, SW_REPEATS
+from perf import recorder
+from service_worker import (
+    reset_service_worker,
+    wait_for_controller,
+    set_offline,
+    capture_load,
+    summarize_load,
+    first_render,
+    rendered_content,
+)
+
+
+MODES = ["cold", "warm", "offline"]
+
+
+def prepare(driver, page_helpers, mode, url):
+    """Put the browser in the state of a mode before a measured load"""
+    set_offline(driver, False)
+    reset_service_worker(driver)
+    if mode == "cold":
+        return
+
+    # First load installs sw.js, the second goes through its fetch handler and fills the cache
+    driver.get(url)
+    wait_for_controller(driver)
+    driver.get(url)
+    page_helpers.wait_for_loading_to_finish()
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    if mode == "offline":
+        set_offline(driver, True)
+
+
+class TestServiceWorker:
+    """What the service worker saves on key pages"""
+
+    @pytest.mark.parametrize("mode", MODES)
+    def test_page_loads(self, mode, admin_logged_in, page_helpers):
+        """Cache hit ratio, transfer size and first render per page"""
+        driver = admin_logged_in
+        print(f"\nService worker {mode}:")
+        try:
+            for path in SW_PAGES:
+                page = path.strip("/") or "dashboard"
+                url = f"{BASE_URL}{path}"
+                for _ in range(SW_REPEATS):
+                    prepare(driver, page_helpers, mode, url)
+                    load = summarize_load(capture_load(driver, url))
+                    render = first_render(driver)
+                    content = rendered_content(driver)
+
+                    if render > 0:
+                        recorder.record("sw", f"{mode}:{page}:first_render", render)
+                    recorder.record("sw", f"{mode}:{page}:transfer_kb", load["transfer_kb"])
+                    recorder.record("sw", f"{mode}:{page}:network_requests", load["network_requests"])
+                    # Stored as misses so a drop in caching reads as a regression
+                    for resource_type, ratio in load["hit_ratio"].items():
+                        recorder.record("sw", f"{mode}:{page}:cache_miss_pct:{resource_type}",
+                                        (1 - ratio) * 100)
+
+                hit_ratios = ", ".join(f"{t} {r * 100:.0f}%" for t, r in load["hit_ratio"].items())
+                print(
+                    f"  {page:<12} first render {render:>6.0f}ms  "
+                    f"{load['transfer_kb']:>7.1f}KB over {load['network_requests']} network requests  "
+                    f"shows {content}"
+                )
+                print(f"  {'':<12} cache hits: {hit_ratios or 'none'}")
+
+                if mode == "offline":
+                    assert content != "error", f"{path} shows the browser error page offline"
+        finally:
+            set_offline(driver, False)
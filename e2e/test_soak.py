@@ -0,0 +1,88 @@
+"""
+Soak test: memory retention over repeated navigation cycles
+
+Loops routes hub -> route detail -> leaderboard -> friends in one tab with
+client-side navigation (no reloads, like a user keeping the PWA open for a
+whole session). After every cycle the JS heap, DOM nodes, event listeners
+and detached nodes are sampled after a forced GC. A linear trend is fitted
+over the cycles following the warm-up, and the test fails when the retained
+growth it predicts over the soak exceeds SOAK_TOLERANCES.
+
+Run with: python run_tests.py soak
+"""
+
+import csv
+import os
+
+import pytest
+
+from config import (
+    SOAK,
+    SOAK_CYCLES,
+    SOAK_WARMUP_CYCLES,
+    SOAK_HEAP_SNAPSHOTS,
+    SOAK_TOLERANCES,
+)
+from helpers import first_route
+from memory import memory_sample, take_heap_snapshot
+from perf import recorder
+from perf_stats import linear_trend
+
+
+pytestmark = pytest.mark.skipif(not SOAK, reason="soak mode only (python run_tests.py soak)")
+
+
+class TestSoak:
+    """Memory retention of a long-lived session"""
+
+    def test_navigation_cycle_memory(self, admin_logged_in, nav_helpers):
+        """Repeated navigation cycles do not retain memory"""
+        driver = admin_logged_in
+        route = first_route()
+        nav_helpers.go_to_routes()
+
+        samples = []
+        for cycle in range(SOAK_CYCLES):
+            nav_helpers.navigate_in_app("/routes", "routes")
+            nav_helpers.navigate_in_app(f"/routes/{route['id']}", "route_detail")
+            if cycle == 0:
+                assert route["name"] in driver.execute_script("return document.body.textContent"), \
+                    f"Route detail of '{route['name']}' did not render"
+            nav_helpers.navigate_in_app("/leaderboard", "leaderboard")
+            nav_helpers.navigate_in_app("/friends", "friends")
+
+            samples.append(memory_sample(driver))
+            if SOAK_HEAP_SNAPSHOTS and cycle in (0, SOAK_CYCLES - 1):
+                label = "first" if cycle == 0 else "last"
+                recorder.attach(f"Heap snapshot ({label} cycle)",
+                                take_heap_snapshot(driver, f"soak_{label}"))
+            if cycle % 25 == 0:
+                print(f"  Cycle {cycle}: heap {samples[-1]['js_heap_kb']:.0f}KB, "
+                      f"{samples[-1]['dom_nodes']:.0f} nodes")
+
+        # Per-cycle values for plotting
+        path = os.path.join("reports", "soak_memory.csv")
+        os.makedirs("reports", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["cycle", *samples[0]])
+            writer.writeheader()
+            for cycle, sample in enumerate(samples):
+                writer.writerow({"cycle": cycle, **sample})
+        recorder.attach("Memory per cycle (CSV)", path)
+
+        measured = samples[SOAK_WARMUP_CYCLES:] if len(samples) > SOAK_WARMUP_CYCLES + 1 else samples
+        leaks = []
+        print(f"\nRetained growth over {len(measured)} cycles (after {SOAK_WARMUP_CYCLES} warm-up):")
+        for metric, tolerance in SOAK_TOLERANCES.items():
+            if metric not in measured[0]:
+                continue
+            slope, _ = linear_trend([s[metric] for s in measured])
+            growth = slope * (len(measured) - 1)
+            recorder.record("memory", f"{metric}:growth", growth)
+            recorder.record("memory", f"{metric}:final", measured[-1][metric])
+            status = "LEAK" if growth > tolerance else "ok"
+            print(f"  {metric:<16} {slope:>+9.2f}/cycle  {growth:>+10.0f} (tolerance {tolerance})  {status}")
+            if growth > tolerance:
+                leaks.append(f"{metric} +{growth:.0f} (tolerance {tolerance})")
+
+        assert not leaks, f"Memory grows across navigation cycles: {', '.join(leaks)}"
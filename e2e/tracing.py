@@ -0,0 +1,65 @@
+"""Chrome performance tracing for slow E2E steps"""
+
+import json
+import os
+import re
+import time
+from collections import deque
+
+from selenium.common.exceptions import WebDriverException
+
+from config import TRACE_BUFFER_EVENTS
+
+
+# Timeline (layout, paint), JS execution and sampled CPU profile events
+TRACE_CATEGORIES = ",".join([
+    "devtools.timeline",
+    "disabled-by-default-devtools.timeline",
+    "disabled-by-default-devtools.timeline.frame",
+    "v8.execute",
+    "disabled-by-default-v8.cpu_profiler",
+    "blink.user_timing",
+    "loading",
+])
+
+TRACES_DIR = os.path.join("reports", "traces")
+
+
+def enable_tracing(chrome_options):
+    """Have ChromeDriver trace continuously into its performance log"""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {
+        "enableNetwork": False,
+        "enablePage": False,
+        "traceCategories": TRACE_CATEGORIES,
+    })
+
+
+class TraceBuffer:
+    """Bounded ring buffer of the most recent trace events of a browser"""
+
+    def __init__(self, driver, max_events=TRACE_BUFFER_EVENTS):
+        self.driver = driver
+        self.events = deque(maxlen=max_events)
+
+    def drain(self):
+        """Move pending trace events from ChromeDriver into the ring buffer"""
+        try:
+            entries = self.driver.get_log("performance")
+        except WebDriverException:
+            return
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            if message.get("method") == "Tracing.dataCollected":
+                self.events.append(message["params"])
+
+    def flush(self, name):
+        """Write the buffered events as a Chrome trace file, return its path"""
+        self.drain()
+        os.makedirs(TRACES_DIR, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)[:100]
+        path = os.path.join(TRACES_DIR, f"{safe_name}_{int(time.time() * 1000)}.json")
+        with open(path, "w") as f:
+            json.dump({"traceEvents": list(self.events), "metadata": {"step": name}}, f)
+        self.events.clear()
+        return path
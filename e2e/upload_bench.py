@@ -0,0 +1,320 @@
+"""
+Upload and image-serving throughput benchmark
+
+1. Uploads route photos of UPLOAD_BENCH_SIZES_MB (phone photo up to 20 MB)
+   to POST /api/upload/route-photo. Sizes over the API's 10 MB limit time
+   the rejection, which only happens once the whole body has been parsed.
+2. Hammers GET /uploads/* (the files uploaded in step 1) and
+   GET /api/image/proxy (images served by a local stand-in origin) from
+   concurrent keep-alive clients at each UPLOAD_BENCH_CONCURRENCY level.
+
+Reports requests/s, MB/s, latency percentiles and errors per scenario, and
+samples the API process RSS over the whole run (reports/upload_bench_rss.csv).
+Results are saved in the performance history under the "upload-bench" suite.
+
+Usage:
+    python upload_bench.py
+    python upload_bench.py --concurrency 1,16 --duration 30
+    python upload_bench.py --api-pid 12345      # When the API port cannot be mapped to a process
+"""
+
+import argparse
+import csv
+import http.client
+import os
+import re
+import subprocess
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api_client import ApiClient
+from bench import BenchSamples, api_pid, save_bench_run
+from config import (
+    API_URL,
+    BASE_URL,
+    ADMIN_EMAIL,
+    ADMIN_PASSWORD,
+    UPLOAD_BENCH_SIZES_MB,
+    UPLOAD_BENCH_PROXY_SIZES_KB,
+    UPLOAD_BENCH_CONCURRENCY,
+    UPLOAD_BENCH_DURATION,
+    UPLOAD_BENCH_RSS_INTERVAL,
+)
+from perf_stats import percentile
+
+
+RSS_CSV_PATH = os.path.join("reports", "upload_bench_rss.csv")
+
+
+def fake_jpeg(size):
+    """Bytes of `size` with JPEG markers; the API only checks the declared type"""
+    return b"\xff\xd8\xff\xe0" + os.urandom(max(0, size - 6)) + b"\xff\xd9"
+
+
+def multipart(field, filename, content_type, data):
+    """multipart/form-data body with a single file, return (body, content type)"""
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    return head + data + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+# ---------- API process memory ----------
+
+def rss_mb(pid):
+    """Resident set size of a process in MB, None if it cannot be read"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            match = re.search(r"VmRSS:\s+(\d+) kB", f.read())
+            return int(match.group(1)) / 1024 if match else None
+    except OSError:
+        pass
+    try:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True)
+        return int(out.stdout.strip()) / 1024 if out.stdout.strip() else None
+    except (OSError, ValueError):
+        return None
+
+
+class RssSampler:
+    """Samples a process RSS in the background, tagged with the current phase"""
+
+    def __init__(self, pid, interval=UPLOAD_BENCH_RSS_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.phase = "idle"
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._start = time.perf_counter()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append((time.perf_counter() - self._start, self.phase, rss))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def peak(self, phase=None):
+        values = [rss for _, p, rss in self.samples if phase is None or p == phase]
+        return max(values) if values else None
+
+    def write_csv(self, path=RSS_CSV_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["seconds", "phase", "rss_mb"])
+            for t, phase, rss in self.samples:
+                writer.writerow([round(t, 2), phase, round(rss, 1)])
+        return path
+
+
+# ---------- stand-in image origin ----------
+
+class ImageOrigin:
+    """Local HTTP server standing in for a remote image host: GET /image/<kb>.jpg"""
+
+    def __init__(self):
+        images = {}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                match = re.fullmatch(r"/image/(\d+)\.jpg", self.path)
+                if not match:
+                    self.send_error(404)
+                    return
+                kb = int(match.group(1))
+                if kb not in images:
+                    images[kb] = fake_jpeg(kb * 1024)
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(images[kb])))
+                self.end_headers()
+                self.wfile.write(images[kb])
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="image-origin", daemon=True)
+
+    def url(self, kb):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/image/{kb}.jpg"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------- benchmark ----------
+
+def upload_photos(api, sizes_mb):
+    """Upload one photo per size, return (results, URLs of the stored files)"""
+    results, urls = [], []
+    for size_mb in sizes_mb:
+        body, content_type = multipart("photo", "bench.jpg", "image/jpeg", fake_jpeg(int(size_mb * 1024 * 1024)))
+        start = time.perf_counter()
+        try:
+            response = api.request("POST", "/api/upload/route-photo", body, content_type)
+            status, payload, elapsed = response.status, response.body, response.elapsed_ms
+        except (OSError, http.client.HTTPException):
+            # Server closed the connection mid-body
+            status, payload, elapsed = 0, b"", (time.perf_counter() - start) * 1000
+        results.append({"size_mb": size_mb, "status": status, "ms": elapsed,
+                        "mb_s": size_mb / (elapsed / 1000) if elapsed else 0})
+        if status == 200:
+            url = re.search(rb'"url":"([^"]+)"', payload)
+            if url:
+                urls.append(url.group(1).decode())
+    return results, urls
+
+
+def hammer(api, paths, concurrency, duration):
+    """GET `paths` round-robin from `concurrency` threads sharing the client's keep-alive pool"""
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        latencies, received, errors = [], 0, 0
+        n = index
+        while time.perf_counter() < deadline:
+            path = paths[n % len(paths)]
+            n += 1
+            try:
+                response = api.request("GET", path)
+            except (OSError, http.client.HTTPException):
+                # Connection dropped under load; the pool opens a new one
+                errors += 1
+                continue
+            if response.status != 200:
+                errors += 1
+                continue
+            latencies.append(response.elapsed_ms)
+            received += len(response.body)
+        return latencies, received, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies = [ms for r in results for ms in r[0]]
+    received = sum(r[1] for r in results)
+    return {
+        "requests": len(latencies),
+        "errors": sum(r[2] for r in results),
+        "rps": len(latencies) / wall,
+        "mb_s": received / 1024 / 1024 / wall,
+        "p50": percentile(latencies, 50) if latencies else 0,
+        "p90": percentile(latencies, 90) if latencies else 0,
+        "p99": percentile(latencies, 99) if latencies else 0,
+        "max": max(latencies, default=0),
+    }
+
+
+def run(concurrency_levels, duration, pid=None, store=True):
+    # One pooled connection per concurrent reader at the highest level
+    api = ApiClient(API_URL, BASE_URL, pool_size=max(concurrency_levels))
+    api.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)
+
+    api_port = urllib.parse.urlsplit(API_URL).port or 80
+    pid = pid or api_pid()
+    sampler = RssSampler(pid) if pid else None
+    if sampler:
+        sampler.start()
+    else:
+        print(f"API process on port {api_port} not found, RSS not sampled (use --api-pid)")
+
+    samples = BenchSamples("upload_bench.py")
+    record = samples.record
+
+    try:
+        print("\nUploads (POST /api/upload/route-photo):")
+        if sampler:
+            sampler.phase = "upload"
+        uploads, upload_urls = upload_photos(api, UPLOAD_BENCH_SIZES_MB)
+        for u in uploads:
+            print(f"  {u['size_mb']:>5} MB  HTTP {u['status']}  {u['ms']:>8.0f}ms  {u['mb_s']:>6.1f} MB/s")
+            record(f"upload:{u['size_mb']}MB", u["ms"])
+
+        scenarios = []
+        if upload_urls:
+            scenarios.append(("static /uploads", [urllib.parse.urlsplit(u).path for u in upload_urls]))
+        else:
+            print("  No upload succeeded (Cloudinary configured?), skipping /uploads/*")
+        with ImageOrigin() as origin:
+            for kb in UPLOAD_BENCH_PROXY_SIZES_KB:
+                query = urllib.parse.urlencode({"url": origin.url(kb)})
+                scenarios.append((f"proxy {kb}KB", [f"/api/image/proxy?{query}"]))
+
+            print(f"\nConcurrent reads ({duration}s per level):")
+            print(f"  {'scenario':<18}{'clients':>8}{'req/s':>9}{'MB/s':>8}"
+                  f"{'p50':>8}{'p90':>8}{'p99':>8}{'errors':>8}{'peak RSS':>10}")
+            for name, paths in scenarios:
+                for concurrency in concurrency_levels:
+                    phase = f"{name} x{concurrency}"
+                    if sampler:
+                        sampler.phase = phase
+                    r = hammer(api, paths, concurrency, duration)
+                    peak = sampler.peak(phase) if sampler else None
+                    print(f"  {name:<18}{concurrency:>8}{r['rps']:>9.1f}{r['mb_s']:>8.1f}"
+                          f"{r['p50']:>7.0f}ms{r['p90']:>6.0f}ms{r['p99']:>6.0f}ms{r['errors']:>8}"
+                          f"{f'{peak:.0f}MB' if peak else '-':>10}")
+                    for metric in ("p50", "p90", "p99"):
+                        record(f"{phase}:{metric}", r[metric])
+                    if peak:
+                        record(f"{phase}:peak_rss_mb", peak)
+        # Leave the uploads directory as it was
+        for url in upload_urls:
+            api.request("DELETE", "/api/upload/photo", {"url": url})
+    finally:
+        api.close()
+        if sampler:
+            sampler.stop()
+
+    if sampler and sampler.samples:
+        rss = [s[2] for s in sampler.samples]
+        print(f"\nAPI RSS: {rss[0]:.0f}MB at start, {max(rss):.0f}MB peak, {rss[-1]:.0f}MB at end "
+              f"({sampler.write_csv()})")
+
+    if store and samples:
+        save_bench_run(samples, "upload-bench")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload and image-serving throughput benchmark")
+    parser.add_argument("--concurrency", default=",".join(map(str, UPLOAD_BENCH_CONCURRENCY)),
+                        help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=UPLOAD_BENCH_DURATION,
+                        help="Seconds per scenario and concurrency level")
+    parser.add_argument("--api-pid", type=int, help="API process id for RSS sampling")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    run([int(c) for c in args.concurrency.split(",")], args.duration,
+        pid=args.api_pid, store=not args.no_store)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,271 @@
+"""
+Concurrent validation write benchmark
+
+Many climbers, each with their own Better Auth session, hammer a few popular
+routes through the validations API for VALIDATION_BENCH_DURATION seconds:
+- create / re-submit   POST /api/validations (upsert on user + route)
+- flip status          PUT /api/validations/:id (EN_PROJET <-> VALIDE)
+- favorite             POST /api/validations/:id/favorite (read-modify-write toggle)
+A share of the writes is sent twice at once (VALIDATION_BENCH_DOUBLE_TAP),
+like a double long press, to race the API's check-then-write handlers.
+
+Reports write throughput, latency percentiles and errors per operation, and
+deadlocks from pg_stat_database. Afterwards every climber's validations are
+compared with the last write the API acknowledged (lost updates), and
+GET /api/routes/:id/completion-count with the expected VALIDE count.
+
+Usage:
+    python validation_bench.py
+    python validation_bench.py --users 200 --routes 1 --duration 60
+    python validation_bench.py --cleanup      # Remove bench climbers and routes left by an aborted run
+"""
+
+import argparse
+import asyncio
+import http.client
+import random
+import time
+
+from api_client import ApiError, AsyncApiClient
+from bench import BenchSamples, save_bench_run
+from bench_users import close_clients, delete_accounts, sign_up_clients
+from config import (
+    ADMIN_EMAIL,
+    ADMIN_PASSWORD,
+    VALIDATION_BENCH_USERS,
+    VALIDATION_BENCH_ROUTES,
+    VALIDATION_BENCH_DURATION,
+    VALIDATION_BENCH_DOUBLE_TAP,
+)
+from db import connect
+from perf_stats import percentile
+
+
+BENCH_DOMAIN = "validation.bench"
+ROUTE_PREFIX = "VB bench"
+OPERATIONS = ("create", "flip", "favorite")
+CONNECTION_ERRORS = (OSError, http.client.HTTPException, asyncio.IncompleteReadError, asyncio.TimeoutError)
+
+
+def route_body(index):
+    return {
+        "name": f"{ROUTE_PREFIX} {index}",
+        "difficulty": "Rouge",
+        "holdColorHex": "#FF5733",
+        "holdColorCategory": "red",
+        "sector": "Secteur A",
+        "mainPhoto": "/uploads/routes/bench.jpg",
+    }
+
+
+def deadlock_count(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        return cur.fetchone()[0]
+
+
+class Outcomes:
+    """Latencies and errors per operation"""
+
+    def __init__(self):
+        self.latencies = {op: [] for op in OPERATIONS}
+        self.errors = {op: {} for op in OPERATIONS}
+
+    async def timed(self, op, request):
+        """Await `request`, return its result or None on error"""
+        start = time.perf_counter()
+        try:
+            result = await request
+        except ApiError as e:
+            self.errors[op][str(e.status)] = self.errors[op].get(str(e.status), 0) + 1
+            return None
+        except CONNECTION_ERRORS:
+            self.errors[op]["connection"] = self.errors[op].get("connection", 0) + 1
+            return None
+        self.latencies[op].append((time.perf_counter() - start) * 1000)
+        return result
+
+
+async def climber(api, routes, deadline, outcomes, expected, rng, double_tap):
+    """One user writing validations on the popular routes until `deadline`"""
+    validation_ids = {}
+    # The first route is the most popular
+    weights = [1 / (i + 1) for i in range(len(routes))]
+
+    while time.perf_counter() < deadline:
+        route_id = rng.choices(routes, weights)[0]
+        state = expected.setdefault(route_id, {"status": None, "isFavorite": False, "certain": True})
+        validation_id = validation_ids.get(route_id)
+        op = "create" if validation_id is None else rng.choices(OPERATIONS, (3, 5, 2))[0]
+        taps = 2 if rng.random() < double_tap else 1
+
+        if op == "create":
+            status = rng.choice(("VALIDE", "EN_PROJET"))
+            attempts = rng.randint(1, 8)
+            results = await asyncio.gather(*(
+                outcomes.timed(op, api.validations.create(route_id, status, attempts, is_flashed=attempts == 1))
+                for _ in range(taps)
+            ))
+            applied = [r for r in results if r]
+            if applied:
+                validation_ids[route_id] = applied[0]["id"]
+                state.update(status=status, certain=True)
+            else:
+                state["certain"] = False
+        elif op == "flip":
+            status = "EN_PROJET" if state["status"] == "VALIDE" else "VALIDE"
+            results = await asyncio.gather(*(
+                outcomes.timed(op, api.validations.update(validation_id, {"status": status}))
+                for _ in range(taps)
+            ))
+            if any(results):
+                state.update(status=status, certain=state["certain"] or all(results))
+            else:
+                state["certain"] = False
+        else:
+            results = await asyncio.gather(*(
+                outcomes.timed(op, api.validations.toggle_favorite(validation_id)) for _ in range(taps)
+            ))
+            # Each acknowledged toggle flips the flag once
+            for r in results:
+                if r:
+                    state["isFavorite"] = not state["isFavorite"]
+            if not all(results):
+                state["certain"] = False
+
+
+async def verify(clients, expectations, routes, admin, baseline):
+    """(lost updates, completion-count mismatches) against the acknowledged writes"""
+    lost = []
+    for api, expected in zip(clients, expectations):
+        actual = {v["routeId"]: v for v in await api.validations.list()}
+        for route_id, state in expected.items():
+            if not state["certain"] or state["status"] is None:
+                continue
+            row = actual.get(route_id)
+            if row is None:
+                lost.append(f"{api.user['email']} route {route_id}: validation missing")
+                continue
+            for field in ("status", "isFavorite"):
+                if row[field] != state[field]:
+                    lost.append(f"{api.user['email']} route {route_id}: {field} is {row[field]}, "
+                                f"last acknowledged write set {state[field]}")
+
+    counts = []
+    for route_id in routes:
+        states = [e[route_id] for e in expectations if route_id in e]
+        if not all(s["certain"] for s in states):
+            continue
+        expected_count = baseline[route_id] + sum(s["status"] == "VALIDE" for s in states)
+        actual_count = await admin.routes.completion_count(route_id)
+        if actual_count != expected_count:
+            counts.append(f"route {route_id}: completion-count {actual_count}, expected {expected_count}")
+    return lost, counts
+
+
+async def run(users, route_count, duration, double_tap, seed=0):
+    conn = connect()
+    admin = AsyncApiClient(pool_size=4)
+    clients, routes = [], []
+    try:
+        await admin.sign_in(ADMIN_EMAIL, ADMIN_PASSWORD)
+        routes = [r["id"] for r in await admin.routes.create_many(route_body(i) for i in range(route_count))]
+        baseline = {r: await admin.routes.completion_count(r) for r in routes}
+        print(f"Signing up {users} climbers...")
+        clients = await sign_up_clients(BENCH_DOMAIN, users, pool_size=2)
+
+        outcomes = Outcomes()
+        expectations = [{} for _ in clients]
+        deadlocks_before = deadlock_count(conn)
+        print(f"{users} climbers writing on {route_count} routes for {duration}s "
+              f"({double_tap:.0%} double taps)")
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            climber(api, routes, deadline, outcomes, expected, random.Random(seed + i), double_tap)
+            for i, (api, expected) in enumerate(zip(clients, expectations))
+        ))
+        elapsed = time.perf_counter() - start
+        # pg_stat_database is flushed about once a second
+        await asyncio.sleep(1.5)
+        deadlocks = deadlock_count(conn) - deadlocks_before
+
+        lost, count_mismatches = await verify(clients, expectations, routes, admin, baseline)
+        return report(outcomes, elapsed, deadlocks, lost, count_mismatches)
+    finally:
+        await close_clients(clients)
+        await admin.close()
+        cleanup(conn)
+        conn.close()
+
+
+def report(outcomes, elapsed, deadlocks, lost, count_mismatches):
+    """Print the results, return the samples for the performance history"""
+    samples = BenchSamples("validation_bench.py")
+    record = samples.record
+
+    writes = sum(len(v) for v in outcomes.latencies.values())
+    print(f"\n{writes} acknowledged writes in {elapsed:.1f}s: {writes / elapsed:.1f} writes/s")
+    print(f"  {'operation':<10}{'ok':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  errors")
+    for op in OPERATIONS:
+        ms = outcomes.latencies[op]
+        errors = ", ".join(f"{k}: {v}" for k, v in sorted(outcomes.errors[op].items())) or "-"
+        if ms:
+            print(f"  {op:<10}{len(ms):>7}{percentile(ms, 50):>7.0f}ms{percentile(ms, 95):>7.0f}ms"
+                  f"{percentile(ms, 99):>7.0f}ms{max(ms):>7.0f}ms  {errors}")
+            for q in (50, 95, 99):
+                record(f"{op}:p{q}", percentile(ms, q))
+        else:
+            print(f"  {op:<10}{0:>7}{'-':>45}  {errors}")
+        record(f"{op}:errors", sum(outcomes.errors[op].values()))
+    record("writes_per_s", writes / elapsed)
+    record("deadlocks", deadlocks)
+    record("lost_updates", len(lost))
+    record("completion_count_mismatches", len(count_mismatches))
+
+    print(f"\nDeadlocks: {deadlocks}")
+    print(f"Lost updates: {len(lost)}")
+    for line in lost[:20]:
+        print(f"  {line}")
+    print(f"Completion-count mismatches: {len(count_mismatches)}")
+    for line in count_mismatches:
+        print(f"  {line}")
+    return samples
+
+
+def cleanup(conn):
+    removed = delete_accounts(conn, BENCH_DOMAIN)
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM validations WHERE route_id IN (SELECT id FROM routes WHERE name LIKE %s)",
+                    (f"{ROUTE_PREFIX} %",))
+        cur.execute("DELETE FROM routes WHERE name LIKE %s", (f"{ROUTE_PREFIX} %",))
+        print(f"Removed {removed} bench climbers and {cur.rowcount} bench routes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent validation write benchmark")
+    parser.add_argument("--users", type=int, default=VALIDATION_BENCH_USERS)
+    parser.add_argument("--routes", type=int, default=VALIDATION_BENCH_ROUTES, help="Popular routes written to")
+    parser.add_argument("--duration", type=float, default=VALIDATION_BENCH_DURATION, help="Seconds of writes")
+    parser.add_argument("--double-tap", type=float, default=VALIDATION_BENCH_DOUBLE_TAP,
+                        help="Share of writes sent twice concurrently")
+    parser.add_argument("--cleanup", action="store_true", help="Remove leftovers of an aborted run and exit")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    if args.cleanup:
+        conn = connect()
+        try:
+            cleanup(conn)
+        finally:
+            conn.close()
+        return 0
+
+    samples = asyncio.run(run(args.users, args.routes, args.duration, args.double_tap))
+    if not args.no_store:
+        save_bench_run(samples, "validation-bench")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
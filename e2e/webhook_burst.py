@@ -0,0 +1,340 @@
+"""
+Webhook burst replay benchmark
+
+Generates Stripe events signed locally with WEBHOOK_SECRET (no Stripe
+account involved) and replays them against the two handlers:
+- stripe    POST /api/stripe/webhook (routes/stripe.ts), the one the app uses
+- webhooks  POST /api/webhooks/stripe (routes/webhooks.ts), the older handler
+
+Each of WEBHOOK_BURST_CUSTOMERS seeded climbers goes through a subscription
+lifecycle: checkout.session.completed, customer.subscription.updated and,
+for WEBHOOK_BURST_CANCEL_SHARE of them, customer.subscription.deleted.
+1. concurrency sweep: the lifecycles are delivered with
+   WEBHOOK_BURST_CONCURRENCY deliveries in flight, the events of one customer
+   in order
+2. retry storm: from the settled state, every event is delivered again
+   WEBHOOK_BURST_DUPLICATES times, shuffled and re-signed like Stripe's
+   retries, WEBHOOK_BURST_SIZES deliveries at a time
+
+Reported per run: acceptance latency and throughput, DB statements (or
+transactions) and users row updates per delivery, and the climbers whose
+subscription columns differ from what the lifecycle should leave. After the
+storm those are the duplicate deliveries the handler is not idempotent to.
+
+The API must run with STRIPE_WEBHOOK_SECRET set to WEBHOOK_SECRET and any
+STRIPE_SECRET_KEY (events are verified offline).
+
+Usage:
+    python webhook_burst.py
+    python webhook_burst.py --endpoint stripe --customers 1000
+    python webhook_burst.py --cleanup
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import time
+
+from api_client import AsyncApiClient
+from bench import BenchSamples, DbActivity, save_bench_run
+from bench_users import delete_accounts
+from config import (
+    WEBHOOK_SECRET,
+    WEBHOOK_BURST_CUSTOMERS,
+    WEBHOOK_BURST_CANCEL_SHARE,
+    WEBHOOK_BURST_CONCURRENCY,
+    WEBHOOK_BURST_SIZES,
+    WEBHOOK_BURST_DUPLICATES,
+)
+from db import connect
+from perf_stats import percentile
+
+
+ENDPOINTS = {"stripe": "/api/stripe/webhook", "webhooks": "/api/webhooks/stripe"}
+BENCH_DOMAIN = "webhook.bench"
+USER_PREFIX = "whbench-"
+# packages/payments pins this API version
+STRIPE_API_VERSION = "2025-02-24.acacia"
+PRICE_ID = "price_bench_premium"
+# Concurrency of the unmeasured replay that settles the state before a storm
+SETTLE_CONCURRENCY = 10
+
+
+# ---------- events ----------
+
+def sign(payload, secret=WEBHOOK_SECRET, timestamp=None):
+    """Stripe-Signature header: HMAC-SHA256 of "<timestamp>.<payload>" keyed with the endpoint secret"""
+    timestamp = int(timestamp or time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def event(event_id, event_type, obj, created):
+    """Serialized Stripe event; duplicates of a delivery carry the same bytes"""
+    return json.dumps({
+        "id": event_id,
+        "object": "event",
+        "api_version": STRIPE_API_VERSION,
+        "created": created,
+        "livemode": False,
+        "pending_webhooks": 1,
+        "request": {"id": None, "idempotency_key": None},
+        "type": event_type,
+        "data": {"object": obj},
+    }).encode()
+
+
+def lifecycles(user_ids, cancel_share, rng):
+    """Per climber: their events in Stripe's order and the subscription columns stripe.ts should leave"""
+    now = int(time.time())
+    result = []
+    for i, user_id in enumerate(user_ids):
+        customer, subscription = f"cus_bench{i:06d}", f"sub_bench{i:06d}"
+        period_end = now + 30 * 86400 + i
+        events = [
+            event(f"evt_bench{i:06d}a", "checkout.session.completed", {
+                "id": f"cs_bench{i:06d}", "object": "checkout.session", "mode": "subscription",
+                "status": "complete", "payment_status": "paid", "customer": customer,
+                "subscription": subscription, "metadata": {"userId": user_id},
+            }, now),
+            event(f"evt_bench{i:06d}b", "customer.subscription.updated", {
+                "id": subscription, "object": "subscription", "customer": customer, "status": "active",
+                "current_period_end": period_end,
+                "items": {"object": "list", "data": [{"id": f"si_bench{i:06d}", "price": {"id": PRICE_ID}}]},
+            }, now + 1),
+        ]
+        if rng.random() < cancel_share:
+            events.append(event(f"evt_bench{i:06d}c", "customer.subscription.deleted", {
+                "id": subscription, "object": "subscription", "customer": customer, "status": "canceled",
+                "current_period_end": period_end,
+            }, now + 2))
+            expected = (customer, None, None, None, False)
+        else:
+            expected = (customer, subscription, PRICE_ID, period_end, True)
+        result.append({"user": user_id, "events": events, "expected": expected})
+    return result
+
+
+# ---------- DB ----------
+
+def seed_customers(conn, count):
+    delete_accounts(conn, BENCH_DOMAIN)
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO users (id, email, name, email_verified) "
+            "SELECT %(prefix)s || g, 'customer-' || g || '@' || %(domain)s, 'Bench customer ' || g, true "
+            "FROM generate_series(0, %(count)s - 1) g",
+            {"prefix": USER_PREFIX, "domain": BENCH_DOMAIN, "count": count},
+        )
+    return [f"{USER_PREFIX}{i}" for i in range(count)]
+
+
+def reset_customers(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE users SET is_premium = false, stripe_customer_id = NULL, stripe_subscription_id = NULL, "
+            "stripe_price_id = NULL, stripe_current_period_end = NULL WHERE email LIKE %s",
+            (f"%@{BENCH_DOMAIN}",),
+        )
+
+
+def diverged(conn, customers, endpoint):
+    """Climbers whose subscription columns differ from what the handler should leave"""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT id, stripe_customer_id, stripe_subscription_id, stripe_price_id, "
+            "extract(epoch FROM stripe_current_period_end)::bigint, is_premium FROM users WHERE email LIKE %s",
+            (f"%@{BENCH_DOMAIN}",),
+        )
+        state = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+    # routes/webhooks.ts only touches updated_at (its subscription fields are commented out)
+    untouched = (None, None, None, None, False)
+    return sum(state.get(c["user"]) != (c["expected"] if endpoint == "stripe" else untouched) for c in customers)
+
+
+def user_updates(conn):
+    """Rows updated in users so far; the statistics are flushed about once a second"""
+    time.sleep(1)
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_stat_clear_snapshot()")
+        cur.execute("SELECT n_tup_upd FROM pg_stat_user_tables WHERE relname = 'users'")
+        return cur.fetchone()[0]
+
+
+# ---------- delivery ----------
+
+class Deliveries:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+
+    async def send(self, api, path, payload):
+        """Deliver once, signed now; the latency is the API's acceptance time"""
+        try:
+            response = await api.request("POST", path, body=payload, content_type="application/json",
+                                         headers={"Stripe-Signature": sign(payload)})
+        except Exception as e:
+            self.statuses[type(e).__name__] = self.statuses.get(type(e).__name__, 0) + 1
+            return
+        self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+        self.latencies.append(response.elapsed_ms)
+
+    @property
+    def count(self):
+        return sum(self.statuses.values())
+
+    @property
+    def errors(self):
+        return sum(n for status, n in self.statuses.items() if status != 200)
+
+
+async def replay_ordered(api, path, customers, concurrency, deliveries):
+    """Every lifecycle once, `concurrency` customers at a time, each customer's events in order"""
+    queue = list(customers)
+
+    async def worker():
+        while queue:
+            customer = queue.pop()
+            for payload in customer["events"]:
+                await deliveries.send(api, path, payload)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def replay_storm(api, path, customers, duplicates, burst, rng, deliveries):
+    """Every event `duplicates` more times, shuffled, `burst` deliveries sent at once"""
+    payloads = [payload for c in customers for payload in c["events"] for _ in range(duplicates)]
+    rng.shuffle(payloads)
+    for start in range(0, len(payloads), burst):
+        await asyncio.gather(*(deliveries.send(api, path, p) for p in payloads[start:start + burst]))
+
+
+# ---------- runs ----------
+
+async def measured(label, replay, conn, db, customers, endpoint, record):
+    """Run one replay, print and record its cost and the climbers left in a wrong state"""
+    deliveries = Deliveries()
+    queries_before, updates_before = db.count(), user_updates(conn)
+    start = time.perf_counter()
+    await replay(deliveries)
+    elapsed = time.perf_counter() - start
+    queries, updates = db.count() - queries_before, user_updates(conn) - updates_before
+    wrong = diverged(conn, customers, endpoint)
+
+    n = max(deliveries.count, 1)
+    print(f"  {label:<22} {deliveries.count:>6} deliveries {deliveries.count / elapsed:>7.0f}/s  "
+          f"p50 {percentile(deliveries.latencies, 50) if deliveries.latencies else 0:>6.1f}ms  "
+          f"p95 {percentile(deliveries.latencies, 95) if deliveries.latencies else 0:>6.1f}ms  "
+          f"{queries / n:>5.1f} {db.unit}/delivery  {updates / n:>4.2f} users updates/delivery  "
+          f"{wrong} wrong")
+    if deliveries.errors:
+        print(f"    Not accepted: {', '.join(f'{k}: {v}' for k, v in deliveries.statuses.items() if k != 200)}")
+
+    prefix = f"{endpoint}:{label.replace(' ', '_')}"
+    if deliveries.latencies:
+        record(f"{prefix}:p95_ms", percentile(deliveries.latencies, 95))
+        record(f"{prefix}:p99_ms", percentile(deliveries.latencies, 99))
+    record(f"{prefix}:per_s", deliveries.count / elapsed)
+    record(f"{prefix}:db_per_delivery", queries / n)
+    record(f"{prefix}:user_updates_per_delivery", updates / n)
+    record(f"{prefix}:errors", deliveries.errors)
+    record(f"{prefix}:wrong_state", wrong)
+    return wrong
+
+
+async def run_endpoint(endpoint, customers, conn, db, record):
+    path = ENDPOINTS[endpoint]
+    print(f"\n=== {path} ({endpoint}) ===")
+    async with AsyncApiClient(pool_size=max(*WEBHOOK_BURST_CONCURRENCY, *WEBHOOK_BURST_SIZES)) as api:
+        for concurrency in WEBHOOK_BURST_CONCURRENCY:
+            reset_customers(conn)
+            await measured(f"concurrency {concurrency}",
+                           lambda d, c=concurrency: replay_ordered(api, path, customers, c, d),
+                           conn, db, customers, endpoint, record)
+
+        for burst in WEBHOOK_BURST_SIZES:
+            reset_customers(conn)
+            await replay_ordered(api, path, customers, SETTLE_CONCURRENCY, Deliveries())
+            if diverged(conn, customers, endpoint):
+                print(f"  burst {burst}: the in-order replay already leaves wrong states, storm skipped")
+                continue
+            rng = random.Random(burst)
+            wrong = await measured(f"storm burst {burst}",
+                                   lambda d, b=burst: replay_storm(api, path, customers, WEBHOOK_BURST_DUPLICATES,
+                                                                   b, rng, d),
+                                   conn, db, customers, endpoint, record)
+            if wrong:
+                print(f"    {wrong} climbers changed by duplicate deliveries: the handler is not idempotent "
+                      f"to out-of-order retries")
+
+
+async def check_endpoint(path):
+    """Fail early when the handler rejects our signatures, and check that it rejects bad ones"""
+    payload = event("evt_bench_check", "customer.created", {"id": "cus_bench_check", "object": "customer"},
+                    int(time.time()))
+    async with AsyncApiClient(pool_size=1) as api:
+        response = await api.request("POST", path, body=payload, content_type="application/json",
+                                     headers={"Stripe-Signature": sign(payload)})
+        if not response.ok:
+            raise SystemExit(f"{path} answered {response.status} {response.body[:200].decode('utf-8', 'replace')}: "
+                             f"start the API with STRIPE_WEBHOOK_SECRET={WEBHOOK_SECRET} and a STRIPE_SECRET_KEY")
+        forged = await api.request("POST", path, body=payload, content_type="application/json",
+                                   headers={"Stripe-Signature": sign(payload, secret="whsec_forged")})
+        if forged.ok:
+            raise SystemExit(f"{path} accepted an event signed with another secret")
+
+
+def cleanup(conn):
+    deleted = delete_accounts(conn, BENCH_DOMAIN)
+    print(f"Removed {deleted} bench customers")
+
+
+async def run(endpoints, count):
+    for endpoint in endpoints:
+        await check_endpoint(ENDPOINTS[endpoint])
+    conn = connect()
+    db = DbActivity()
+    samples = BenchSamples("webhook_burst.py")
+    record = samples.record
+
+    try:
+        customers = lifecycles(seed_customers(conn, count), WEBHOOK_BURST_CANCEL_SHARE, random.Random(0))
+        events = sum(len(c["events"]) for c in customers)
+        print(f"{count} customers, {events} events, {WEBHOOK_BURST_DUPLICATES} duplicates each in the storm")
+        for endpoint in endpoints:
+            await run_endpoint(endpoint, customers, conn, db, record)
+    finally:
+        db.close()
+        cleanup(conn)
+        conn.close()
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Webhook burst replay benchmark")
+    parser.add_argument("--endpoint", choices=[*ENDPOINTS, "all"], default="all")
+    parser.add_argument("--customers", type=int, default=WEBHOOK_BURST_CUSTOMERS)
+    parser.add_argument("--cleanup", action="store_true", help="Remove leftovers of an aborted run and exit")
+    parser.add_argument("--no-store", action="store_true", help="Do not save to the performance history")
+    args = parser.parse_args(argv)
+
+    if args.cleanup:
+        conn = connect()
+        try:
+            cleanup(conn)
+        finally:
+            conn.close()
+        return 0
+
+    endpoints = list(ENDPOINTS) if args.endpoint == "all" else [args.endpoint]
+    samples = asyncio.run(run(endpoints, args.customers))
+    if not args.no_store:
+        save_bench_run(samples, "webhook-burst")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())